@@ -2,38 +2,225 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from typing import List, Dict, Any
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, List, Dict, Any, Optional
 import pandas as pd
-from Ingestion.metadat_Extractor import MetadataExtractor
+from config.config import settings
+from Ingestion.extraction_cache import ExtractionCache
+from Ingestion.field_parsers import FIELD_PARSERS, parse_fields
+from Ingestion.metadat_Extractor import FIELD_SOURCES, ITEM_FIELDS, MetadataExtractor
+
+# "field": one LLM call per field, "item": one call per item, "batch": one call per batch of items
+EXTRACTION_MODES = ("field", "item", "batch")
 
 class DataProcessor:
     """Processes assessment data into a structured format."""
-    
-    def __init__(self, metadata_extractor: MetadataExtractor):
+
+    def __init__(self, metadata_extractor: MetadataExtractor, max_workers: int = None,
+                 extraction_mode: str = None, batch_size: int = None,
+                 extraction_cache: Optional[ExtractionCache] = None):
         """
         Initialize the data processor.
-        
+
         Args:
             metadata_extractor: Extractor to use for metadata fields
+            max_workers: Extraction tasks run concurrently (defaults to settings.ingestion_max_workers)
+            extraction_mode: One of EXTRACTION_MODES (defaults to settings.ingestion_extraction_mode)
+            batch_size: Items per LLM call in "batch" mode (defaults to settings.ingestion_extraction_batch_size)
+            extraction_cache: Optional persistent cache of extracted fields
         """
         self.metadata_extractor = metadata_extractor
-        
-    def process(self, data: List[Dict[str, Any]]) -> pd.DataFrame:
-        """Process assessment data into a structured DataFrame."""
-        processed_data = []
-        
-        for i,item in enumerate(data):
-            print(f"Processing item {i+1}/{len(data)}")
-            processed_item = {
-                'title': item.get('Title', ''),
-                'url': item.get('URL', ''),
-                'description': item.get('Description', ''),
-                'adaptive_support': self.metadata_extractor.extract_adaptive_support(item.get('Description', '')),
-                'assessment_type': self.metadata_extractor.extract_assessment_type(item.get('Description', '')),
-                'remote_support': self.metadata_extractor.extract_remote_support(item.get('Description', '')),
-                'job_levels': self.metadata_extractor.extract_metadata('Job Levels', item.get('Job Levels', '')),
-                'languages': self.metadata_extractor.extract_metadata('Languages', item.get('Languages', '')),
-                'duration_minutes': self.metadata_extractor.extract_metadata('Assessment Length', item.get('Assessment Length', ''))
+        self.max_workers = max_workers or settings.ingestion_max_workers
+        self.extraction_mode = extraction_mode or settings.ingestion_extraction_mode
+        if self.extraction_mode not in EXTRACTION_MODES:
+            raise ValueError(f"Unknown extraction mode {self.extraction_mode!r}; expected one of {EXTRACTION_MODES}")
+        self.batch_size = batch_size or settings.ingestion_extraction_batch_size
+        self.extraction_cache = extraction_cache
+        # URLs of items whose fields include fallbacks for failed LLM calls
+        self.failed_urls = set()
+        # Items whose regular fields the rules could not parse, see `llm_report`
+        self.rule_misses = []
+        self._completed = 0
+        self._progress_lock = threading.Lock()
+
+    @staticmethod
+    def _base_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields copied from the raw item without extraction."""
+        return {
+            'title': item.get('Title', ''),
+            'url': item.get('URL', ''),
+            'description': item.get('Description', ''),
+        }
+
+    @property
+    def prompt_version(self) -> str:
+        """Prompt family and version the extracted fields come from; batch mode shares the item prompt."""
+        family = "field" if self.extraction_mode == "field" else "item"
+        return f"{family}-{MetadataExtractor.PROMPT_VERSION}"
+
+    def _known_fields(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Fields parsed by rules, plus LLM-extracted fields found in the extraction cache."""
+        fields = parse_fields(item)
+        if self.extraction_cache is None:
+            return fields
+        for field in ITEM_FIELDS:
+            if field in fields:
+                continue
+            value = self.extraction_cache.get(field, item.get(FIELD_SOURCES[field], ''), self.prompt_version)
+            if value is not None:
+                fields[field] = value
+        return fields
+
+    def _cache_fields(self, item: Dict[str, Any], fields: Dict[str, Any]):
+        """Store freshly extracted fields, unless an LLM call failed and they are fallbacks."""
+        if self.metadata_extractor.had_failures():
+            self.failed_urls.add(item.get('URL', ''))
+            return
+        if self.extraction_cache is None:
+            return
+        for field, value in fields.items():
+            self.extraction_cache.set(field, item.get(FIELD_SOURCES[field], ''), self.prompt_version, value)
+
+    def process_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Extract several raw catalog items, keeping their order.
+
+        Rule-parsed and cached fields are used as is; only the remaining fields go to
+        the LLM, in one consolidated call per item (or per batch in "batch" mode).
+        """
+        known = [self._known_fields(item) for item in items]
+        missing = [index for index, fields in enumerate(known) if len(fields) < len(ITEM_FIELDS)]
+        if missing:
+            todo = [items[index] for index in missing]
+            todo_fields = [[field for field in ITEM_FIELDS if field not in known[index]] for index in missing]
+            self.metadata_extractor.reset_failures()
+            if self.extraction_mode == "batch":
+                union = [field for field in ITEM_FIELDS if any(field in fields for fields in todo_fields)]
+                extracted = self.metadata_extractor.extract_items(todo, union)
+            else:
+                extracted = [
+                    self.metadata_extractor.extract_item(item, fields) for item, fields in zip(todo, todo_fields)
+                ]
+            for index, fields in zip(missing, extracted):
+                fresh = {field: value for field, value in fields.items() if field not in known[index]}
+                self._cache_fields(items[index], fresh)
+                known[index].update(fresh)
+        return [{**self._base_fields(item), **fields} for item, fields in zip(items, known)]
+
+    def process_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Extract the structured fields of one raw catalog item."""
+        if self.extraction_mode != "field":
+            return self.process_batch([item])[0]
+        extractors = {
+            'adaptive_support': self.metadata_extractor.extract_adaptive_support,
+            'assessment_type': self.metadata_extractor.extract_assessment_type,
+            'remote_support': self.metadata_extractor.extract_remote_support,
+            'job_levels': lambda value: self.metadata_extractor.extract_metadata('Job Levels', value),
+            'languages': lambda value: self.metadata_extractor.extract_metadata('Languages', value),
+            'duration_minutes': lambda value: self.metadata_extractor.extract_metadata('Assessment Length', value),
+        }
+        fields = self._known_fields(item)
+        for field, extract in extractors.items():
+            if field not in fields:
+                self.metadata_extractor.reset_failures()
+                fields[field] = extract(item.get(FIELD_SOURCES[field], ''))
+                self._cache_fields(item, {field: fields[field]})
+        return {**self._base_fields(item), **fields}
+
+    def _report_progress(self, total: Optional[int], started_at: float, finished: int = 1):
+        """Count finished items and print progress with throughput (and ETA when the total is known)."""
+        with self._progress_lock:
+            previous = self._completed
+            self._completed += finished
+            completed = self._completed
+        step = max(1, total // 20) if total else 50
+        if completed == total or completed // step > previous // step:
+            elapsed = time.perf_counter() - started_at
+            rate = completed / elapsed if elapsed else 0.0
+            if total:
+                eta = (total - completed) / rate if rate else 0.0
+                progress = f"Processed {completed}/{total} items ({rate:.2f} items/s, ETA {eta:.0f}s, "
+            else:
+                progress = f"Processed {completed} items ({rate:.2f} items/s, "
+            stats = self.metadata_extractor.stats
+            print(f"{progress}{stats['calls']} LLM calls, {stats['tokens']} tokens, {stats['retries']} retries, "
+                  f"{stats['rate_limited']} rate limited, {stats['field_fallbacks']} field fallbacks)")
+
+    def reset(self):
+        """Clear the failure, rule-miss and progress records of a previous run."""
+        self._completed = 0
+        self.failed_urls = set()
+        self.rule_misses = []
+
+    def _record_rule_misses(self, items: List[Dict[str, Any]]):
+        """Remember the items whose regular fields the rules cannot parse."""
+        for item in items:
+            fields = {
+                field: item.get(source, '') for field, (source, parser) in FIELD_PARSERS.items()
+                if parser(item.get(source, '')) is None
             }
-            processed_data.append(processed_item)
-        return pd.DataFrame(processed_data)
\ No newline at end of file
+            if fields:
+                self.rule_misses.append({'title': item.get('Title', ''), 'url': item.get('URL', ''), 'fields': fields})
+
+    def process_stream(self, items: Iterable[Dict[str, Any]], total: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Extract raw catalog items as they arrive, yielding processed rows in input order.
+
+        Items (or batches of items in "batch" mode) are extracted by a bounded pool of
+        worker threads; the extractor's rate limiter keeps the combined call rate within
+        the provider's limits. At most two units per worker are in flight, so `items` is
+        only read as fast as rows are consumed and a long catalog never piles up in memory.
+
+        Args:
+            items: Raw catalog items, e.g. streamed from the catalog file
+            total: Number of items, if known, for the progress ETA
+        """
+        size = self.batch_size if self.extraction_mode == "batch" else 1
+        started_at = time.perf_counter()
+
+        def work(batch):
+            if self.extraction_mode == "batch":
+                processed_items = self.process_batch(batch)
+            else:
+                processed_items = [self.process_item(item) for item in batch]
+            self._report_progress(total, started_at, len(batch))
+            return processed_items
+
+        in_flight = deque()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extract")
+        try:
+            for batch in self._chunks(items, size):
+                self._record_rule_misses(batch)
+                in_flight.append(executor.submit(work, batch))
+                if len(in_flight) >= 2 * self.max_workers:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+        finally:
+            # Reached early when the consumer stops; drop the work it will never read
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    @staticmethod
+    def _chunks(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Group an item stream into lists of `size` items."""
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def process(self, data: List[Dict[str, Any]]) -> pd.DataFrame:
+        """
+        Process assessment data into a structured DataFrame.
+
+        Rows keep the input order regardless of which item finishes first; see
+        `process_stream` for bounded-memory processing of a stream of items.
+        """
+        self.reset()
+        return pd.DataFrame(list(self.process_stream(data, total=len(data))))
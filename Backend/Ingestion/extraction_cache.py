@@ -0,0 +1,63 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import json
+from typing import Any, Optional
+from config.config import settings
+from query.utils.cache import SQLiteStore
+
+class ExtractionCache:
+    """
+    Persistent cache of LLM-extracted metadata fields.
+
+    Entries are keyed by (field, hash of the source value, LLM model, prompt version),
+    so a re-run, or a run resumed after a crash, pays only for values it has not seen
+    with the current model and prompt.
+    """
+
+    def __init__(self, path: str = None, model: str = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file holding the extracted fields (defaults to settings.ingestion_cache_path)
+            model: LLM model the fields are extracted with (defaults to settings.llm_model_name)
+        """
+        self.store = SQLiteStore(path or settings.ingestion_cache_path, "extracted_fields")
+        self.model = model or settings.llm_model_name
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, field: str, value: str, prompt_version: str) -> str:
+        """Build the cache key for one field of one source value."""
+        value_hash = hashlib.sha256(str(value).encode("utf-8")).hexdigest()
+        return f"{field}\x00{value_hash}\x00{self.model}\x00{prompt_version}"
+
+    def get(self, field: str, value: str, prompt_version: str) -> Optional[Any]:
+        """
+        Look up a previously extracted field.
+
+        Args:
+            field: Extracted field name (e.g. "job_levels")
+            value: Raw text the field was extracted from
+            prompt_version: Version of the prompt that extracted it
+
+        Returns:
+            The cached field value, or None on a miss
+        """
+        blob = self.store.get(self._key(field, value, prompt_version))
+        if blob is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(blob)
+
+    def set(self, field: str, value: str, prompt_version: str, extracted: Any):
+        """Store an extracted field value."""
+        self.store.set(self._key(field, value, prompt_version), json.dumps(extracted))
+
+    def stats(self):
+        """Return hit/miss counters and the number of stored fields."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.store)}
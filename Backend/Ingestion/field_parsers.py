@@ -0,0 +1,104 @@
+import re
+from typing import Any, Dict, List, Optional
+from query.utils.vocabulary import canonical_job_level, canonical_language, match_assessment_type
+
+DURATION_PREFIX = re.compile(r"^\s*approximate completion time in minutes\s*=\s*", re.IGNORECASE)
+DURATION_PATTERNS = (
+    re.compile(r"^(\d+)(?:\s*minutes?)?$"),
+    re.compile(r"^max\.?\s*(\d+)$"),
+    re.compile(r"^\d+\s*(?:to|-)\s*(\d+)$"),
+    re.compile(r"^untimed,?\s*approx\.?\s*(\d+)$"),
+)
+# Recognized values that carry no duration; stored as 0 like a missing length
+NO_DURATION = {"", "-", "untimed", "variable", "tbc", "n/a", "na"}
+
+def _split_list(text: str) -> List[str]:
+    """Split a comma-separated catalog list, dropping empty entries (the lists end with a comma)."""
+    return [entry.strip() for entry in (text or "").split(",") if entry.strip()]
+
+def parse_duration(text: str) -> Optional[int]:
+    """
+    Parse an "Assessment Length" value into minutes.
+
+    Ranges use their upper bound, so "under N minutes" filters never admit a longer test.
+
+    Returns:
+        Minutes (0 for untimed, variable or missing lengths), or None if the format is unknown
+    """
+    value = DURATION_PREFIX.sub("", (text or "").strip()).strip().lower()
+    if value in NO_DURATION:
+        return 0
+    for pattern in DURATION_PATTERNS:
+        match = pattern.match(value)
+        if match:
+            return int(match.group(1))
+    return None
+
+def parse_job_levels(text: str) -> Optional[List[str]]:
+    """
+    Parse a "Job Levels" list into canonical job levels.
+
+    Returns:
+        Canonical job levels in catalog order, or None if any entry is not a known level
+    """
+    levels = []
+    for entry in _split_list(text):
+        level = canonical_job_level(entry)
+        if level is None:
+            return None
+        if level not in levels:
+            levels.append(level)
+    return levels
+
+def parse_languages(text: str) -> Optional[List[str]]:
+    """
+    Parse a "Languages" list into lower-case names without regional indicators.
+
+    "English (USA)" becomes "english"; qualified names such as "Chinese Simplified"
+    keep their qualifier, as the query-side vocabulary expects.
+
+    Returns:
+        Canonical languages in catalog order, or None if any entry is not a known language
+    """
+    languages = []
+    for entry in _split_list(text):
+        language = canonical_language(entry)
+        if language is None:
+            return None
+        if language not in languages:
+            languages.append(language)
+    return languages
+
+def parse_assessment_type(text: str) -> Optional[str]:
+    """
+    Parse the assessment type a "Description" names, e.g. "a test of general cognitive ability".
+
+    Returns:
+        The canonical assessment type, or None if the description names none or several
+    """
+    return match_assessment_type(text)
+
+# Extracted field -> (raw catalog field, parser)
+FIELD_PARSERS = {
+    "duration_minutes": ("Assessment Length", parse_duration),
+    "languages": ("Languages", parse_languages),
+    "job_levels": ("Job Levels", parse_job_levels),
+}
+
+def parse_fields(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse every rule-parseable field of a raw catalog item.
+
+    Returns:
+        The fields the rules could parse; the others are left to the LLM
+    """
+    parsed = {}
+    for field, (source, parser) in FIELD_PARSERS.items():
+        value = parser(item.get(source, ""))
+        if value is not None:
+            parsed[field] = value
+    # Kept out of FIELD_PARSERS: a description naming no type is expected, not a rule miss
+    assessment_type = parse_assessment_type(item.get("Description", ""))
+    if assessment_type is not None:
+        parsed["assessment_type"] = assessment_type
+    return parsed
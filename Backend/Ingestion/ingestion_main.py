@@ -22,10 +22,15 @@ def main():
     # Run ingestion
     result = pipeline.ingest(r"D:\shl_assessment\Backend\shl_assessments.json")
     
-    # Display sample
-    processed_data = result["dataframe"]
-    print(f"Processed {len(processed_data)} items")
-    print(f"Vector index contains {len(result['index'].docstore.docs)} documents")
+    # Display summary
+    print(f"Processed {result['processed']} items")
+    print(f"Catalog changes: {result['changes']}")
+    if result["storage"]:
+        print(f"Storage: {result['storage']}")
+    if result["embeddings"]["generation"]:
+        print(f"Embedding store: {result['embeddings']}")
+    if result["version"]:
+        print(f"Collection version: {result['version']}")
     
 
 
@@ -2,10 +2,19 @@ import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+import pandas as pd
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+from config.config import settings
+from Ingestion.extraction_cache import ExtractionCache
+from Ingestion.manifest import IngestionManifest
 from Ingestion.metadat_Extractor import MetadataExtractor
 from Ingestion.data_processor import DataProcessor
 from Ingestion.qdrant__storage import QdrantStorage
+from Ingestion.source_reader import iter_catalog
+from Ingestion.staged_pipeline import StagedPipeline
+from query.services.embedding_store import EmbeddingGeneration, EmbeddingStore, GenerationWriter, text_hash
+from query.services.vector_store import read_collection_version
 
 class IngestionPipeline:
     """Main pipeline for ingesting assessment data."""
@@ -27,35 +36,222 @@ class IngestionPipeline:
             qdrant_in_memory: Whether to use in-memory Qdrant (if url is None)
         """
         self.metadata_extractor = MetadataExtractor(api_key, llm_model)
-        self.data_processor = DataProcessor(self.metadata_extractor)
+        self.extraction_cache = ExtractionCache(model=llm_model)
+        self.data_processor = DataProcessor(self.metadata_extractor, extraction_cache=self.extraction_cache)
         self.qdrant_storage = QdrantStorage(qdrant_collection, qdrant_url, qdrant_in_memory)
+        self.collection_name = qdrant_collection
+        self.qdrant_location = qdrant_url or (":memory:" if qdrant_in_memory else "local")
+        self.embedding_model = embedding_model
+        self.embedding_store = (
+            EmbeddingStore(model_name=embedding_model, collection=qdrant_collection)
+            if settings.embedding_store_enabled else None
+        )
         
-    def ingest(self, data_path: str, pickle_output_path: Optional[str] = None) -> Dict[str, Any]:
+    def ingest(self, data_path: str, pickle_output_path: Optional[str] = None,
+               manifest_path: Optional[str] = None, full: bool = False) -> Dict[str, Any]:
         """
-        Process the data, generate embeddings, and store in Qdrant.
+        Stream the new and changed items through extraction, embedding and upserting into Qdrant.
+        
+        The catalog (a JSON array or JSON Lines) is read item by item and flows through
+        three concurrent stages joined by bounded queues: extraction, embedding and
+        upserting. A slow stage holds back the ones before it, so memory stays flat as
+        the catalog grows and a run takes about as long as its slowest stage rather
+        than the sum of all three.
+        
+        Items are fingerprinted by content hash and compared with the manifest of the
+        previous run: unchanged items are skipped, removed ones are deleted from
+        Qdrant, and the manifest is checkpointed after every stored batch so a failed
+        run resumes where it stopped. Extracted fields come from the persistent
+        extraction cache whenever the same text was extracted before, and vectors
+        from the embedding store whenever the same description was embedded before;
+        a new store generation matching the collection is written at the end.
         
         Args:
-            data_path: Path to the raw JSON data file
-            pickle_output_path: Optional path to save the processed DataFrame
+            data_path: Path to the raw catalog file (JSON array or JSON Lines)
+            pickle_output_path: Optional path to save the processed DataFrame (new and changed
+                items only); its rows are kept in memory until the end of the run
+            manifest_path: Manifest/checkpoint file (defaults to settings.ingestion_manifest_path)
+            full: Re-process every item, ignoring the manifest
             
         Returns:
-            Dictionary with processed DataFrame and LlamaIndex index
+            Dictionary with the number of processed items, the processed DataFrame (only
+            when saved to `pickle_output_path`), LlamaIndex index (None if nothing was
+            stored), the collection version (None if nothing changed), change counts,
+            the items whose regular fields needed the LLM, storage throughput, embedding
+            store reuse and the busy time of every stage
         """
-        # Load data
-        with open(data_path, 'r') as f:
-            data = json.load(f)
-        
-        # Process data
-        processed_df = self.data_processor.process(data)
-                
+        manifest = IngestionManifest(
+            manifest_path or settings.ingestion_manifest_path,
+            self.collection_name, self.embedding_model, self.data_processor.prompt_version,
+            self.qdrant_location,
+        )
+        if full:
+            manifest.items = {}
+        manifest.check_collection(*self.qdrant_storage.collection_state())
+        manifest.seen = set()
+        generation = self.embedding_store.current() if self.embedding_store is not None else None
+        store_urls = {payload.get('url') for payload in generation.payloads} if generation is not None else set()
+        counts = {"new": 0, "changed": 0, "unchanged": 0, "removed": 0}
+        unchanged_urls = []
+        # Fingerprints of the items between reading and checkpointing
+        fingerprints = {}
+        embeddings = {"reused": 0, "generation": generation.name if generation is not None else None}
+
+        def pending_items():
+            for item in iter_catalog(data_path):
+                classified = manifest.classify(item)
+                if classified is None:
+                    continue
+                status, fingerprint = classified
+                url = item.get('URL', '')
+                # Unchanged items the store has no row for (e.g. it was just enabled) are stored
+                # again so the new generation covers the whole collection
+                if status == "unchanged" and (self.embedding_store is None or url in store_urls):
+                    counts["unchanged"] += 1
+                    unchanged_urls.append(url)
+                    continue
+                counts["new" if status == "new" else "changed"] += 1
+                fingerprints[url] = fingerprint
+                yield item
+
+        def extracted_batches():
+            rows = []
+            for row in self.data_processor.process_stream(pending_items()):
+                rows.append(row)
+                if len(rows) == settings.ingestion_stream_batch_size:
+                    yield pd.DataFrame(rows)
+                    rows = []
+            if rows:
+                yield pd.DataFrame(rows)
+
+        def embed(batch_df):
+            # Reuse the vectors of descriptions embedded by a previous run
+            if generation is not None:
+                batch_df['embedding'] = [
+                    generation.vector_for(text_hash(description)) for description in batch_df['description']
+                ]
+                embeddings["reused"] += int(batch_df['embedding'].notna().sum())
+            return batch_df, self.qdrant_storage.embed_batch(batch_df)
+
+        def upsert(batch):
+            batch_df, nodes = batch
+            # Drop stale points of the batch, including any written under random ids by
+            # older runs that kept no manifest
+            self.qdrant_storage.delete_urls(list(batch_df['url']))
+            self.qdrant_storage.upsert_nodes(nodes)
+            # Items stored with fallback fields stay out of the manifest so the next run retries them
+            for url in batch_df['url']:
+                fingerprint = fingerprints.pop(url)
+                if url not in self.data_processor.failed_urls:
+                    manifest.record(url, fingerprint)
+            manifest.save()
+            if writer is not None:
+                writer.append(
+                    [node.node_id for node in nodes],
+                    [text_hash(node.text) for node in nodes],
+                    [node_to_metadata_dict(node, remove_text=False, flat_metadata=False) for node in nodes],
+                    [node.embedding for node in nodes],
+                )
+            return batch_df.drop(columns=['embedding'], errors='ignore')
+
+        self.data_processor.reset()
+        self.qdrant_storage.stats = {}
+        writer = self.embedding_store.writer() if self.embedding_store is not None else None
+        pipeline = StagedPipeline(
+            ("extract", extracted_batches()), [("embed", embed), ("upsert", upsert)],
+            queue_size=settings.ingestion_queue_size,
+        )
+        frames = []
+        processed = 0
+        try:
+            for batch_df in pipeline:
+                processed += len(batch_df)
+                print(f"Stored {processed} points ({processed / (pipeline.elapsed or 1):.1f} points/s)")
+                if pickle_output_path:
+                    frames.append(batch_df)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        stages = pipeline.report()
+        print(f"Pipeline stages: {stages}")
+        index = self.qdrant_storage.finish(
+            processed, pipeline.wall_seconds,
+            pipeline.stats["embed"]["busy_seconds"], pipeline.stats["upsert"]["busy_seconds"],
+        )
+        print(f"Extraction cache: {self.extraction_cache.stats()}")
+        self._write_llm_report(self.data_processor.rule_misses)
+        if self.data_processor.failed_urls:
+            print(f"{len(self.data_processor.failed_urls)} items used fallback fields and will be retried next run")
+
         # Save DataFrame if output path is provided
+        processed_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
         if pickle_output_path:
             processed_df.to_pickle(pickle_output_path)
-            
-        # Store in Qdrant
-        index = self.qdrant_storage.store_data(processed_df)
+
+        # Delete items that left the catalog
+        removed = manifest.removed()
+        counts["removed"] = len(removed)
+        self.qdrant_storage.delete_urls(removed)
+        for url in removed:
+            manifest.remove(url)
+        print(f"Catalog changes: {counts}")
+
+        # Bump the collection version so query nodes drop cached responses
+        changed = counts["new"] + counts["changed"] + counts["removed"] > 0
+        version = self.qdrant_storage.write_version_stamp() if changed else None
+        if version is not None:
+            manifest.collection_version = version
+        manifest.save()
+
+        if writer is not None:
+            if changed or generation is None:
+                self._append_unchanged(writer, generation, unchanged_urls)
+                # A generation written without changes matches the version already in Qdrant
+                collection_version = version or read_collection_version(
+                    self.qdrant_storage.client, self.collection_name
+                )
+                embeddings["generation"] = writer.commit(collection_version)
+                print(f"Embedding store: {embeddings}")
+            else:
+                writer.abort()
         
         return {
-            "dataframe": processed_df,
-            "index": index
-        }
\ No newline at end of file
+            "processed": processed,
+            "dataframe": processed_df if pickle_output_path else None,
+            "index": index,
+            "version": version,
+            "changes": counts,
+            "llm_report": self.data_processor.rule_misses,
+            "storage": self.qdrant_storage.stats,
+            "embeddings": embeddings,
+            "stages": stages,
+        }
+
+    @staticmethod
+    def _append_unchanged(writer: GenerationWriter, generation: Optional[EmbeddingGeneration], urls: List[str],
+                          batch_size: int = 1024):
+        """Copy the previous generation's rows of the items this run left untouched into the new one."""
+        if generation is None:
+            return
+        row_by_url = {}
+        for row, payload in enumerate(generation.payloads):
+            row_by_url.setdefault(payload.get('url'), row)
+        rows = [row_by_url[url] for url in urls if url in row_by_url]
+        for start in range(0, len(rows), batch_size):
+            chunk = rows[start:start + batch_size]
+            writer.append(
+                [generation.ids[row] for row in chunk],
+                [generation.hashes[row] for row in chunk],
+                [generation.payloads[row] for row in chunk],
+                generation.vectors[chunk],
+            )
+
+    @staticmethod
+    def _write_llm_report(rule_misses):
+        """Print and save the items whose regular fields needed the LLM because the rules could not parse them."""
+        print(f"{len(rule_misses)} items had job levels, languages or lengths the rules could not parse")
+        for miss in rule_misses[:10]:
+            print(f"  {miss['title']}: {miss['fields']}")
+        with open(settings.ingestion_llm_report_path, 'w', encoding='utf-8') as f:
+            json.dump(rule_misses, f, indent=1)
@@ -0,0 +1,148 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hashlib
+import json
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+def item_fingerprint(item: Dict[str, Any]) -> str:
+    """Content hash of a raw catalog item, independent of key order."""
+    return hashlib.sha256(json.dumps(item, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+def point_id(url: str) -> str:
+    """Deterministic Qdrant point id for a catalog item, so re-ingesting it overwrites the old point."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, url))
+
+class IngestionManifest:
+    """
+    Record of the catalog items stored in a collection, by URL and content hash.
+
+    The manifest is saved after every stored batch, so it doubles as the checkpoint
+    a failed run resumes from: items already recorded with their current fingerprint
+    are skipped. It is only trusted for the Qdrant location, collection, embedding model
+    and extraction prompt it was written with, and only while the collection still holds
+    the version stamp of the run that last saved it (see `check_collection`); any change
+    there means a full re-ingest.
+    """
+
+    def __init__(self, path: str, collection: str, embedding_model: str, prompt_version: str,
+                 qdrant_location: str = None):
+        """
+        Load the manifest at `path`, or start an empty one.
+
+        Args:
+            path: JSON file holding the manifest
+            collection: Qdrant collection the items are stored in
+            embedding_model: Model the stored vectors were computed with
+            prompt_version: Extraction mode and prompt version the payloads came from
+            qdrant_location: Qdrant server URL, or ":memory:"/"local" for an embedded client
+        """
+        self.path = path
+        # URLs met by `classify` since the last `diff`
+        self.seen = set()
+        self.scope = {
+            "qdrant_location": qdrant_location, "collection": collection,
+            "embedding_model": embedding_model, "prompt_version": prompt_version,
+        }
+        self.items = {}
+        # Version stamp of the collection when the manifest was last in sync with it
+        self.collection_version = None
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            if all(saved.get(key) == value for key, value in self.scope.items()):
+                self.items = saved.get("items", {})
+                self.collection_version = saved.get("collection_version")
+            else:
+                print(f"Ignoring manifest {path}: written for {[saved.get(key) for key in self.scope]}")
+
+    def check_collection(self, exists: bool, points_count: int, collection_version: Optional[str]):
+        """
+        Discard the manifest if the collection no longer holds what it records.
+
+        That is the case when the collection is missing, was re-stamped by a run that
+        did not save this manifest (e.g. it was dropped and recreated), or holds fewer
+        points than recorded items. Items stored with fallback fields are not recorded,
+        so the collection may hold more points than the manifest lists.
+
+        Args:
+            exists: Whether the collection exists
+            points_count: Points in the collection
+            collection_version: Version stamp currently in the collection
+        """
+        if not self.items:
+            return
+        if not exists:
+            reason = "the collection does not exist"
+        elif collection_version != self.collection_version:
+            reason = f"the collection version is {collection_version}, not {self.collection_version}"
+        elif points_count < len(self.items):
+            reason = f"the collection holds {points_count} points for {len(self.items)} recorded items"
+        else:
+            return
+        print(f"Ignoring manifest {self.path}: {reason}")
+        self.items = {}
+
+    def classify(self, item: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """
+        Compare one catalog item with the stored items, for catalogs read as a stream.
+
+        Returns:
+            ("new" | "changed" | "unchanged", fingerprint), or None for a URL already seen
+        """
+        url = item.get("URL", "")
+        if url in self.seen:
+            return None
+        self.seen.add(url)
+        fingerprint = item_fingerprint(item)
+        stored = self.items.get(url)
+        if stored is None:
+            return "new", fingerprint
+        if stored["fingerprint"] != fingerprint:
+            return "changed", fingerprint
+        return "unchanged", fingerprint
+
+    def removed(self) -> List[str]:
+        """URLs of the stored items `classify` has not seen, i.e. those no longer in the catalog."""
+        return [url for url in self.items if url not in self.seen]
+
+    def diff(self, data: List[Dict[str, Any]]) -> Dict[str, List]:
+        """
+        Compare the catalog with the stored items.
+
+        Items are identified by URL; repeated URLs keep their first occurrence.
+
+        Returns:
+            Dict with "new", "changed" and "unchanged" lists of (item, fingerprint)
+            pairs, in catalog order, and "removed", the URLs no longer in the catalog
+        """
+        changes = {"new": [], "changed": [], "unchanged": [], "removed": []}
+        self.seen = set()
+        for item in data:
+            classified = self.classify(item)
+            if classified is not None:
+                status, fingerprint = classified
+                changes[status].append((item, fingerprint))
+        changes["removed"] = self.removed()
+        return changes
+
+    def record(self, url: str, fingerprint: str):
+        """Mark an item as stored with the given content hash."""
+        self.items[url] = {"fingerprint": fingerprint, "point_id": point_id(url)}
+
+    def remove(self, url: str):
+        """Forget an item that was deleted from the collection."""
+        self.items.pop(url, None)
+
+    def save(self):
+        """Write the manifest atomically."""
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                **self.scope, "collection_version": self.collection_version,
+                "updated_at": time.time(), "items": self.items,
+            }, f, indent=1)
+        os.replace(temp_path, self.path)
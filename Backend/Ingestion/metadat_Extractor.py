@@ -1,37 +1,158 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import json
+import random
 import re
-from typing import List, Any
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
 import groq
+from config.config import settings
+from Ingestion.field_parsers import parse_duration, parse_fields, parse_job_levels, parse_languages
+from Ingestion.rate_limiter import TokenBucket
+from query.utils.vocabulary import (ASSESSMENT_TYPES, NO_ASSESSMENT_TYPE, canonical_job_level, canonical_language,
+                                    match_assessment_type)
+
+# Fields returned by the consolidated extraction prompt
+ITEM_FIELDS = ("adaptive_support", "assessment_type", "remote_support", "duration_minutes", "languages", "job_levels")
+
+# Raw catalog field each extracted field is read from
+FIELD_SOURCES = {
+    "adaptive_support": "Description",
+    "assessment_type": "Description",
+    "remote_support": "Description",
+    "duration_minutes": "Assessment Length",
+    "languages": "Languages",
+    "job_levels": "Job Levels",
+}
+
+FIELD_INSTRUCTIONS = {
+    "adaptive_support": '"adaptive_support": 1 if the assessment supports adaptive testing, else 0',
+    "assessment_type": '"assessment_type": the assessment type, one of '
+                       + ", ".join(f'"{name}"' for name in ASSESSMENT_TYPES) + ', or "" if none fits',
+    "remote_support": '"remote_support": 1 if the assessment can be taken remotely, else 0',
+    "duration_minutes": '"duration_minutes": the completion time as a single integer number of minutes (0 if unknown)',
+    "languages": '"languages": JSON array of lower case language names without regional indicators, '
+                 'e.g. "English (USA)" becomes "english"',
+    "job_levels": '"job_levels": JSON array of the job level names',
+}
+
+# Errors worth retrying: rate limits, upstream 5xx, timeouts and dropped connections
+RETRYABLE_ERRORS = (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError)
 
 class MetadataExtractor:
     """Handles extraction of structured metadata from text fields using an LLM."""
+
+    # Bump when a prompt changes so cached extractions are not reused
+    PROMPT_VERSION = "3"
     
-    def __init__(self, api_key: str, model: str = "mixtral-8x7b-32768"):
+    def __init__(self, api_key: str, model: str = "mixtral-8x7b-32768",
+                 requests_per_minute: float = None, tokens_per_minute: float = None,
+                 max_retries: int = None):
         """
         Initialize the metadata extractor.
         
         Args:
             api_key: API key for Groq
             model: Model name to use for extraction
+            requests_per_minute: Request rate limit (defaults to settings.ingestion_requests_per_minute, 0 disables)
+            tokens_per_minute: Token rate limit (defaults to settings.ingestion_tokens_per_minute, 0 disables)
+            max_retries: Retries of a rate-limited or failed call (defaults to settings.ingestion_max_retries)
         """
-        self.client = groq.Client(api_key=api_key)
+        # Retries are handled in _call_llm so they go through the rate limiter
+        self.client = groq.Client(api_key=api_key, max_retries=0)
         self.model = model
-        
-    def _call_llm(self, prompt: str) -> str:
-        """Make a call to the Groq LLM and return the response text."""
+        burst = settings.ingestion_rate_limit_burst or None
+        self.request_limiter = TokenBucket.per_minute(
+            requests_per_minute if requests_per_minute is not None else settings.ingestion_requests_per_minute, burst
+        )
+        self.token_limiter = TokenBucket.per_minute(
+            tokens_per_minute if tokens_per_minute is not None else settings.ingestion_tokens_per_minute
+        )
+        self.max_retries = max_retries if max_retries is not None else settings.ingestion_max_retries
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0, "tokens": 0, "field_fallbacks": 0}
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _count(self, key: str, amount: int = 1):
+        """Increment one of the call counters."""
+        with self._stats_lock:
+            self.stats[key] += amount
+
+    def reset_failures(self):
+        """Clear the calling thread's failure flag; see `had_failures`."""
+        self._local.failed = False
+
+    def had_failures(self) -> bool:
+        """Whether an LLM call made by this thread failed since `reset_failures` (its fields are fallbacks)."""
+        return getattr(self._local, "failed", False)
+
+    def _backoff_seconds(self, attempt: int, error: Exception) -> float:
+        """Delay before retry `attempt`: the server's Retry-After if given, else jittered exponential backoff."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant that extracts structured data."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.0  # Keep it deterministic
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"LLM call failed: {e}")
-            return ""
+            if retry_after is not None:
+                return min(float(retry_after), settings.ingestion_max_backoff_seconds)
+        except ValueError:
+            pass
+        delay = min(settings.ingestion_max_backoff_seconds, settings.ingestion_backoff_seconds * 2 ** attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    def _call_llm(self, prompt: str, **kwargs: Any) -> str:
+        """
+        Make a rate-limited call to the Groq LLM and return the response text.
+
+        Rate limits (429), server errors and connection failures are retried with
+        backoff; an empty string is returned once the retries are exhausted so callers
+        fall back to their regex parsing.
+
+        Args:
+            prompt: User prompt
+            **kwargs: Extra completion parameters (e.g. response_format)
+        """
+        messages = [
+            {"role": "system", "content": "You are a helpful assistant that extracts structured data."},
+            {"role": "user", "content": prompt}
+        ]
+        for attempt in range(self.max_retries + 1):
+            if self.request_limiter is not None:
+                self.request_limiter.acquire()
+            # Rough prompt size in tokens plus a small completion; corrected once the usage is known
+            estimated_tokens = sum(len(m["content"]) for m in messages) / 4 + 50
+            if self.token_limiter is not None:
+                self.token_limiter.acquire(estimated_tokens)
+            self._count("calls")
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=0.0,  # Keep it deterministic
+                    **kwargs
+                )
+                usage = getattr(response, "usage", None)
+                if usage is not None and usage.total_tokens:
+                    self._count("tokens", usage.total_tokens)
+                    if self.token_limiter is not None:
+                        self.token_limiter.charge(usage.total_tokens - estimated_tokens)
+                return response.choices[0].message.content.strip()
+            except RETRYABLE_ERRORS as e:
+                if isinstance(e, groq.RateLimitError):
+                    self._count("rate_limited")
+                if attempt == self.max_retries:
+                    self._count("failures")
+                    self._local.failed = True
+                    print(f"LLM call failed after {attempt + 1} attempts: {e}")
+                    return ""
+                self._count("retries")
+                time.sleep(self._backoff_seconds(attempt, e))
+            except Exception as e:
+                self._count("failures")
+                self._local.failed = True
+                print(f"LLM call failed: {e}")
+                return ""
+        return ""
     
     def extract_adaptive_support(self, text: str) -> str:
         """Extract adaptive support information from the text."""
@@ -54,15 +175,15 @@ class MetadataExtractor:
     
     def extract_assessment_type(self, text: str) -> str:    
         
-        """Extract the assessment type from the text."""
+        """Extract the canonical assessment type from the text ("" if it names none of ASSESSMENT_TYPES)."""
         prompt = f"""
         Extract only the assessment type from the following text.
-        Return only a single string.
+        Return only one of: {", ".join(ASSESSMENT_TYPES)}, or none if no type fits.
 
         example:-
         1) 
         - Description: "This is a cognitive assessment."
-        - Assessment Type: "Cognitive"
+        - Assessment Type: cognitive
 
         Assessment Type: "{text}"
         
@@ -71,7 +192,7 @@ class MetadataExtractor:
         
         response = self._call_llm(prompt)
         
-        return response if response else text
+        return match_assessment_type(response) or ""
     
     def extract_remote_support(self, text: str) -> str:
         """Extract remote support information from the text."""
@@ -93,7 +214,10 @@ class MetadataExtractor:
         return response if response else text
             
     def extract_minutes(self, text: str) -> int:
-        """Extract the number of minutes from assessment length text."""
+        """Extract the number of minutes from assessment length text, by rules when the format is known."""
+        parsed = parse_duration(text)
+        if parsed is not None:
+            return parsed
         prompt = f"""
         Extract only the number of minutes from the following assessment length description.
         Return only a single integer number.
@@ -113,7 +237,10 @@ class MetadataExtractor:
             return int(match.group(1)) if match else 0
             
     def extract_languages(self, text: str) -> List[str]:
-        """Extract a list of language names without regional indicators."""
+        """Extract a list of language names without regional indicators, by rules when all are known."""
+        parsed = parse_languages(text)
+        if parsed is not None:
+            return parsed
         prompt = f"""
         Extract a list of languages from the following text.
         Remove any regional indicators like "(USA)" or "(International)".
@@ -128,11 +255,24 @@ class MetadataExtractor:
         response = self._call_llm(prompt)
         
         try:
-            return json.loads(response)
+            extracted = json.loads(response)
         except json.JSONDecodeError:
+            extracted = None
+        if not isinstance(extracted, list):
             # Fallback to regex
-            return self._fallback_extract_languages(text)
+            extracted = self._fallback_extract_languages(text)
+        return self._in_vocabulary("languages", extracted)
     
+    @staticmethod
+    def _in_vocabulary(field: str, values: List[Any]) -> List[str]:
+        """Map extracted job levels or languages onto the controlled vocabulary, dropping unknown entries."""
+        canonical = canonical_job_level if field == "job_levels" else canonical_language
+        entries = [canonical(value) for value in values]
+        dropped = [value for value, entry in zip(values, entries) if entry is None]
+        if dropped:
+            print(f"Dropping {field} outside the vocabulary: {dropped}")
+        return list(dict.fromkeys(entry for entry in entries if entry is not None))
+
     def _fallback_extract_languages(self, text: str) -> List[str]:
         """Fallback method to extract languages using regex."""
         languages = []
@@ -146,7 +286,10 @@ class MetadataExtractor:
         return languages
             
     def extract_job_levels(self, text: str) -> List[str]:
-        """Extract a list of job level names."""
+        """Extract a list of job level names, by rules when all are known."""
+        parsed = parse_job_levels(text)
+        if parsed is not None:
+            return parsed
         prompt = f"""
         Extract a list of job levels from the following text.
         Return only a JSON array of job level names.
@@ -158,10 +301,13 @@ class MetadataExtractor:
         response = self._call_llm(prompt)
         
         try:
-            return json.loads(response)
+            extracted = json.loads(response)
         except json.JSONDecodeError:
+            extracted = None
+        if not isinstance(extracted, list):
             # Fallback to regex
-            return self._fallback_extract_job_levels(text)
+            extracted = self._fallback_extract_job_levels(text)
+        return self._in_vocabulary("job_levels", extracted)
     
     def _fallback_extract_job_levels(self, text: str) -> List[str]:
         """Fallback method to extract job levels using regex."""
@@ -187,3 +333,152 @@ class MetadataExtractor:
         elif field_name == "Assessment Type":
             return self.extract_assessment_type(field_value)
         return field_value  # Return as is for unhandled fields
+
+    @staticmethod
+    def _describe_item(item: Dict[str, Any], fields: Sequence[str]) -> str:
+        """Render the raw catalog fields the given extracted fields are read from."""
+        sources = [source for source in dict.fromkeys(FIELD_SOURCES[field] for field in fields)]
+        return "\n        ".join(f'{source}: "{item.get(source, "")}"' for source in sources)
+
+    @staticmethod
+    def _instructions(fields: Sequence[str]) -> str:
+        """Prompt lines describing the requested keys."""
+        return "".join(f"\n        - {FIELD_INSTRUCTIONS[field]}" for field in fields)
+
+    def extract_item(self, item: Dict[str, Any], fields: Sequence[str] = ITEM_FIELDS) -> Dict[str, Any]:
+        """
+        Extract metadata fields of one catalog item: by rules where the raw format is
+        known, the rest with a single JSON-mode LLM call.
+
+        Args:
+            item: Raw catalog item
+            fields: Fields to extract (defaults to all ITEM_FIELDS)
+
+        Returns:
+            Dictionary with the requested fields; malformed or missing LLM fields are
+            re-extracted with the per-field methods
+        """
+        parsed = {field: value for field, value in parse_fields(item).items() if field in fields}
+        remaining = [field for field in fields if field not in parsed]
+        if not remaining:
+            return parsed
+        prompt = f"""
+        Extract the following fields from the assessment below and return only a JSON object with these keys:
+        {self._instructions(remaining)}
+
+        {self._describe_item(item, remaining)}
+
+        JSON object:
+        """
+        response = self._call_llm(prompt, response_format={"type": "json_object"})
+        try:
+            extracted = json.loads(response)
+        except json.JSONDecodeError:
+            extracted = {}
+        return {**parsed, **self._validate_item(item, extracted if isinstance(extracted, dict) else {}, remaining)}
+
+    def extract_items(self, items: List[Dict[str, Any]], fields: Sequence[str] = ITEM_FIELDS) -> List[Dict[str, Any]]:
+        """
+        Extract metadata fields of several catalog items: by rules where the raw format
+        is known, the rest with a single JSON-mode LLM call for the whole batch.
+
+        Args:
+            items: Raw catalog items
+            fields: Fields to extract (defaults to all ITEM_FIELDS)
+
+        Returns:
+            One field dictionary per item, in input order; items missing from the
+            reply are extracted on their own with `extract_item`
+        """
+        parsed = [{field: value for field, value in parse_fields(item).items() if field in fields} for item in items]
+        pending = [index for index, values in enumerate(parsed) if len(values) < len(fields)]
+        if len(pending) <= 1:
+            return [self.extract_item(item, fields) if index in pending else parsed[index]
+                    for index, item in enumerate(items)]
+        remaining = [field for field in fields if any(field not in parsed[index] for index in pending)]
+        described = "\n\n        ".join(
+            f"Item {number}:\n        {self._describe_item(items[index], remaining)}"
+            for number, index in enumerate(pending, 1)
+        )
+        prompt = f"""
+        Extract the following fields from each of the {len(pending)} assessments below.
+        Return only a JSON object of the form {{"items": [...]}} with one object per assessment, in order,
+        each with an "item" key holding the item number and these keys:
+        {self._instructions(remaining)}
+
+        {described}
+
+        JSON object:
+        """
+        response = self._call_llm(prompt, response_format={"type": "json_object"})
+        try:
+            replies = json.loads(response).get("items", [])
+        except (json.JSONDecodeError, AttributeError):
+            replies = []
+        by_number = {}
+        for position, reply in enumerate(replies if isinstance(replies, list) else [], 1):
+            if isinstance(reply, dict):
+                number = reply.get("item", position)
+                by_number.setdefault(number if isinstance(number, int) else position, reply)
+
+        results = list(parsed)
+        for number, index in enumerate(pending, 1):
+            missing = [field for field in fields if field not in parsed[index]]
+            if number in by_number:
+                results[index] = {**parsed[index], **self._validate_item(items[index], by_number[number], missing)}
+            else:
+                results[index] = self.extract_item(items[index], fields)
+        return results
+
+    def _validate_item(self, item: Dict[str, Any], extracted: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+        """Coerce the extracted fields to their types, re-extracting any that are missing or malformed."""
+        description = item.get("Description", "")
+        fallbacks = {
+            "adaptive_support": lambda: self.extract_adaptive_support(description),
+            "assessment_type": lambda: self.extract_assessment_type(description),
+            "remote_support": lambda: self.extract_remote_support(description),
+            "duration_minutes": lambda: self.extract_minutes(item.get("Assessment Length", "")),
+            "languages": lambda: self.extract_languages(item.get("Languages", "")),
+            "job_levels": lambda: self.extract_job_levels(item.get("Job Levels", "")),
+        }
+        validated = {}
+        for field in fields:
+            value = self._coerce_field(field, extracted.get(field))
+            if value is None:
+                self._count("field_fallbacks")
+                value = fallbacks[field]()
+            validated[field] = value
+        return validated
+
+    @staticmethod
+    def _coerce_field(field: str, value: Any) -> Optional[Any]:
+        """Return the value in the field's expected type, or None if it is unusable."""
+        if value is None:
+            return None
+        if field in ("adaptive_support", "remote_support"):
+            if isinstance(value, bool) or value in (0, 1):
+                return int(value)
+            text = str(value).strip().strip('"\'').lower()
+            if text in ("0", "1", "true", "false", "yes", "no"):
+                return int(text in ("1", "true", "yes"))
+            return None
+        if field == "assessment_type":
+            if isinstance(value, (list, dict)):
+                return None
+            text = str(value).strip().strip('"\'').strip()
+            return "" if text.lower() in NO_ASSESSMENT_TYPE else match_assessment_type(text)
+        if field == "duration_minutes":
+            if isinstance(value, bool):
+                return None
+            try:
+                minutes = int(float(value))
+            except (TypeError, ValueError):
+                return None
+            return minutes if minutes >= 0 else None
+        if isinstance(value, list) and all(isinstance(entry, str) for entry in value):
+            canonical = canonical_job_level if field == "job_levels" else canonical_language
+            entries = [canonical(entry) for entry in value if entry.strip()]
+            if any(entry is None for entry in entries):
+                return None
+            return list(dict.fromkeys(entries))
+        return None
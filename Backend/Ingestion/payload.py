@@ -0,0 +1,69 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+from typing import Any, Callable, Dict, List
+from query.utils.vocabulary import canonical_job_level, canonical_language, match_assessment_type
+
+def build_payload(row) -> Dict[str, Any]:
+    """Build the typed Qdrant payload for one processed row."""
+    return {
+        'title': row['title'],
+        'url': row['url'],
+        'job_levels': to_keywords(row['job_levels'], canonical_job_level),
+        'languages': to_keywords(row['languages'], canonical_language),
+        'duration_minutes': to_int(row['duration_minutes']),
+        # Filters match exactly, so only the controlled vocabulary is stored ("" for untyped)
+        'assessment_type': match_assessment_type(to_keyword(row.get('assessment_type'))) or "",
+        'adaptive_support': to_flag(row.get('adaptive_support')),
+        'remote_support': to_flag(row.get('remote_support')),
+    }
+
+def to_keyword(value) -> str:
+    """Normalize a single keyword value (lowercase, no surrounding quotes or spaces)."""
+    if value is None:
+        return ""
+    return str(value).strip().strip('"\'').strip().lower()
+
+def to_keywords(value, canonical: Callable = None) -> List[str]:
+    """
+    Normalize a list-like value (list or JSON string) into a keyword array.
+
+    Args:
+        value: List, JSON array string or comma-separated string
+        canonical: Optional mapping onto the controlled vocabulary; keywords it rejects are dropped
+    """
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except json.JSONDecodeError:
+            value = value.split(',')
+    if not isinstance(value, list):
+        value = [value]
+    keywords = []
+    for item in value:
+        keyword = to_keyword(item)
+        if keyword and canonical is not None:
+            keyword = canonical(keyword)
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+def to_int(value) -> int:
+    """Coerce a duration to an integer number of minutes."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+def to_flag(value) -> int:
+    """
+    Coerce an LLM flag answer ("1", "0", "true", ...) to 0 or 1.
+
+    Flags are stored as integers because LlamaIndex metadata filters cannot carry
+    boolean values; the query side filters on 0/1 as the extraction prompt does.
+    """
+    if isinstance(value, (bool, int, float)):
+        return int(bool(value))
+    return int(str(value).strip().strip('"\'').lower() in ("1", "true", "yes"))
@@ -1,15 +1,33 @@
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import json
+import time
+import uuid
+from typing import Callable, List, Optional, Tuple
 import pandas as pd
-from llama_index.core import VectorStoreIndex, StorageContext
+from llama_index.core import VectorStoreIndex
 from llama_index.vector_stores.qdrant import QdrantVectorStore
 from llama_index.core.schema import TextNode
 import qdrant_client
+from qdrant_client.http.models import (
+    Distance, FieldCondition, Filter, FilterSelector, MatchAny, PayloadSchemaType, PointStruct, VectorParams
+)
 from config.config import settings
+from Ingestion.manifest import point_id
+from Ingestion.payload import build_payload
+from query.services.vector_store import read_collection_version
 from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.core import Settings
+
+# Filterable payload fields and the index type Qdrant should build for each
+PAYLOAD_INDEXES = {
+    'url': PayloadSchemaType.KEYWORD,
+    'job_levels': PayloadSchemaType.KEYWORD,
+    'languages': PayloadSchemaType.KEYWORD,
+    'assessment_type': PayloadSchemaType.KEYWORD,
+    'duration_minutes': PayloadSchemaType.INTEGER,
+    'adaptive_support': PayloadSchemaType.INTEGER,
+    'remote_support': PayloadSchemaType.INTEGER,
+}
 
 class QdrantStorage:
     """Handles storing data in Qdrant using LlamaIndex."""
@@ -23,10 +41,15 @@ class QdrantStorage:
             url: URL of the Qdrant server (if None, use local or in-memory)
             in_memory: Whether to use in-memory storage (if url is None)
         """
-        Settings.embed_model = HuggingFaceEmbedding(
+        # Kept on the instance rather than in the global llama_index Settings
+        self.embed_model = HuggingFaceEmbedding(
             model_name=settings.embedding_model_name,
+            embed_batch_size=settings.ingestion_embed_batch_size,
+            # Part of the embedding store key, see query.services.embedding_store.ingestion_embedder
+            normalize=settings.embedding_normalize,
         )
         self.collection_name = collection_name
+        self.stats = {}
         
         # Initialize Qdrant client
         if url:
@@ -37,57 +60,179 @@ class QdrantStorage:
         else:
             self.client = qdrant_client.QdrantClient(location=":memory:" if in_memory else None)
             
-        # Create the vector store
+        # Create the vector store; `add` bulk-uploads points in `batch_size` requests
+        # spread over `parallel` upload workers
         self.vector_store = QdrantVectorStore(
             client=self.client,
-            collection_name=collection_name
+            collection_name=collection_name,
+            batch_size=settings.ingestion_upsert_batch_size,
+            parallel=settings.ingestion_upload_parallel,
         )
         
-    def store_data(self, processed_df: pd.DataFrame, batch_size: int = 100, embedding_column: str = 'embedding') -> VectorStoreIndex:
+    def store_data(self, processed_df: pd.DataFrame, batch_size: int = 256, embedding_column: str = 'embedding',
+                   on_batch_stored: Optional[Callable[[pd.DataFrame, List[TextNode]], None]] = None
+                   ) -> Optional[VectorStoreIndex]:
         """
-        Store processed data in Qdrant using LlamaIndex with batch processing.
+        Embed and bulk-upsert processed data into Qdrant.
+        
+        Batches go through `embed_batch` and `upsert_nodes` one after the other; the
+        streaming ingestion pipeline runs the two steps as concurrent stages instead.
+        Throughput is printed per batch and kept in `self.stats`.
         
         Args:
-            processed_df: DataFrame with processed data and embeddings
-            batch_size: Number of items to process in each batch
-            embedding_column: Name of the column containing embeddings
+            processed_df: DataFrame with processed data and optionally embeddings
+            batch_size: Number of rows embedded and upserted per batch
+            embedding_column: Name of the column containing precomputed embeddings
+            on_batch_stored: Called with each batch and its stored nodes once they are in Qdrant
+                (used for checkpointing)
             
         Returns:
-            LlamaIndex vector store index
+            LlamaIndex vector store index, or None if there was nothing to store
         """
-        # Create a storage context with the vector store
-        storage_context = StorageContext.from_defaults(vector_store=self.vector_store)
-        
-        # Process DataFrame in batches
         total_rows = len(processed_df)
+        self.stats = {}
+        embed_seconds = upsert_seconds = 0.0
+        started_at = time.perf_counter()
         for start_idx in range(0, total_rows, batch_size):
-            end_idx = min(start_idx + batch_size, total_rows)
-            batch_df = processed_df.iloc[start_idx:end_idx]
-            
-            # Convert batch DataFrame rows to TextNode objects
-            nodes = []
-            
-            for idx, row in batch_df.iterrows():
-                # Convert any list-like metadata to strings for compatibility
-                metadata = {
-                    'title': row['title'],
-                    'url': row['url'],
-                    'job_levels': json.dumps(row['job_levels']) if isinstance(row['job_levels'], list) else row['job_levels'],
-                    'languages': json.dumps(row['languages']) if isinstance(row['languages'], list) else row['languages'],
-                    'duration_minutes': row['duration_minutes']
-                }
-                
-                # Create a TextNode with the description as text and metadata
-                node = TextNode(
-                    text=row['description'],
-                    metadata=metadata,
-                )
-                node=[node]
-                if idx == 0:
-                    # Create the index with the first batch
-                    index = VectorStoreIndex(nodes, storage_context=storage_context)
-                else:
-                    # Insert additional batches into the existing index
-                    index.insert_nodes(node)
-        
-        return index
\ No newline at end of file
+            batch_df = processed_df.iloc[start_idx:start_idx + batch_size]
+
+            embed_started_at = time.perf_counter()
+            nodes = self.embed_batch(batch_df, embedding_column)
+            embed_seconds += time.perf_counter() - embed_started_at
+
+            upsert_started_at = time.perf_counter()
+            self.upsert_nodes(nodes)
+            upsert_seconds += time.perf_counter() - upsert_started_at
+
+            stored = start_idx + len(batch_df)
+            elapsed = time.perf_counter() - started_at
+            print(f"Stored {stored}/{total_rows} points ({stored / elapsed:.1f} points/s)")
+            if on_batch_stored is not None:
+                on_batch_stored(batch_df, nodes)
+
+        return self.finish(total_rows, time.perf_counter() - started_at, embed_seconds, upsert_seconds)
+
+    def embed_batch(self, batch_df: pd.DataFrame, embedding_column: str = 'embedding') -> List[TextNode]:
+        """
+        Build the nodes of a batch of processed rows, with their embeddings.
+
+        Rows with a vector in `embedding_column` (e.g. reused from the embedding store)
+        keep it; the other rows are embedded with one batched model call. Points get
+        deterministic ids derived from the item URL, so storing an item again overwrites
+        its previous point.
+        """
+        if embedding_column in batch_df.columns:
+            embeddings = [
+                None if vector is None else [float(x) for x in vector] for vector in batch_df[embedding_column]
+            ]
+        else:
+            embeddings = [None] * len(batch_df)
+        missing = [position for position, vector in enumerate(embeddings) if vector is None]
+        if missing:
+            texts = [batch_df['description'].iloc[position] for position in missing]
+            for position, vector in zip(missing, self.embed_model.get_text_embedding_batch(texts)):
+                embeddings[position] = vector
+        self.stats["embedded"] = self.stats.get("embedded", 0) + len(missing)
+
+        # Store typed fields so Qdrant can filter on them natively
+        return [
+            TextNode(
+                id_=point_id(row['url']),
+                text=row['description'],
+                metadata=build_payload(row),
+                embedding=embedding,
+            )
+            for (_, row), embedding in zip(batch_df.iterrows(), embeddings)
+        ]
+
+    def upsert_nodes(self, nodes: List[TextNode]):
+        """Bulk-upload embedded nodes with parallel upload workers."""
+        self.vector_store.add(nodes)
+
+    def finish(self, total_rows: int, seconds: float, embed_seconds: float,
+               upsert_seconds: float) -> Optional[VectorStoreIndex]:
+        """
+        Record throughput, index the payload fields and return the LlamaIndex index.
+
+        Args:
+            total_rows: Points stored in the run
+            seconds: Wall time of the run
+            embed_seconds: Time spent embedding
+            upsert_seconds: Time spent upserting
+
+        Returns:
+            LlamaIndex vector store index, or None if nothing was stored
+        """
+        if total_rows == 0:
+            return None
+        self.stats = {
+            "points": total_rows,
+            "embedded": self.stats.get("embedded", 0),
+            "seconds": round(seconds, 3),
+            "points_per_second": round(total_rows / seconds, 1) if seconds else 0.0,
+            "embed_points_per_second": round(total_rows / embed_seconds, 1) if embed_seconds else None,
+            "upsert_points_per_second": round(total_rows / upsert_seconds, 1) if upsert_seconds else None,
+        }
+        print(f"Stored {total_rows} points: {self.stats}")
+        self.create_payload_indexes()
+        return VectorStoreIndex.from_vector_store(self.vector_store, embed_model=self.embed_model)
+
+    def delete_urls(self, urls: List[str], batch_size: int = 100):
+        """
+        Delete every point whose payload url is one of `urls`.
+
+        Matching on the payload rather than the point id also removes points written
+        before ids were derived from the URL.
+        """
+        if not urls or not self.client.collection_exists(self.collection_name):
+            return
+        for start in range(0, len(urls), batch_size):
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=FilterSelector(filter=Filter(
+                    must=[FieldCondition(key='url', match=MatchAny(any=urls[start:start + batch_size]))]
+                )),
+            )
+
+    def collection_state(self) -> Tuple[bool, int, Optional[str]]:
+        """
+        Describe the collection for checking an ingestion manifest against it.
+
+        Returns:
+            Whether the collection exists, its exact point count and its version stamp
+        """
+        if not self.client.collection_exists(self.collection_name):
+            return False, 0, None
+        points_count = self.client.count(collection_name=self.collection_name, exact=True).count
+        return True, points_count, read_collection_version(self.client, self.collection_name)
+
+    def write_version_stamp(self) -> str:
+        """
+        Record a new collection version so query nodes can invalidate cached results.
+
+        The stamp lives in a one-point sidecar collection next to the data collection.
+
+        Returns:
+            The new version string
+        """
+        version = f"{int(time.time())}-{uuid.uuid4().hex[:12]}"
+        version_collection = f"{self.collection_name}{settings.qdrant_version_collection_suffix}"
+        if not self.client.collection_exists(version_collection):
+            self.client.create_collection(
+                collection_name=version_collection,
+                vectors_config=VectorParams(size=1, distance=Distance.DOT),
+            )
+        self.client.upsert(
+            collection_name=version_collection,
+            points=[PointStruct(id=1, vector=[0.0], payload={'version': version, 'updated_at': time.time()})],
+        )
+        return version
+
+    def create_payload_indexes(self):
+        """Create a Qdrant payload index on every filterable field."""
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name=field_name,
+                field_schema=field_schema,
+            )
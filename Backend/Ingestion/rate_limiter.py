@@ -0,0 +1,71 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Thread-safe token bucket for client-side rate limiting.
+
+    Tokens refill continuously at `rate` per second up to `capacity`; `acquire` takes
+    tokens and blocks while the balance is negative. Used to keep ingestion under the LLM provider's
+    requests-per-minute and tokens-per-minute limits.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (the allowed burst)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def per_minute(cls, limit: float, burst: float = None):
+        """
+        Build a bucket from a per-minute limit, or return None if the limit is disabled.
+
+        Args:
+            limit: Allowed amount per minute (0 or less disables limiting)
+            burst: Bucket capacity (defaults to one second's worth, at least 1)
+        """
+        if not limit or limit <= 0:
+            return None
+        rate = limit / 60
+        return cls(rate, burst if burst else max(1.0, rate))
+
+    def _refill(self):
+        """Add the tokens earned since the last update, up to the capacity."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, amount: float = 1.0):
+        """
+        Take `amount` tokens, blocking until the bucket is out of debt.
+
+        Amounts larger than the balance, even larger than the capacity, are charged in
+        full: the balance goes negative and the caller sleeps until the debt is repaid,
+        so large requests are throttled to `rate` instead of slipping through.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited_seconds += wait
+        if wait > 0:
+            time.sleep(wait)
+
+    def charge(self, amount: float):
+        """
+        Adjust the balance after the fact without blocking, e.g. once the actual usage
+        of a request is known; negative amounts refund. Later callers repay any debt.
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
@@ -0,0 +1,62 @@
+import json
+from typing import Any, Dict, Iterator, TextIO
+
+def _iter_array(f: TextIO, buffer: str, pos: int, chunk_size: int) -> Iterator[Dict[str, Any]]:
+    """Decode the items of a JSON array one at a time, starting just after its "["."""
+    decoder = json.JSONDecoder()
+    eof = False
+    while True:
+        # Skip whitespace and separators, reading on when the buffer runs out
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = f.read(chunk_size), 0
+            eof = not buffer
+        if pos >= len(buffer):
+            raise ValueError("Unterminated JSON array in catalog file")
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+            if end == len(buffer) and not eof:
+                # A value ending exactly at the buffer edge may continue in the next chunk
+                raise ValueError("value may be truncated")
+        except ValueError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buffer, pos = buffer[pos:] + chunk, 0
+            continue
+        yield item
+        pos = end
+
+def iter_catalog(path: str, chunk_size: int = 1 << 16) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the items of a catalog file one at a time.
+
+    The file is either a JSON array of items or JSON Lines (one item per line). Arrays
+    are decoded incrementally, so only the current item and one read chunk are held in
+    memory whatever the size of the catalog.
+
+    Args:
+        path: Catalog file
+        chunk_size: Characters read from the file at a time
+    """
+    with open(path, "r", encoding="utf-8-sig") as f:
+        head = f.read(chunk_size)
+        while head and not head.strip():
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            head += chunk
+        stripped = head.lstrip()
+        if stripped.startswith("["):
+            yield from _iter_array(f, head, len(head) - len(stripped) + 1, chunk_size)
+            return
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
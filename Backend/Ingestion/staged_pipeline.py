@@ -0,0 +1,146 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Marks the end of the stream on a queue
+_END = object()
+
+class StagedPipeline:
+    """
+    Run a source iterator and a chain of stages concurrently, joined by bounded queues.
+
+    The source and every stage get a thread of their own, and each stage maps one
+    input to one output. A full queue blocks the thread feeding it, so a slow stage
+    throttles everything upstream (backpressure) and at most `queue_size` items wait
+    between two stages: memory stays flat however long the stream is, and with all
+    stages busy at once the wall time approaches that of the slowest stage rather than
+    the sum of all of them. The first error stops every stage and is re-raised to the
+    consumer.
+    """
+
+    def __init__(self, source: Tuple[str, Iterable], stages: List[Tuple[str, Callable[[Any], Any]]],
+                 queue_size: int = 4):
+        """
+        Initialize the pipeline; iterate it to run.
+
+        Args:
+            source: (name, iterable) producing the stream
+            stages: (name, function) pairs applied in order to every item
+            queue_size: Items buffered between two consecutive stages
+        """
+        self.source_name, self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        names = [self.source_name] + [name for name, _ in stages]
+        # Per stage: items handled and seconds spent working rather than waiting on a queue
+        self.stats: Dict[str, Dict[str, float]] = {name: {"items": 0, "busy_seconds": 0.0} for name in names}
+        self.wall_seconds = 0.0
+        self._started_at = None
+        self._stop = threading.Event()
+        self._error = None
+
+    def _put(self, out: queue.Queue, item) -> bool:
+        """Block until there is room in `out`; False if the pipeline stopped meanwhile."""
+        while not self._stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, inbox: queue.Queue):
+        """Block until an item arrives; _END if the pipeline stopped meanwhile."""
+        while not self._stop.is_set():
+            try:
+                return inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _fail(self, error: BaseException):
+        """Record the first error and stop every stage."""
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _run_source(self, out: queue.Queue):
+        stats = self.stats[self.source_name]
+        iterator = iter(self.source)
+        try:
+            while True:
+                started_at = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                stats["busy_seconds"] += time.perf_counter() - started_at
+                stats["items"] += 1
+                if not self._put(out, item):
+                    return
+            self._put(out, _END)
+        except BaseException as error:
+            self._fail(error)
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    def _run_stage(self, name: str, function: Callable, inbox: queue.Queue, out: queue.Queue):
+        stats = self.stats[name]
+        try:
+            while True:
+                item = self._get(inbox)
+                if item is _END:
+                    self._put(out, _END)
+                    return
+                started_at = time.perf_counter()
+                result = function(item)
+                stats["busy_seconds"] += time.perf_counter() - started_at
+                stats["items"] += 1
+                if not self._put(out, result):
+                    return
+        except BaseException as error:
+            self._fail(error)
+
+    def __iter__(self) -> Iterator:
+        """Start the stages and yield the outputs of the last one, in source order."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(self.stages) + 1)]
+        threads = [threading.Thread(target=self._run_source, args=(queues[0],),
+                                    name=f"stage-{self.source_name}", daemon=True)]
+        for index, (name, function) in enumerate(self.stages):
+            threads.append(threading.Thread(
+                target=self._run_stage, args=(name, function, queues[index], queues[index + 1]),
+                name=f"stage-{name}", daemon=True,
+            ))
+        self._started_at = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                item = self._get(queues[-1])
+                if item is _END:
+                    break
+                yield item
+        finally:
+            # Also reached when the consumer stops early or raises
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.wall_seconds = self.elapsed
+        if self._error is not None:
+            raise self._error
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the pipeline started."""
+        return time.perf_counter() - self._started_at if self._started_at is not None else 0.0
+
+    def report(self) -> Dict[str, Any]:
+        """Busy seconds and items per stage, plus the wall time of the run."""
+        return {
+            "wall_seconds": round(self.wall_seconds, 3),
+            "stages": {name: {"items": int(stats["items"]), "busy_seconds": round(stats["busy_seconds"], 3)}
+                       for name, stats in self.stats.items()},
+        }
@@ -0,0 +1,138 @@
+"""
+Compare embedding backends against the PyTorch reference on the catalog.
+
+Reports, per candidate backend:
+  - cosine drift: 1 - cos(reference, candidate) for every catalog description
+  - top-k overlap: |top-k(reference) & top-k(candidate)| / k when searching the catalog
+    with sample queries and every catalog title
+  - latency: single-query and batched embedding time
+
+Usage:
+    python benchmarks/embedding_parity.py --backends onnx onnx-int8 --top-k 10
+
+Exits non-zero if any backend falls below --min-overlap or above --max-drift.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from config.config import settings
+from query.services.embedding_backends import create_embedding_backend
+
+SAMPLE_QUERIES = [
+    "Show me all Python assessments",
+    "Find JavaScript assessments for junior developers",
+    "Senior level Java assessments under 45 minutes",
+    "Entry level coding tests in any language",
+    "Assessments longer than 60 minutes for mid-level engineers",
+    "Personality test for managers in Spanish",
+    "Adaptive cognitive test for graduates",
+]
+
+def embed_all(backend, texts, batch_size):
+    """Embed texts in batches and L2-normalize the rows."""
+    vectors = np.concatenate([backend.embed(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)])
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def top_k(queries, documents, k):
+    """Indices of the k most similar documents per query."""
+    scores = queries @ documents.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def time_backend(backend, queries, batch_size, repeats):
+    """Median single-query latency and mean per-text batched latency in milliseconds."""
+    single = []
+    for _ in range(repeats):
+        for query in queries:
+            start = time.perf_counter()
+            backend.embed([query])
+            single.append((time.perf_counter() - start) * 1000)
+    batch = queries[:batch_size]
+    start = time.perf_counter()
+    for _ in range(repeats):
+        backend.embed(batch)
+    batched = (time.perf_counter() - start) * 1000 / (repeats * len(batch))
+    return float(np.median(single)), float(np.percentile(single, 95)), batched
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", default=settings.catalog_path, help="Catalog JSON to embed")
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8"], help="Candidate backends")
+    parser.add_argument("--reference", default="torch", help="Reference backend")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=5, help="Timing repetitions")
+    parser.add_argument("--min-overlap", type=float, default=0.9, help="Minimum mean top-k overlap")
+    parser.add_argument("--max-drift", type=float, default=0.02, help="Maximum mean cosine drift")
+    parser.add_argument("--output", help="Optional path for a JSON report")
+    args = parser.parse_args()
+
+    with open(args.catalog, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    documents = [item.get('Description', '') for item in catalog]
+    queries = SAMPLE_QUERIES + [item.get('Title', '') for item in catalog]
+
+    backends = {}
+    for name in [args.reference] + args.backends:
+        start = time.perf_counter()
+        backend = create_embedding_backend(name)
+        backend.load()
+        backends[name] = (backend, time.perf_counter() - start)
+
+    reference, _ = backends[args.reference]
+    reference_docs = embed_all(reference, documents, args.batch_size)
+    reference_queries = embed_all(reference, queries, args.batch_size)
+    reference_top = top_k(reference_queries, reference_docs, args.top_k)
+
+    report = {}
+    failed = False
+    for name, (backend, load_seconds) in backends.items():
+        p50, p95, batched = time_backend(backend, SAMPLE_QUERIES, args.batch_size, args.repeats)
+        entry = {
+            "load_seconds": round(load_seconds, 3),
+            "single_query_p50_ms": round(p50, 3),
+            "single_query_p95_ms": round(p95, 3),
+            "batched_ms_per_text": round(batched, 3),
+        }
+        if name != args.reference:
+            docs = embed_all(backend, documents, args.batch_size)
+            drift = 1.0 - np.sum(docs * reference_docs, axis=1)
+            candidate_top = top_k(embed_all(backend, queries, args.batch_size), docs, args.top_k)
+            overlap = np.array([
+                len(set(a) & set(b)) / args.top_k for a, b in zip(reference_top, candidate_top)
+            ])
+            entry.update({
+                "cosine_drift_mean": float(drift.mean()),
+                "cosine_drift_max": float(drift.max()),
+                "top_k_overlap_mean": float(overlap.mean()),
+                "top_k_overlap_min": float(overlap.min()),
+                "top1_agreement": float(np.mean(reference_top[:, 0] == candidate_top[:, 0])),
+            })
+            entry["passed"] = bool(
+                entry["top_k_overlap_mean"] >= args.min_overlap and entry["cosine_drift_mean"] <= args.max_drift
+            )
+            failed = failed or not entry["passed"]
+        report[name] = entry
+
+    print(f"{len(documents)} documents, {len(queries)} queries, top-k={args.top_k}")
+    for name, entry in report.items():
+        line = (f"{name:>10}: p50 {entry['single_query_p50_ms']:.2f}ms  p95 {entry['single_query_p95_ms']:.2f}ms  "
+                f"batched {entry['batched_ms_per_text']:.2f}ms/text")
+        if name != args.reference:
+            line += (f"  overlap@{args.top_k} {entry['top_k_overlap_mean']:.3f} (min {entry['top_k_overlap_min']:.2f})"
+                     f"  drift {entry['cosine_drift_mean']:.5f} (max {entry['cosine_drift_max']:.5f})"
+                     f"  {'PASS' if entry['passed'] else 'FAIL'}")
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
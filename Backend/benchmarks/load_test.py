@@ -0,0 +1,561 @@
+"""
+Load-test the query API and record a latency baseline.
+
+By default everything runs in this process with local stand-ins: the stub LLM server
+(benchmarks/stub_llm_server.py) replaces Groq, an in-memory Qdrant collection is
+seeded from shl_assessments.json, and the query app is served by uvicorn on a free
+port. A query mix of rule-resolvable queries, vague queries that need the LLM and
+repeated/paraphrased queries is then sent at a fixed concurrency.
+
+The report gives throughput, error rate, latency percentiles, the per-stage
+breakdown from the Server-Timing header (or the stream's summary event) and the
+filter sources. --output saves it as JSON; --compare checks a run against a saved
+baseline and exits non-zero when latency or throughput regressed by more than
+--max-regression.
+
+Usage:
+    python benchmarks/load_test.py --embedding-backend stub --concurrency 16 --requests 2000 --output baseline.json
+    python benchmarks/load_test.py --concurrency 16 --requests 2000 --compare baseline.json
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --duration 60
+
+Client and server share one interpreter in the in-process mode, so compare runs made
+the same way on the same machine; use --url to load a separately started server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import httpx
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Queries the rule-based extractor resolves on its own
+RULE_QUERIES = [
+    "{type} test for {level} {role} under {minutes} minutes",
+    "{level} {role} assessment in {language}",
+    "{type} assessment for {role} in {language} under {minutes} minutes",
+    "{role} test for {level} candidates, at most {minutes} minutes",
+]
+# Vague queries whose filter cues the rules cannot resolve, so filters come from the LLM
+LLM_QUERIES = [
+    "A quick test to see which {role}s stay calm when things go wrong",
+    "Something short to check whether new {role}s can learn our tools",
+    "Compare {role} applicants at the right seniority level before the final interview",
+    "Which assessment in their own language tells me if a {role} works well with difficult clients?",
+]
+# Rewordings applied to repeated queries to exercise the semantic cache
+PARAPHRASES = [
+    lambda q: q.lower(),
+    lambda q: q + " please",
+    lambda q: "Can you recommend a " + q[0].lower() + q[1:],
+    lambda q: q.replace("assessment", "test") if "assessment" in q else q.replace("test", "assessment"),
+]
+ROLES = [
+    "Java developer", "sales representative", "bank teller", "call center agent", "data analyst",
+    "project manager", "account manager", "administrative assistant", "software engineer",
+    "customer service agent", "nurse", "financial analyst", "retail cashier", "graphic designer",
+]
+TYPES = ["cognitive", "personality", "aptitude", "simulation", "knowledge"]
+LEVELS = ["entry-level", "mid-level", "senior", "graduate", "manager", "supervisor"]
+LANGUAGES = ["English", "Spanish", "French", "German", "Portuguese", "Chinese"]
+MINUTES = [15, 20, 30, 40, 45, 60, 90]
+
+# Metrics checked by --compare, and whether a higher value is better
+COMPARED_METRICS = {
+    ("latency_ms", "p50"): False,
+    ("latency_ms", "p95"): False,
+    ("latency_ms", "p99"): False,
+    ("throughput_rps",): True,
+}
+
+SERVER_TIMING_PATTERN = re.compile(r"([\w.-]+);dur=([\d.]+)")
+
+ADAPTIVE_HINT = re.compile(r"\b(?:adaptive|irt)\b")
+ON_SITE_HINT = re.compile(r"\b(?:paper|in-person|in person|onsite|on-site|proctored)\b")
+
+def build_query_pool(size: int, llm_share: float, seed: int) -> List[str]:
+    """
+    Generate distinct queries, `llm_share` of them phrased so only the LLM can extract filters.
+
+    Args:
+        size: Number of distinct queries
+        llm_share: Fraction of vague, LLM-only queries
+        seed: Random seed, so runs use the same pool
+
+    Returns:
+        List of queries
+    """
+    rng = random.Random(seed)
+    pool = []
+    seen = set()
+    while len(pool) < size:
+        templates = LLM_QUERIES if rng.random() < llm_share else RULE_QUERIES
+        query = rng.choice(templates).format(
+            role=rng.choice(ROLES), type=rng.choice(TYPES), level=rng.choice(LEVELS),
+            language=rng.choice(LANGUAGES), minutes=rng.choice(MINUTES),
+        )
+        if query not in seen:
+            seen.add(query)
+            pool.append(query)
+    return pool
+
+class QueryMix:
+    """
+    Draw queries with Zipf-distributed popularity, so popular queries repeat.
+
+    A share of the draws is reworded so near-duplicates reach the semantic cache
+    rather than the exact response cache.
+    """
+
+    def __init__(self, pool: List[str], zipf: float, paraphrase_rate: float, seed: int):
+        """
+        Initialize the mix.
+
+        Args:
+            pool: Distinct queries, most popular first
+            zipf: Zipf exponent (0 draws uniformly)
+            paraphrase_rate: Fraction of draws that are reworded
+            seed: Random seed
+        """
+        self.pool = pool
+        self.paraphrase_rate = paraphrase_rate
+        self.rng = random.Random(seed)
+        self.weights = [1 / (rank ** zipf) for rank in range(1, len(pool) + 1)]
+
+    def next(self) -> str:
+        """Return the next query to send."""
+        query = self.rng.choices(self.pool, weights=self.weights)[0]
+        if self.rng.random() < self.paraphrase_rate:
+            query = self.rng.choice(PARAPHRASES)(query)
+        return query
+
+def load_queries(path: str) -> List[str]:
+    """Read queries from a JSON list or a text file with one query per line."""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return [str(query) for query in json.load(f)]
+        return [line.strip() for line in f if line.strip()]
+
+def free_port() -> int:
+    """Return a TCP port that is currently free on localhost."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def serve_in_thread(app, port: int):
+    """
+    Serve an ASGI app with uvicorn on a daemon thread.
+
+    Returns:
+        The uvicorn server (set `should_exit` to stop it)
+    """
+    import uvicorn
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.perf_counter() + 30
+    while not server.started:
+        if time.perf_counter() > deadline:
+            raise SystemExit(f"Server on port {port} did not start")
+        time.sleep(0.05)
+    return server
+
+def configure_local_environment(args, llm_port: int):
+    """
+    Point the settings at the local stand-ins; must run before config is imported.
+
+    Only the Qdrant location, the Groq endpoint, the filter cache and the local index
+    sources are forced; other settings keep their environment or .env values, with
+    placeholders if unset.
+    """
+    os.environ["QDRANT_URL"] = ":memory:"
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{llm_port}"
+    # A fresh filter cache, so results from earlier runs do not make this one warm
+    os.environ["FILTER_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="load_test_"), "filter_cache.sqlite3")
+    if args.embedding_backend:
+        os.environ["EMBEDDING_BACKEND"] = args.embedding_backend
+    if args.local_index:
+        os.environ["LOCAL_INDEX_ENABLED"] = "true"
+        # Search the seeded collection, not an embedding store or snapshot left by an ingestion
+        os.environ["EMBEDDING_STORE_ENABLED"] = "false"
+        os.environ["LOCAL_INDEX_SNAPSHOT_PATH"] = ""
+    for name, value in {
+        "GROQ_API_KEY": "stub",
+        "LLM_MODEL_NAME": "stub",
+        "QDRANT_API_KEY": "",
+        "QDRANT_COLLECTION_NAME": "assessments",
+        "EMBEDDING_MODEL_NAME": "BAAI/bge-small-en-v1.5",
+        "TOP_K": "10",
+        "LOG_LEVEL": "WARNING",
+    }.items():
+        os.environ.setdefault(name, value)
+
+def catalog_payload(item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Typed payload for one raw catalog item, built by ingestion without the LLM.
+
+    Durations, languages, job levels and the assessment type come from the ingestion
+    field parsers and the payload from `build_payload`, so filters see the values a real
+    ingestion stores; items whose description names no type stay untyped, as the LLM
+    would leave many of them. The raw catalog has no support flags, so they are guessed
+    from the title and description: adaptive when it mentions adaptive/IRT testing, and
+    remote unless it mentions paper, in-person or proctored sittings.
+    """
+    from Ingestion.field_parsers import parse_fields
+    from Ingestion.payload import build_payload
+
+    text = f"{item.get('Title', '')} {item.get('Description', '')}".lower()
+    return build_payload({
+        "title": item.get("Title", ""),
+        "url": item.get("URL", ""),
+        "job_levels": [],
+        "languages": [],
+        "duration_minutes": 0,
+        **parse_fields(item),
+        "adaptive_support": int(bool(ADAPTIVE_HINT.search(text))),
+        "remote_support": int(not ON_SITE_HINT.search(text)),
+    })
+
+def seed_collection(catalog_path: str, batch_size: int = 32) -> int:
+    """
+    Embed the catalog with the configured backend and load it into the in-memory Qdrant.
+
+    The sync and async in-memory clients do not share data, so both are seeded.
+
+    Returns:
+        Number of points written
+    """
+    from llama_index.core.schema import TextNode
+    from llama_index.core.vector_stores.utils import node_to_metadata_dict
+    from qdrant_client.http.models import Distance, PointStruct, VectorParams
+    from config.config import settings
+    from query.services.model_registry import model_registry
+    from query.services.vector_store import VectorStoreService
+
+    with open(catalog_path, encoding="utf-8") as f:
+        catalog = json.load(f)
+    backend = model_registry.get()
+    points = []
+    for start in range(0, len(catalog), batch_size):
+        batch = catalog[start:start + batch_size]
+        vectors = backend.embed([item.get("Description") or item.get("Title", "") for item in batch])
+        for item, vector in zip(batch, vectors):
+            node = TextNode(
+                id_=str(uuid.uuid5(uuid.NAMESPACE_URL, item.get("URL", ""))),
+                text=item.get("Description", ""),
+                metadata=catalog_payload(item),
+            )
+            payload = node_to_metadata_dict(node, remove_text=False, flat_metadata=False)
+            points.append(PointStruct(id=node.node_id, vector=np.asarray(vector).tolist(), payload=payload))
+
+    service = VectorStoreService()
+    vectors_config = VectorParams(size=len(points[0].vector), distance=Distance.COSINE)
+    collection = settings.qdrant_collection_name
+    service.client.create_collection(collection, vectors_config=vectors_config)
+    service.client.upsert(collection, points)
+
+    async def seed_async():
+        await service.aclient.create_collection(collection, vectors_config=vectors_config)
+        await service.aclient.upsert(collection, points)
+
+    asyncio.run(seed_async())
+    return len(points)
+
+def start_local_stack(args) -> Dict[str, Any]:
+    """
+    Start the stub LLM server, seed Qdrant and serve the query app.
+
+    Returns:
+        Dict with the app's base URL, the servers to stop and setup timings
+    """
+    llm_port = free_port()
+    configure_local_environment(args, llm_port)
+
+    from benchmarks import stub_llm_server
+    stub_llm_server.config.update({
+        "latency_ms": args.llm_latency_ms, "jitter_ms": args.llm_jitter_ms, "error_rate": args.llm_error_rate,
+    })
+    servers = [serve_in_thread(stub_llm_server.app, llm_port)]
+
+    from config.config import settings
+    start = time.perf_counter()
+    points = seed_collection(args.catalog or settings.catalog_path)
+    seed_seconds = time.perf_counter() - start
+    print(f"Seeded {points} points with the {settings.embedding_backend} backend in {seed_seconds:.1f}s")
+
+    from query.main import app
+    port = free_port()
+    servers.append(serve_in_thread(app, port))
+    return {"url": f"http://127.0.0.1:{port}", "servers": servers, "seed_seconds": round(seed_seconds, 3)}
+
+def wait_until_ready(url: str, timeout: float):
+    """Poll /ready until the service has warmed up; exit if warm-up fails or times out."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            response = httpx.get(f"{url}/ready", timeout=5)
+            if response.status_code == 200:
+                return
+            if response.json().get("stage") == "failed":
+                raise SystemExit(f"Warm-up failed: {response.json().get('error')}")
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{url} was not ready after {timeout:.0f}s")
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Parse a Server-Timing header into {stage: milliseconds}."""
+    return {name: float(duration) for name, duration in SERVER_TIMING_PATTERN.findall(header or "")}
+
+async def send_query(client: httpx.AsyncClient, endpoint: str, query: str, top_k: Optional[int]) -> Dict[str, Any]:
+    """
+    Send one query and measure it.
+
+    Returns:
+        Dict with latency_ms, ok, status, stage timings and the filter source
+    """
+    body = {"query": query}
+    if top_k:
+        body["top_k"] = top_k
+    start = time.perf_counter()
+    sample = {"ok": False, "status": None, "stages": {}, "filter_source": None}
+    try:
+        if endpoint == "/recommend/stream":
+            async with client.stream("POST", endpoint, json=body) as response:
+                sample["status"] = response.status_code
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event["event"] == "filters":
+                        sample["filter_source"] = event["data"].get("filter_source")
+                    elif event["event"] == "summary":
+                        sample["stages"] = event["data"].get("timings_ms", {})
+                        sample["ok"] = response.status_code == 200
+                    elif event["event"] == "error":
+                        break
+        else:
+            response = await client.post(endpoint, json=body)
+            sample["status"] = response.status_code
+            sample["ok"] = response.status_code == 200
+            sample["stages"] = parse_server_timing(response.headers.get("server-timing"))
+            if sample["ok"]:
+                sample["filter_source"] = response.json().get("filter_source")
+    except httpx.HTTPError as e:
+        sample["status"] = type(e).__name__
+    sample["latency_ms"] = (time.perf_counter() - start) * 1000
+    return sample
+
+async def run_load(url: str, mix: QueryMix, args) -> Dict[str, Any]:
+    """
+    Drive the API with `args.concurrency` closed-loop workers.
+
+    Stops after `args.requests` measured requests, or after `args.duration` seconds if
+    given. The first `args.warmup` requests are sent but not measured.
+
+    Returns:
+        Dict with the samples and the measured wall time
+    """
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=args.timeout) as client:
+        for _ in range(args.warmup):
+            await send_query(client, args.endpoint, mix.next(), args.top_k)
+
+        samples = []
+        issued = 0
+        deadline = time.perf_counter() + args.duration if args.duration else None
+
+        async def worker():
+            nonlocal issued
+            while True:
+                if deadline is not None:
+                    if time.perf_counter() >= deadline:
+                        return
+                elif issued >= args.requests:
+                    return
+                issued += 1
+                samples.append(await send_query(client, args.endpoint, mix.next(), args.top_k))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+    return {"samples": samples, "elapsed_seconds": elapsed}
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Mean, p50, p90, p95, p99 and max of a list of milliseconds."""
+    if not values:
+        return {}
+    array = np.asarray(values)
+    summary = {"mean": float(array.mean())}
+    for q in (50, 90, 95, 99):
+        summary[f"p{q}"] = float(np.percentile(array, q))
+    summary["max"] = float(array.max())
+    return {key: round(value, 3) for key, value in summary.items()}
+
+def summarize(run: Dict[str, Any]) -> Dict[str, Any]:
+    """Aggregate samples into throughput, error rate, latency percentiles and stage breakdown."""
+    samples = run["samples"]
+    ok = [sample for sample in samples if sample["ok"]]
+    stage_values = defaultdict(list)
+    for sample in ok:
+        for stage, milliseconds in sample["stages"].items():
+            stage_values[stage].append(milliseconds)
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "error_rate": round((len(samples) - len(ok)) / len(samples), 4) if samples else 0.0,
+        "elapsed_seconds": round(run["elapsed_seconds"], 3),
+        "throughput_rps": round(len(ok) / run["elapsed_seconds"], 2) if run["elapsed_seconds"] else 0.0,
+        "latency_ms": percentiles([sample["latency_ms"] for sample in ok]),
+        "stages_ms": {
+            stage: {**percentiles(values), "share": round(len(values) / len(ok), 3)}
+            for stage, values in sorted(stage_values.items())
+        },
+        "filter_sources": dict(Counter(sample["filter_source"] or "none" for sample in ok)),
+        "error_statuses": dict(Counter(str(sample["status"]) for sample in samples if not sample["ok"])),
+    }
+
+def git_revision() -> Optional[str]:
+    """Current commit of the working tree, if it is a git checkout."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+def print_report(summary: Dict[str, Any]):
+    """Print a human-readable summary of one run."""
+    latency = summary["latency_ms"]
+    print(f"\nRequests: {summary['requests']}  errors: {summary['errors']} ({summary['error_rate']:.2%})"
+          f"  elapsed: {summary['elapsed_seconds']:.1f}s  throughput: {summary['throughput_rps']:.1f} req/s")
+    if latency:
+        print("Latency ms: " + "  ".join(f"{key} {value:.1f}" for key, value in latency.items()))
+    if summary["stages_ms"]:
+        print(f"\n{'stage':<16} {'share':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for stage, values in summary["stages_ms"].items():
+            print(f"{stage:<16} {values['share']:>6.0%} {values['mean']:>9.2f} {values['p50']:>9.2f} "
+                  f"{values['p95']:>9.2f} {values['p99']:>9.2f}")
+    print("\nFilter sources: " + ", ".join(f"{source} {count}" for source, count in summary["filter_sources"].items()))
+    if summary["error_statuses"]:
+        print("Errors: " + ", ".join(f"{status} x{count}" for status, count in summary["error_statuses"].items()))
+
+def compare(summary: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> List[str]:
+    """
+    Compare a run with a baseline.
+
+    Args:
+        summary: This run's summary
+        baseline: Saved report (as written by --output)
+        max_regression: Allowed relative change in the worse direction
+
+    Returns:
+        Descriptions of the metrics that regressed
+    """
+    regressions = []
+    print(f"\n{'metric':<20} {'baseline':>10} {'current':>10} {'change':>8}")
+    for path, higher_is_better in COMPARED_METRICS.items():
+        current, previous = summary, baseline["summary"]
+        for key in path:
+            current, previous = current.get(key, {}), previous.get(key, {})
+        if not isinstance(current, (int, float)) or not isinstance(previous, (int, float)) or not previous:
+            continue
+        change = (current - previous) / previous
+        name = ".".join(path)
+        print(f"{name:<20} {previous:>10.2f} {current:>10.2f} {change:>+8.1%}")
+        if (-change if higher_is_better else change) > max_regression:
+            regressions.append(f"{name} {previous:.2f} -> {current:.2f} ({change:+.1%})")
+    if summary["error_rate"] > baseline["summary"].get("error_rate", 0) + 0.01:
+        regressions.append(f"error_rate {baseline['summary'].get('error_rate', 0):.2%} -> {summary['error_rate']:.2%}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Load an already running server instead of starting the local stack")
+    parser.add_argument("--endpoint", default="/recommend", choices=["/recommend", "/recommend/stream"])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=1000, help="Measured requests (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="Run for this many seconds instead of a request count")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests sent first")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request client timeout in seconds")
+    parser.add_argument("--top-k", type=int, help="top_k sent with every query (default: server setting)")
+    parser.add_argument("--queries", help="JSON list or text file of queries (default: generated mix)")
+    parser.add_argument("--pool-size", type=int, default=300, help="Distinct generated queries")
+    parser.add_argument("--llm-share", type=float, default=0.3, help="Fraction of generated queries that need the LLM")
+    parser.add_argument("--zipf", type=float, default=1.0, help="Popularity skew of the query mix (0 = uniform)")
+    parser.add_argument("--paraphrase-rate", type=float, default=0.1, help="Fraction of draws that are reworded")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--catalog", help="Catalog to seed Qdrant from (default: settings.catalog_path)")
+    parser.add_argument("--embedding-backend", help="Embedding backend for the local stack (e.g. stub, onnx)")
+    parser.add_argument("--local-index", action="store_true", help="Serve searches from the in-process index")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Stub LLM latency")
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0, help="Stub LLM latency jitter")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="Stub LLM error rate")
+    parser.add_argument("--ready-timeout", type=float, default=300.0, help="Seconds to wait for /ready")
+    parser.add_argument("--output", help="Write the report as JSON (a baseline for --compare)")
+    parser.add_argument("--compare", help="Baseline report to compare this run against")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Allowed relative latency increase or throughput drop (default 0.15)")
+    args = parser.parse_args()
+
+    stack = None
+    if args.url:
+        url = args.url.rstrip("/")
+    else:
+        stack = start_local_stack(args)
+        url = stack["url"]
+    wait_until_ready(url, args.ready_timeout)
+
+    queries = load_queries(args.queries) if args.queries else build_query_pool(args.pool_size, args.llm_share, args.seed)
+    mix = QueryMix(queries, args.zipf, args.paraphrase_rate, args.seed)
+    print(f"Sending {f'{args.duration:.0f}s of' if args.duration else args.requests} requests to {url}{args.endpoint}"
+          f" at concurrency {args.concurrency} ({len(queries)} distinct queries)")
+    try:
+        run = asyncio.run(run_load(url, mix, args))
+        cache_stats = httpx.get(f"{url}/cache/stats", timeout=10).json()
+    finally:
+        if stack is not None:
+            for server in stack["servers"]:
+                server.should_exit = True
+
+    summary = summarize(run)
+    print_report(summary)
+    report = {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": git_revision(),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "config": {
+            key: value for key, value in vars(args).items() if key not in ("output", "compare", "max_regression")
+        },
+        "setup": {"seed_seconds": stack["seed_seconds"]} if stack else {},
+        "summary": summary,
+        "cache_stats": cache_stats,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(summary, baseline, args.max_regression)
+        if regressions:
+            print("\nRegressions beyond {:.0%}:\n  ".format(args.max_regression) + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions beyond {:.0%}".format(args.max_regression))
+
+if __name__ == "__main__":
+    main()
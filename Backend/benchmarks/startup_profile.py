@@ -0,0 +1,133 @@
+"""
+Profile cold start of the query service and enforce a startup-time budget.
+
+Runs `import query.main` in a fresh interpreter under `python -X importtime` and
+reports the slowest modules and top-level packages. With --serve it also starts
+uvicorn and measures time until /health answers (liveness) and until /ready
+reports ready, including the warm-up step timings.
+
+Usage:
+    python benchmarks/startup_profile.py --top 20
+    python benchmarks/startup_profile.py --serve --budget 2.5
+
+Exits non-zero when the cold start (time to /health with --serve, otherwise the
+import of query.main) exceeds the budget (defaults to settings.startup_budget_seconds).
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections import defaultdict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import httpx
+from config.config import settings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def profile_imports(module: str):
+    """
+    Import a module in a fresh interpreter with -X importtime.
+
+    Returns:
+        Tuple of (wall seconds, list of (module, self_us, cumulative_us))
+    """
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"Importing {module} failed")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return wall, rows
+
+def wait_for(url: str, timeout: float, process) -> float:
+    """Poll a URL until it answers 200; return the seconds waited, or None on timeout or failed warm-up."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        if process.poll() is not None:
+            return None
+        try:
+            response = httpx.get(url, timeout=1.0)
+            if response.status_code == 200:
+                return time.perf_counter() - start
+            if response.status_code == 503 and response.json().get("stage") == "failed":
+                return None
+        except (httpx.HTTPError, ValueError):
+            pass
+        time.sleep(0.05)
+    return None
+
+def profile_serve(ready_timeout: float):
+    """Start uvicorn and time /health and /ready from process launch."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "query.main:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Polling starts right after launch, so the wait is the time to liveness
+        live = wait_for(f"{base_url}/health", ready_timeout, process)
+        ready = wait_for(f"{base_url}/ready", ready_timeout, process)
+        ready = time.perf_counter() - start if ready is not None else None
+        status = httpx.get(f"{base_url}/ready", timeout=1.0).json() if process.poll() is None else {}
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return live, ready, status
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="query.main", help="Module whose import is profiled")
+    parser.add_argument("--top", type=int, default=15, help="Number of modules and packages to list")
+    parser.add_argument("--serve", action="store_true", help="Also time /health and /ready under uvicorn")
+    parser.add_argument("--ready-timeout", type=float, default=300.0)
+    parser.add_argument("--budget", type=float, default=settings.startup_budget_seconds,
+                        help="Cold-start budget in seconds")
+    args = parser.parse_args()
+
+    wall, rows = profile_imports(args.module)
+    packages = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split(".")[0]] += self_us
+
+    print(f"import {args.module}: {wall:.3f}s wall, {len(rows)} modules")
+    print("\nSlowest modules (cumulative):")
+    for name, _, cumulative_us in sorted(rows, key=lambda row: row[2], reverse=True)[:args.top]:
+        print(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+    print("\nTop-level packages (self time):")
+    for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:9.1f} ms  {name}")
+
+    cold_start = wall
+    if args.serve:
+        live, ready, status = profile_serve(args.ready_timeout)
+        print(f"\n/health answered after {live:.3f}s" if live is not None else "\n/health never answered")
+        print(f"/ready answered after {ready:.3f}s" if ready is not None else "/ready never became ready")
+        if status.get("timings_seconds"):
+            print("Warm-up steps: " + ", ".join(f"{k} {v:.3f}s" for k, v in status["timings_seconds"].items()))
+        if status.get("error"):
+            print(f"Warm-up error: {status['error']}")
+        cold_start = live if live is not None else float("inf")
+
+    if cold_start > args.budget:
+        print(f"\nFAIL: cold start {cold_start:.3f}s exceeds budget {args.budget:.3f}s")
+        sys.exit(1)
+    print(f"\nOK: cold start {cold_start:.3f}s within budget {args.budget:.3f}s")
+
+if __name__ == "__main__":
+    main()
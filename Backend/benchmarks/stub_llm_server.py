@@ -0,0 +1,103 @@
+"""
+Local stand-in for the Groq chat completions API.
+
+Answers POST /openai/v1/chat/completions in the OpenAI/Groq response format with the
+filters the rule-based extractor finds in the query, after a configurable latency.
+Errors and slow responses can be injected to exercise timeouts, hedging and the
+circuit breaker.
+
+Usage:
+    python benchmarks/stub_llm_server.py --port 8900 --latency-ms 300 --jitter-ms 100 --error-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8900 uvicorn query.main:app
+
+Behaviour can be changed at runtime with POST /stub/config (same field names as the
+flags) and inspected with GET /stub/stats.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from typing import Any, Dict
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from query.services.rule_extractor import rule_extractor
+
+# The user's query is the last "Query:" line; earlier ones are the prompt's few-shot examples
+QUERY_PATTERN = re.compile(r'Query: "([^\n]*)"')
+
+config = {
+    "latency_ms": 200.0,
+    "jitter_ms": 50.0,
+    "error_rate": 0.0,
+    "slow_rate": 0.0,
+    "slow_ms": 5000.0,
+}
+stats = {"requests": 0, "errors": 0, "slow": 0}
+
+app = FastAPI(title="Stub LLM server")
+
+def completion(content: str, model: str) -> Dict[str, Any]:
+    """Wrap reply text in a chat completion response body."""
+    return {
+        "id": f"stub-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    """Reply with rule-extracted filters after the configured latency, or an injected failure."""
+    body = await request.json()
+    stats["requests"] += 1
+    delay_ms = max(0.0, random.gauss(config["latency_ms"], config["jitter_ms"]))
+    if random.random() < config["slow_rate"]:
+        stats["slow"] += 1
+        delay_ms = config["slow_ms"]
+    await asyncio.sleep(delay_ms / 1000)
+
+    if random.random() < config["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse(status_code=503, content={"error": {"message": "stub upstream error"}})
+
+    prompt = body["messages"][-1]["content"]
+    queries = QUERY_PATTERN.findall(prompt)
+    filters = rule_extractor.extract(queries[-1])[0] if queries else {}
+    return completion(json.dumps(filters), body.get("model", "stub"))
+
+@app.post("/stub/config")
+async def update_config(update: Dict[str, float]):
+    """Change latency or failure injection at runtime."""
+    config.update({key: float(value) for key, value in update.items() if key in config})
+    return config
+
+@app.get("/stub/stats")
+async def get_stats():
+    """Request, error and slow-response counters."""
+    return {**stats, "config": config}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    for key, value in config.items():
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float, default=value)
+    args = parser.parse_args()
+    config.update({key: getattr(args, key) for key in config})
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,6 +10,67 @@ class Settings(BaseSettings):
     qdrant_collection_name: str
     groq_api_key: str
     top_k: int
+    embedding_warmup_runs: int = 2
+    background_warmup: bool = True
+    startup_budget_seconds: float = 3.0
+    embedding_backend: str = "torch"
+    embedding_max_length: int = 512
+    embedding_onnx_dir: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "onnx_models")
+    embedding_onnx_threads: int = 0
+    embedding_stub_dimension: int = 384
+    embedding_normalize: bool = True
+    embedding_store_enabled: bool = True
+    embedding_store_dir: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "embedding_store")
+    embedding_store_keep_generations: int = 2
+    embedding_batch_window_ms: float = 5.0
+    embedding_max_batch_size: int = 32
+    embedding_cache_size: int = 4096
+    embedding_cache_ttl_seconds: float = 3600
+    embedding_cache_path: Optional[str] = None
+    embedding_cache_shared_size: int = 100000
+    filter_cache_path: str = "filter_cache.sqlite3"
+    filter_cache_ttl_seconds: float = 7 * 24 * 3600
+    filter_cache_max_entries: int = 50000
+    filter_cache_memory_size: int = 4096
+    catalog_path: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "shl_assessments.json")
+    rule_extractor_min_confidence: float = 0.8
+    groq_base_url: Optional[str] = None
+    llm_timeout_seconds: float = 3.0
+    llm_max_connections: int = 20
+    llm_hedge_delay_ms: float = 0
+    llm_breaker_failure_threshold: int = 5
+    llm_breaker_recovery_seconds: float = 30
+    llm_breaker_slow_call_seconds: float = 2.0
+    batch_max_queries: int = 1000
+    batch_extraction_concurrency: int = 8
+    local_index_enabled: bool = False
+    local_index_snapshot_path: Optional[str] = None
+    local_index_refresh_seconds: float = 300
+    local_index_scroll_batch_size: int = 256
+    qdrant_version_collection_suffix: str = "_version"
+    collection_version_check_seconds: float = 10
+    response_cache_size: int = 2048
+    response_cache_ttl_seconds: float = 0
+    semantic_cache_size: int = 1024
+    semantic_cache_threshold: float = 0.95
+    semantic_cache_ttl_seconds: float = 0
+    ingestion_max_workers: int = 8
+    ingestion_extraction_mode: str = "item"
+    ingestion_extraction_batch_size: int = 5
+    ingestion_requests_per_minute: float = 30
+    ingestion_tokens_per_minute: float = 0
+    ingestion_rate_limit_burst: float = 0
+    ingestion_max_retries: int = 6
+    ingestion_backoff_seconds: float = 2.0
+    ingestion_max_backoff_seconds: float = 60.0
+    ingestion_embed_batch_size: int = 64
+    ingestion_upsert_batch_size: int = 128
+    ingestion_upload_parallel: int = 4
+    ingestion_stream_batch_size: int = 64
+    ingestion_queue_size: int = 4
+    ingestion_cache_path: str = "ingestion_cache.sqlite3"
+    ingestion_manifest_path: str = "ingestion_manifest.json"
+    ingestion_llm_report_path: str = "ingestion_llm_report.json"
 
     class Config:
         env_file = ".env"
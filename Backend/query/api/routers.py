@@ -2,112 +2,126 @@
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from fastapi import APIRouter,HTTPException
-from query.models.schemas import QueryRequest, QueryResponse, AssessmentResponse
-from query.services.embedding import EmbeddingService
-from query.services.metadata_extractor import LLMMetadataExtractor
-from query.services.vector_store import VectorStoreService
-from query.utils.helpers import normalize_job_level, parse_json_or_return_as_list
+import json
+from typing import List
+from fastapi import APIRouter,HTTPException,Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from query.models.schemas import QueryRequest, QueryResponse, BatchQueryResponse
+from query.services.lifecycle import lifecycle
 from config.config import settings
-from llama_index.core.vector_stores.types import (
-    VectorStoreQuery,
-    VectorStoreQueryMode,
-)
+from query.services.response_cache import response_cache
+from query.services.semantic_cache import semantic_cache
+from query.services.embedding_batcher import embedding_batcher
+from query.services.filter_cache import filter_cache
 router = APIRouter()
 
+def get_recommendation_service():
+    """
+    Return the recommendation service once the warm-up has loaded it.
+
+    The search stack is imported by the background warm-up, not at app import time.
+
+    Raises:
+        HTTPException: 503 with Retry-After while the service is still warming up
+    """
+    if not lifecycle.ready:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service warming up ({lifecycle.stage})",
+            headers={"Retry-After": "5"},
+        )
+    from query.services.recommender import recommendation_service
+    return recommendation_service
+
 @router.get("/health")
 async def health_check():
-    """Health check endpoint to verify the API is running."""
-    return {"status": "healthy"}
+    """
+    Liveness endpoint; answers as soon as the process serves HTTP.
+
+    A failed warm-up is not retried, so it reports 503 and the orchestrator restarts the process.
+    """
+    if lifecycle.stage == "failed":
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "ready": False, "error": lifecycle.error})
+    return {"status": "healthy", "ready": lifecycle.ready}
+
+@router.get("/ready")
+async def readiness_check():
+    """Readiness endpoint; reports 503 until the model and search stack are warm."""
+    status = lifecycle.status()
+    if not lifecycle.ready:
+        return JSONResponse(status_code=503, content=status)
+    # Imported by the warm-up, so this is free once ready
+    from query.services.llm_client import llm_client
+    status["llm"] = llm_client.stats()
+    return status
+
+@router.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, cache, filter source, LLM and batch counters."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@router.get("/cache/stats")
+async def cache_stats():
+    """Hit rates and sizes of the query-side caches."""
+    return {
+        "response": response_cache.stats(),
+        "semantic": semantic_cache.stats(),
+        "embedding": embedding_batcher.cache.stats() if embedding_batcher.cache is not None else None,
+        "filter": filter_cache.stats(),
+    }
 
 @router.post("/recommend", response_model=QueryResponse)
 async def query_assessments(request: QueryRequest):
-    # """Query assessments with semantic search and metadata filtering."""
+    """Query assessments with semantic search and metadata filtering."""
+    recommendation_service = get_recommendation_service()
     try:
+        return await recommendation_service.recommend(request.query, request.top_k)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
-        metadata_extractor = LLMMetadataExtractor()
-        embedding_service = EmbeddingService()
-        vector_store_service = VectorStoreService()
-        
-        # Extract metadata from query if not explicitly provided
-        extracted_metadata = {}
-        extracted_metadata = metadata_extractor.extract_metadata(request.query)
-            
-        # Use provided filters or fall back to extracted ones
-        job_levels = extracted_metadata.get('job_levels')
-        languages = extracted_metadata.get('languages')
-        min_duration = extracted_metadata.get('min_duration')
-        max_duration = extracted_metadata.get('max_duration')
-        assessment_type = extracted_metadata.get('assessment_type')
-        adaptive_support = extracted_metadata.get('adaptive_support')
-        remote_support = extracted_metadata.get('remote_support')
+@router.post("/recommend/stream")
+async def query_assessments_stream(request: QueryRequest, http_request: Request):
+    """
+    Stream filters, then each result, then a summary with timings.
 
-        # Create metadata filters
-        metadata_filters = vector_store_service.create_metadata_filters(
-            job_levels=job_levels,
-            languages=languages,
-            min_duration=min_duration,
-            max_duration=max_duration,
-            assessment_type=assessment_type,
-            adaptive_support=adaptive_support,
-            remote_support=remote_support
-        )
-        
-        embeddings=embedding_service.get_embeddings(request.query)
-        print(embeddings.shape)
-        query=VectorStoreQuery(
-             query_embedding=embeddings[0],
-             query_str=request.query,
-            filters=metadata_filters,
-            similarity_top_k=settings.top_k,
-        )
-        # Execute the query
-        response = vector_store_service.vector_store.query(
-            query=query
-        )
-        
-        # Parse the response nodes and create structured output
-        results = []
-        
-        for node in response.nodes:
-            # Parse metadata
-            metadata = node.metadata
-            job_levels_data = metadata.get("job_levels", "[]")
-            languages_data = metadata.get("languages", "[]")
+    Responds with newline-delimited JSON, or with Server-Sent Events when the client
+    sends `Accept: text/event-stream`.
+    """
+    use_sse = "text/event-stream" in http_request.headers.get("accept", "")
+    recommendation_service = get_recommendation_service()
+
+    async def events():
+        try:
+            async for event in recommendation_service.recommend_stream(request.query, request.top_k):
+                yield format_event(event, use_sse)
+        except Exception as e:
+            yield format_event({"event": "error", "data": {"detail": f"Query failed: {str(e)}"}}, use_sse)
+
+    media_type = "text/event-stream" if use_sse else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
 
-            
-            # Parse JSON strings if needed
-            job_levels_parsed = parse_json_or_return_as_list(job_levels_data)
-            languages_parsed = parse_json_or_return_as_list(languages_data)
-            
-            # Post-processing for job level matching
-            if job_levels and isinstance(job_levels_parsed, list):
-                normalized_stored_levels = [normalize_job_level(level) for level in job_levels_parsed]
-                normalized_query_levels = [normalize_job_level(level) for level in job_levels]
-                
-                # Only include results with at least one matching job level
-                if not any(query_level in normalized_stored_levels for query_level in normalized_query_levels if query_level):
-                    continue
-            
-            # Create structured result
-            result = AssessmentResponse(
-                title=metadata.get("title", ""),
-                url=metadata.get("url", ""),
-                description=node.text,
-                job_levels=job_levels_parsed,
-                languages=languages_parsed,
-                duration=metadata.get("duration_minutes", 0),
-                remote_support=metadata.get("remote_support", False),
-                test_type=metadata.get("assessment_type", ""),
-                adaptive_support=metadata.get("adaptive_support", False),
-            )
-            results.append(result)
-            
-        # Return structured response
-        return QueryResponse(
-            results=results,
-            total_results=len(results),
+def format_event(event, use_sse: bool) -> str:
+    """Serialize a stream event as an SSE message or an NDJSON line."""
+    if use_sse:
+        return f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+    return json.dumps(event) + "\n"
+
+@router.post("/recommend/batch", response_model=BatchQueryResponse)
+async def query_assessments_batch(requests: List[QueryRequest]):
+    """Query assessments for a list of queries; per-query failures are reported inline."""
+    if len(requests) > settings.batch_max_queries:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(requests)} queries (max {settings.batch_max_queries})"
+        )
+    top_ks = {request.top_k for request in requests}
+    if len(top_ks) > 1:
+        raise HTTPException(status_code=422, detail="All queries of a batch must use the same top_k")
+    recommendation_service = get_recommendation_service()
+    try:
+        return await recommendation_service.recommend_batch(
+            [request.query for request in requests], top_ks.pop() if top_ks else None
         )
-        
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Batch query failed: {str(e)}")
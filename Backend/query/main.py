@@ -1,16 +1,51 @@
 """Main application module for the Assessment Search API."""
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from query.api.routers import router
+from query.services.lifecycle import lifecycle
+from query.utils.metrics import REQUEST_LATENCY
+from query.utils.timing import StageTimer, set_current_timer
+from config.config import settings
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start warming up the model and search stack.
+
+    With background warm-up the app serves /health immediately and reports readiness on
+    /ready; otherwise startup waits for the warm-up as before.
+    """
+    warm_up = lifecycle.start()
+    if not settings.background_warmup:
+        await warm_up
+    yield
+    await lifecycle.stop()
 
 # Create FastAPI app
-app = FastAPI(title="Assessment Query API")
+app = FastAPI(title="Assessment Query API", lifespan=lifespan)
+
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """
+    Give each request a stage timer and report it in a `Server-Timing` header.
+
+    Streaming responses only report the stages finished before the first byte; their
+    full timings arrive in the stream's summary event.
+    """
+    timer = StageTimer()
+    set_current_timer(timer)
+    response = await call_next(request)
+    response.headers["Server-Timing"] = timer.server_timing()
+    route = request.scope.get("route")
+    REQUEST_LATENCY.labels(route.path if route is not None else "unmatched").observe(timer.total_ms() / 1000)
+    return response
 
 # Include API routes
 app.include_router(router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000,workers=1)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000,workers=1)
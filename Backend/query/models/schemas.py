@@ -1,10 +1,12 @@
 """Pydantic models for request and response schemas."""
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any, Optional, Union
 
 class QueryRequest(BaseModel):
     """Schema for assessment query requests."""
     query: str
+    # Number of results; defaults to settings.top_k
+    top_k: Optional[int] = Field(default=None, ge=1, le=100)
     
 class AssessmentResponse(BaseModel):
     """Schema for individual assessment response items."""
@@ -21,4 +23,18 @@ class AssessmentResponse(BaseModel):
 class QueryResponse(BaseModel):
     """Schema for the complete query response."""
     results: List[AssessmentResponse]
-    total_results: int
\ No newline at end of file
+    total_results: int
+    filters: Dict[str, Any] = {}
+    filter_source: Optional[str] = None
+
+class BatchItemResponse(BaseModel):
+    """Schema for one entry of a batch query response."""
+    index: int
+    response: Optional[QueryResponse] = None
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    """Schema for the batch query response, in request order."""
+    results: List[BatchItemResponse]
+    total_queries: int
+    failed_queries: int
\ No newline at end of file
@@ -2,31 +2,39 @@
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from sentence_transformers import SentenceTransformer
 from config.config import settings
-from transformers import AutoTokenizer, AutoModel
-import torch
+from query.services.model_registry import model_registry
+import numpy as np
 class EmbeddingService:
     """Service for generating text embeddings."""
-    
+
     def __init__(self):
         """Initialize the embedding service with a specified model."""
         self.model_name = settings.embedding_model_name
 
     def get_embeddings(self,text):
-        # Load the tokenizer and model
-        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
-        model = AutoModel.from_pretrained(self.model_name)
-        
-        # Tokenize the input text
-        inputs = tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
-        
-        # Generate embeddings
-        with torch.no_grad():
-            outputs = model(**inputs)
-        
-        # Use the [CLS] token embedding as the sentence embedding
-        # (or calculate mean of all token embeddings for better representation)
-        embeddings = outputs.last_hidden_state[:, 0, :]
-        
-        return embeddings
\ No newline at end of file
+        """
+        Embed a text or list of texts with the configured backend.
+
+        Args:
+            text: Text or list of texts
+
+        Returns:
+            float32 array of shape (n_texts, embedding_dim) holding the [CLS] embeddings
+        """
+        # Reuse the process-wide backend (PyTorch or ONNX Runtime)
+        backend = model_registry.get()
+        texts = [text] if isinstance(text, str) else list(text)
+        return backend.embed(texts)
+
+    def embed_batch(self, texts):
+        """
+        Embed several texts in one padded forward pass.
+
+        Args:
+            texts: List of texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), embedding_dim)
+        """
+        return np.asarray(self.get_embeddings(list(texts)), dtype=np.float32)
@@ -0,0 +1,229 @@
+"""Interchangeable inference backends for the query embedding model."""
+import hashlib
+import os
+import re
+import sys
+from typing import List
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from config.config import settings
+from query.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+BACKENDS = ("torch", "onnx", "onnx-int8", "stub")
+
+class TorchEmbeddingBackend:
+    """Full-precision PyTorch `AutoModel` with [CLS] pooling."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str = None, max_length: int = None):
+        """
+        Initialize the backend; weights are loaded by `load`.
+
+        Args:
+            model_name: Hugging Face model id (defaults to settings.embedding_model_name)
+            max_length: Tokenizer truncation length (defaults to settings.embedding_max_length)
+        """
+        self.model_name = model_name or settings.embedding_model_name
+        self.max_length = max_length or settings.embedding_max_length
+        self.tokenizer = None
+        self.model = None
+
+    def load(self):
+        """Load the tokenizer and model in eval mode."""
+        from transformers import AutoTokenizer, AutoModel
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModel.from_pretrained(self.model_name)
+        model.eval()
+        self.model = model
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in one padded forward pass.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), embedding_dim)
+        """
+        import torch
+        inputs = self.tokenizer(
+            list(texts), return_tensors="pt", padding=True, truncation=True, max_length=self.max_length
+        )
+        with torch.inference_mode():
+            outputs = self.model(**inputs)
+        # Use the [CLS] token embedding as the sentence embedding
+        return outputs.last_hidden_state[:, 0, :].cpu().numpy().astype(np.float32, copy=False)
+
+class OnnxEmbeddingBackend:
+    """ONNX Runtime CPU session over an export of the same model, optionally int8-quantized."""
+
+    def __init__(self, model_name: str = None, max_length: int = None, quantized: bool = False,
+                 model_dir: str = None):
+        """
+        Initialize the backend; the session is created by `load`.
+
+        Args:
+            model_name: Hugging Face model id (defaults to settings.embedding_model_name)
+            max_length: Tokenizer truncation length (defaults to settings.embedding_max_length)
+            quantized: Run the dynamically int8-quantized export
+            model_dir: Directory for exported models (defaults to settings.embedding_onnx_dir)
+        """
+        self.model_name = model_name or settings.embedding_model_name
+        self.max_length = max_length or settings.embedding_max_length
+        self.quantized = quantized
+        self.name = "onnx-int8" if quantized else "onnx"
+        self.export_dir = os.path.join(
+            model_dir or settings.embedding_onnx_dir, re.sub(r"[^\w.-]+", "--", self.model_name)
+        )
+        self.tokenizer = None
+        self.session = None
+        self._input_names = ()
+
+    @property
+    def model_path(self) -> str:
+        """Path of the fp32 ONNX export."""
+        return os.path.join(self.export_dir, "model.onnx")
+
+    @property
+    def quantized_model_path(self) -> str:
+        """Path of the int8 dynamically quantized export."""
+        return os.path.join(self.export_dir, "model.int8.onnx")
+
+    def load(self):
+        """Export (and quantize) the model on first use, then open an ONNX Runtime session."""
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+        path = self.quantized_model_path if self.quantized else self.model_path
+        if not os.path.exists(self.model_path):
+            self.export()
+        if self.quantized and not os.path.exists(self.quantized_model_path):
+            self.quantize()
+        self.tokenizer = AutoTokenizer.from_pretrained(self.export_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.embedding_onnx_threads:
+            options.intra_op_num_threads = settings.embedding_onnx_threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_names = tuple(model_input.name for model_input in self.session.get_inputs())
+
+    def export(self):
+        """Export the PyTorch model to ONNX with dynamic batch and sequence axes."""
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+        os.makedirs(self.export_dir, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModel.from_pretrained(self.model_name)
+        model.eval()
+        # load() reads the tokenizer from the export directory, next to the graph
+        tokenizer.save_pretrained(self.export_dir)
+
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        input_names = list(sample.keys())
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+        tmp_path = f"{self.model_path}.tmp"
+        with torch.inference_mode():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in input_names),
+                tmp_path,
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+                do_constant_folding=True,
+            )
+        os.replace(tmp_path, self.model_path)
+        logger.info("exported onnx model", extra={"fields": {"model": self.model_name, "path": self.model_path}})
+
+    def quantize(self):
+        """Write an int8 dynamically quantized copy of the fp32 export."""
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        tmp_path = f"{self.quantized_model_path}.tmp"
+        quantize_dynamic(self.model_path, tmp_path, weight_type=QuantType.QInt8)
+        os.replace(tmp_path, self.quantized_model_path)
+        logger.info("quantized onnx model", extra={"fields": {"path": self.quantized_model_path}})
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts in one padded ONNX Runtime run.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), embedding_dim)
+        """
+        inputs = self.tokenizer(
+            list(texts), return_tensors="np", padding=True, truncation=True, max_length=self.max_length
+        )
+        feed = {name: inputs[name].astype(np.int64, copy=False) for name in self._input_names if name in inputs}
+        last_hidden_state = self.session.run(["last_hidden_state"], feed)[0]
+        # Use the [CLS] token embedding as the sentence embedding
+        return np.ascontiguousarray(last_hidden_state[:, 0, :], dtype=np.float32)
+
+class StubEmbeddingBackend:
+    """
+    Deterministic hashed bag-of-words vectors, for load tests without model weights.
+
+    Texts sharing words get similar vectors, so caches and filters behave plausibly,
+    but the rankings mean nothing.
+    """
+
+    name = "stub"
+
+    def __init__(self, dimension: int = None, **kwargs):
+        """
+        Initialize the backend.
+
+        Args:
+            dimension: Vector size (defaults to settings.embedding_stub_dimension)
+        """
+        self.dimension = dimension or settings.embedding_stub_dimension
+
+    def load(self):
+        """Nothing to load."""
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts as normalized sums of per-word random vectors.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            float32 array of shape (len(texts), dimension)
+        """
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                seed = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+                vectors[row] += np.random.default_rng(seed).standard_normal(self.dimension, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+def create_embedding_backend(name: str = None, **kwargs):
+    """
+    Build an embedding backend by name.
+
+    Args:
+        name: One of BACKENDS (defaults to settings.embedding_backend)
+        **kwargs: Passed to the backend constructor
+
+    Returns:
+        An unloaded backend exposing `load()` and `embed(texts)`
+    """
+    name = (name or settings.embedding_backend).lower()
+    if name == "torch":
+        return TorchEmbeddingBackend(**kwargs)
+    if name in ("onnx", "onnx-int8"):
+        return OnnxEmbeddingBackend(quantized=name == "onnx-int8", **kwargs)
+    if name == "stub":
+        return StubEmbeddingBackend(**kwargs)
+    raise ValueError(f"Unknown embedding backend {name!r}; expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,154 @@
+"""Dynamic micro-batching of query embeddings across concurrent requests."""
+import asyncio
+import os
+import sys
+from typing import List, Optional, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from config.config import settings
+from query.services.embedding import EmbeddingService
+from query.services.embedding_cache import EmbeddingCache
+from query.utils.metrics import EMBEDDING_BATCH_SIZE
+
+class EmbeddingBatcher:
+    """Collect queries arriving within a short window and embed them in one forward pass."""
+
+    def __init__(self, embedding_service: EmbeddingService, window_ms: float = None, max_batch_size: int = None,
+                 cache: Optional[EmbeddingCache] = None):
+        """
+        Initialize the batcher.
+
+        Args:
+            embedding_service: Service used to run the batched forward pass
+            window_ms: How long to wait for more queries after the first one arrives
+            max_batch_size: Upper bound on the number of queries per forward pass
+            cache: Optional query embedding cache consulted before batching
+        """
+        self.embedding_service = embedding_service
+        self.window = (window_ms if window_ms is not None else settings.embedding_batch_window_ms) / 1000.0
+        self.max_batch_size = max_batch_size or settings.embedding_max_batch_size
+        self.cache = cache
+        self._queue = None
+        self._worker = None
+
+    async def start(self):
+        """Start the background task that drains the queue."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task, failing the batch in progress and every query still queued."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        queued = []
+        while not self._queue.empty():
+            queued.append(self._queue.get_nowait())
+        self._fail(queued)
+        self._worker = None
+        self._queue = None
+
+    @staticmethod
+    def _fail(batch: List[Tuple[str, asyncio.Future]]):
+        """Fail the callers of a batch that will never be embedded."""
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped"))
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Embed a single query, sharing a forward pass with concurrent callers.
+
+        Args:
+            text: The query text to embed
+
+        Returns:
+            1-D float32 embedding vector for the query
+        """
+        if self.cache is not None:
+            cached = await self.cache.aget(text)
+            if cached is not None:
+                return cached
+        if self._worker is None:
+            await self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        vector = await future
+        if self.cache is not None:
+            await self.cache.aset(text, vector)
+        return vector
+
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed a list of queries directly, bypassing the batching window.
+
+        Cached queries are served from the cache; the rest are embedded in chunks of
+        at most max_batch_size rows.
+
+        Args:
+            texts: The query texts to embed
+
+        Returns:
+            float32 array with one row per input text, in input order
+        """
+        vectors = [await self.cache.aget(text) if self.cache is not None else None for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        loop = asyncio.get_running_loop()
+        for start in range(0, len(missing), self.max_batch_size):
+            chunk = missing[start:start + self.max_batch_size]
+            EMBEDDING_BATCH_SIZE.observe(len(chunk))
+            embedded = await loop.run_in_executor(
+                None, self.embedding_service.embed_batch, [texts[i] for i in chunk]
+            )
+            for i, vector in zip(chunk, embedded):
+                vectors[i] = vector
+                if self.cache is not None:
+                    await self.cache.aset(texts[i], vector)
+        return np.stack(vectors) if vectors else np.empty((0, 0), dtype=np.float32)
+
+    async def _run(self):
+        """Form batches from the queue and run them one at a time."""
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.window
+                while len(batch) < self.max_batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._process(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # Queries taken off the queue, still being collected or embedded
+            self._fail(batch)
+            raise
+
+    async def _process(self, batch: List[Tuple[str, asyncio.Future]]):
+        """Run one padded forward pass and hand each caller its own row."""
+        texts = [text for text, _ in batch]
+        EMBEDDING_BATCH_SIZE.observe(len(texts))
+        try:
+            vectors = await asyncio.get_running_loop().run_in_executor(
+                None, self.embedding_service.embed_batch, texts
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+
+embedding_batcher = EmbeddingBatcher(EmbeddingService(), cache=EmbeddingCache())
@@ -0,0 +1,109 @@
+"""Cache of query embeddings keyed on normalized query text, model name and backend."""
+import asyncio
+import os
+import sys
+from typing import Any, Dict, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from config.config import settings
+from query.utils.cache import TTLLRUCache, SQLiteStore
+from query.utils.helpers import normalize_query
+from query.utils.metrics import CACHE_LOOKUPS
+
+class EmbeddingCache:
+    """In-process LRU/TTL cache of query vectors with an optional shared SQLite backend."""
+
+    def __init__(self, max_size: int = None, ttl_seconds: float = None, shared_path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of vectors kept in process
+            ttl_seconds: Lifetime of a cached vector in seconds
+            shared_path: SQLite file shared between workers (None disables the shared backend)
+        """
+        self.model_name = settings.embedding_model_name
+        self.backend_name = settings.embedding_backend
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.embedding_cache_ttl_seconds
+        self.memory = TTLLRUCache(
+            max_size if max_size is not None else settings.embedding_cache_size,
+            ttl_seconds,
+        )
+        shared_path = shared_path or settings.embedding_cache_path
+        self.shared = SQLiteStore(
+            shared_path, "query_embeddings", ttl_seconds, settings.embedding_cache_shared_size
+        ) if shared_path else None
+        self.shared_hits = 0
+
+    def _key(self, text: str) -> str:
+        """Build the cache key from the model, the backend and the normalized query."""
+        # Quantized backends drift slightly, so their vectors are not interchangeable
+        return f"{self.model_name}\x00{self.backend_name}\x00{normalize_query(text)}"
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Look up the vector for a query.
+
+        Args:
+            text: Raw query text
+
+        Returns:
+            Cached read-only float32 vector, or None on a miss
+        """
+        key = self._key(text)
+        vector = self.memory.get(key)
+        if vector is not None or self.shared is None:
+            return self._memory_result(vector)
+        return self._shared_result(key, self.shared.get(key))
+
+    async def aget(self, text: str) -> Optional[np.ndarray]:
+        """Async variant of `get` that reads the shared backend off the event loop."""
+        key = self._key(text)
+        vector = self.memory.get(key)
+        if vector is not None or self.shared is None:
+            return self._memory_result(vector)
+        blob = await asyncio.get_running_loop().run_in_executor(None, self.shared.get, key)
+        return self._shared_result(key, blob)
+
+    @staticmethod
+    def _memory_result(vector: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """Count an in-process lookup when there is no shared backend to fall back to."""
+        CACHE_LOOKUPS.labels("embedding", "miss" if vector is None else "hit").inc()
+        return vector
+
+    def _shared_result(self, key: str, blob: Optional[bytes]) -> Optional[np.ndarray]:
+        """Decode and count a shared backend lookup, keeping a hit in process."""
+        if blob is None:
+            CACHE_LOOKUPS.labels("embedding", "miss").inc()
+            return None
+        vector = np.frombuffer(blob, dtype=np.float32)
+        self.shared_hits += 1
+        CACHE_LOOKUPS.labels("embedding", "shared_hit").inc()
+        self.memory.set(key, vector)
+        return vector
+
+    def set(self, text: str, vector: np.ndarray):
+        """Store the vector for a query in process and, if configured, in the shared backend."""
+        key, vector = self._remember(text, vector)
+        if self.shared is not None:
+            self.shared.set(key, vector.tobytes())
+
+    async def aset(self, text: str, vector: np.ndarray):
+        """Async variant of `set` that writes the shared backend off the event loop."""
+        key, vector = self._remember(text, vector)
+        if self.shared is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.shared.set, key, vector.tobytes())
+
+    def _remember(self, text: str, vector: np.ndarray):
+        """Store a read-only copy of the vector in process; returns the key and the stored vector."""
+        key = self._key(text)
+        vector = np.ascontiguousarray(vector, dtype=np.float32)
+        vector.setflags(write=False)
+        self.memory.set(key, vector)
+        return key, vector
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the in-process and shared layers."""
+        stats = self.memory.stats()
+        stats["shared_hits"] = self.shared_hits
+        return stats
@@ -0,0 +1,269 @@
+"""Versioned, content-addressed on-disk store of catalog embeddings."""
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from config.config import settings
+from query.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+CURRENT_FILE = "CURRENT"
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.json"
+PAYLOADS_PART_FILE = "payloads.jsonl"
+
+def ingestion_embedder(normalize: bool = None) -> str:
+    """
+    Identity of the embedder that writes the stored vectors.
+
+    Ingestion embeds with llama_index's HuggingFaceEmbedding, which pools as the model's
+    sentence-transformers config says; its normalize flag is the one setting it takes.
+
+    Args:
+        normalize: Whether ingestion normalizes its vectors (defaults to settings.embedding_normalize)
+    """
+    normalize = settings.embedding_normalize if normalize is None else normalize
+    return f"huggingface-{'normalized' if normalize else 'raw'}"
+
+def text_hash(text: str) -> str:
+    """Content address of an embedded text."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+class EmbeddingGeneration:
+    """
+    One immutable generation of the store, memory-mapped read-only.
+
+    Row i of `vectors` is the L2-normalized embedding of point `ids[i]`, whose text
+    hashes to `hashes[i]` and whose Qdrant payload is `payloads[i]`.
+    """
+
+    def __init__(self, path: str):
+        """
+        Map a generation directory.
+
+        Args:
+            path: Directory holding vectors.f32 and index.json
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, INDEX_FILE), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.model_name = index["model_name"]
+        self.embedder = index.get("embedder")
+        self.dimension = index["dimension"]
+        self.created_at = index["created_at"]
+        self.collection = index.get("collection")
+        self.collection_version = index.get("collection_version")
+        self.ids = index["ids"]
+        self.hashes = index["hashes"]
+        self.payloads = index["payloads"]
+        if self.ids:
+            self.vectors = np.memmap(
+                os.path.join(path, VECTORS_FILE), dtype=np.float32, mode="r", shape=(len(self.ids), self.dimension)
+            )
+        else:
+            self.vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        self._row_by_hash = {}
+        for row, content_hash in enumerate(self.hashes):
+            self._row_by_hash.setdefault(content_hash, row)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def vector_for(self, content_hash: str) -> Optional[np.ndarray]:
+        """Return the stored vector of a text hash, or None if the text was never embedded."""
+        row = self._row_by_hash.get(content_hash)
+        return None if row is None else self.vectors[row]
+
+class EmbeddingStore:
+    """
+    Content-addressed embedding store of one Qdrant collection, versioned by embedding
+    model and the embedder that wrote the vectors.
+
+    Each (collection, model, embedder) triple gets its own namespace directory holding immutable
+    generations; a CURRENT file names the live one and is swapped atomically, so
+    readers never see a half-written generation. Ingestion reuses the vectors of
+    texts it has embedded before and writes a new generation per run; query nodes
+    map the current generation zero-copy instead of scrolling Qdrant.
+    """
+
+    def __init__(self, root: str = None, model_name: str = None, embedder: str = None, collection: str = None):
+        """
+        Initialize the store.
+
+        Args:
+            root: Store directory (defaults to settings.embedding_store_dir)
+            model_name: Embedding model (defaults to settings.embedding_model_name)
+            embedder: Identity of the embedder writing the vectors (defaults to `ingestion_embedder()`)
+            collection: Qdrant collection the vectors belong to (defaults to settings.qdrant_collection_name)
+        """
+        self.root = root or settings.embedding_store_dir
+        self.model_name = model_name or settings.embedding_model_name
+        self.embedder = embedder or ingestion_embedder()
+        self.collection = collection or settings.qdrant_collection_name
+        namespace = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{self.collection}__{self.model_name}__{self.embedder}")
+        self.path = os.path.join(self.root, namespace)
+
+    def current_name(self) -> Optional[str]:
+        """Name of the live generation, or None if nothing was written yet."""
+        try:
+            with open(os.path.join(self.path, CURRENT_FILE), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current(self) -> Optional[EmbeddingGeneration]:
+        """Map the live generation, or return None if there is none."""
+        name = self.current_name()
+        if name is None:
+            return None
+        generation = EmbeddingGeneration(os.path.join(self.path, name))
+        if (generation.model_name, generation.embedder, generation.collection) != (
+                self.model_name, self.embedder, self.collection):
+            logger.warning("embedding store generation does not match the model or collection", extra={"fields": {
+                "generation": name, "model": generation.model_name, "embedder": generation.embedder,
+                "collection": generation.collection,
+            }})
+            return None
+        return generation
+
+    def writer(self) -> "GenerationWriter":
+        """Start a new generation that is filled incrementally and published by `commit`."""
+        return GenerationWriter(self)
+
+    def write(self, ids: List[str], hashes: List[str], payloads: List[Dict[str, Any]], vectors,
+              collection_version: str = None) -> str:
+        """
+        Write a new generation and make it current.
+
+        Args:
+            ids: Point id per row
+            hashes: Content hash of each row's embedded text
+            payloads: Qdrant payload per row
+            vectors: Embeddings, one row per id; stored L2-normalized as float32
+            collection_version: Qdrant collection version the generation matches
+
+        Returns:
+            Name of the new generation
+        """
+        writer = self.writer()
+        writer.append(ids, hashes, payloads, vectors)
+        return writer.commit(collection_version)
+
+    def publish(self, name: str):
+        """Atomically point CURRENT at a generation and prune older ones."""
+        current_temp = os.path.join(self.path, f"{CURRENT_FILE}.tmp")
+        with open(current_temp, "w", encoding="utf-8") as f:
+            f.write(name)
+        os.replace(current_temp, os.path.join(self.path, CURRENT_FILE))
+        self.prune()
+
+    def prune(self, keep: int = None):
+        """Delete all but the newest `keep` generations (the current one is always kept)."""
+        keep = keep if keep is not None else settings.embedding_store_keep_generations
+        current = self.current_name()
+        generations = sorted(
+            (entry for entry in os.listdir(self.path) if entry.startswith("gen-") and not entry.endswith(".tmp")),
+            key=lambda entry: os.path.getmtime(os.path.join(self.path, entry)),
+            reverse=True,
+        )
+        for entry in generations[max(keep, 1):]:
+            if entry != current:
+                # Readers that still map an old generation keep their open file on POSIX
+                shutil.rmtree(os.path.join(self.path, entry), ignore_errors=True)
+
+class GenerationWriter:
+    """
+    Build a generation on disk batch by batch.
+
+    Vectors and payloads are appended to files in a temporary directory as they come,
+    so only ids and hashes stay in memory; `commit` renames the directory into place
+    and makes it current, `abort` discards it.
+    """
+
+    def __init__(self, store: EmbeddingStore):
+        """
+        Create the temporary generation directory.
+
+        Args:
+            store: Store the generation belongs to
+        """
+        self.store = store
+        self.name = f"gen-{int(time.time())}-{uuid.uuid4().hex[:8]}"
+        self.temp_path = os.path.join(store.path, f"{self.name}.tmp")
+        os.makedirs(self.temp_path)
+        self.ids = []
+        self.hashes = []
+        self.dimension = None
+        self._vectors = open(os.path.join(self.temp_path, VECTORS_FILE), "wb")
+        self._payloads = open(os.path.join(self.temp_path, PAYLOADS_PART_FILE), "w", encoding="utf-8")
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, ids: List[str], hashes: List[str], payloads: List[Dict[str, Any]], vectors):
+        """Append rows; vectors are stored L2-normalized as float32."""
+        if not ids:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        if self.dimension is None:
+            self.dimension = int(matrix.shape[1])
+        elif matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected {self.dimension}-dimensional vectors, got {matrix.shape[1]}")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        np.ascontiguousarray(matrix / norms).tofile(self._vectors)
+        for payload in payloads:
+            self._payloads.write(json.dumps(payload) + "\n")
+        self.ids.extend(ids)
+        self.hashes.extend(hashes)
+
+    def commit(self, collection_version: str = None) -> str:
+        """
+        Publish the generation and make it current.
+
+        Args:
+            collection_version: Qdrant collection version the generation matches
+
+        Returns:
+            Name of the new generation
+        """
+        self._vectors.close()
+        self._payloads.close()
+        header = json.dumps({
+            "model_name": self.store.model_name,
+            "embedder": self.store.embedder,
+            "collection": self.store.collection,
+            "dimension": self.dimension or 0,
+            "created_at": time.time(),
+            "collection_version": collection_version,
+            "ids": self.ids,
+            "hashes": self.hashes,
+        })
+        # Stream the payloads into the index rather than loading them back
+        part_path = os.path.join(self.temp_path, PAYLOADS_PART_FILE)
+        with open(os.path.join(self.temp_path, INDEX_FILE), "w", encoding="utf-8") as f, \
+                open(part_path, "r", encoding="utf-8") as part:
+            f.write(header[:-1] + ', "payloads": [')
+            for row, line in enumerate(part):
+                f.write(("," if row else "") + line.rstrip("\n"))
+            f.write("]}")
+        os.remove(part_path)
+        final_path = os.path.join(self.store.path, self.name)
+        os.replace(self.temp_path, final_path)
+        self.store.publish(self.name)
+        return self.name
+
+    def abort(self):
+        """Discard the unpublished generation."""
+        self._vectors.close()
+        self._payloads.close()
+        shutil.rmtree(self.temp_path, ignore_errors=True)
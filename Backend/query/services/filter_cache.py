@@ -0,0 +1,93 @@
+"""Persistent cache of LLM-extracted query filters."""
+import asyncio
+import json
+import os
+import sys
+from typing import Any, Dict, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.config import settings
+from query.utils.cache import TTLLRUCache, SQLiteStore
+from query.utils.helpers import normalize_query
+from query.utils.metrics import CACHE_LOOKUPS
+
+class FilterCache:
+    """Cache extracted filter dicts in SQLite so they survive restarts, with an in-process front."""
+
+    def __init__(self, path: str = None, ttl_seconds: float = None, max_entries: int = None):
+        """
+        Initialize the cache.
+
+        Args:
+            path: SQLite file holding the cached filters
+            ttl_seconds: Lifetime of a cached extraction in seconds
+            max_entries: Hard bound on the number of cached extractions
+        """
+        ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.filter_cache_ttl_seconds
+        max_entries = max_entries or settings.filter_cache_max_entries
+        self.memory = TTLLRUCache(min(max_entries, settings.filter_cache_memory_size), ttl_seconds)
+        self.store = SQLiteStore(path or settings.filter_cache_path, "query_filters", ttl_seconds, max_entries)
+        self.store_hits = 0
+
+    @staticmethod
+    def _key(query: str, prompt_version: str) -> str:
+        """Build the cache key from the prompt version, LLM model and normalized query."""
+        return f"{prompt_version}\x00{settings.llm_model_name}\x00{normalize_query(query)}"
+
+    def get(self, query: str, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the filters previously extracted for a query.
+
+        Args:
+            query: Raw query text
+            prompt_version: Version of the extraction prompt that produced the filters
+
+        Returns:
+            Copy of the cached filter dict, or None on a miss
+        """
+        key = self._key(query, prompt_version)
+        filters = self.memory.get(key)
+        if filters is not None:
+            CACHE_LOOKUPS.labels("filter", "hit").inc()
+            return dict(filters)
+        return self._store_result(key, self.store.get(key))
+
+    async def aget(self, query: str, prompt_version: str) -> Optional[Dict[str, Any]]:
+        """Async variant of `get` that reads SQLite off the event loop."""
+        key = self._key(query, prompt_version)
+        filters = self.memory.get(key)
+        if filters is not None:
+            CACHE_LOOKUPS.labels("filter", "hit").inc()
+            return dict(filters)
+        blob = await asyncio.get_running_loop().run_in_executor(None, self.store.get, key)
+        return self._store_result(key, blob)
+
+    def _store_result(self, key: str, blob: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Decode and count a SQLite lookup, keeping a hit in process."""
+        if blob is None:
+            CACHE_LOOKUPS.labels("filter", "miss").inc()
+            return None
+        filters = json.loads(blob)
+        self.store_hits += 1
+        self.memory.set(key, filters)
+        CACHE_LOOKUPS.labels("filter", "shared_hit").inc()
+        return dict(filters)
+
+    def set(self, query: str, prompt_version: str, filters: Dict[str, Any]):
+        """Store the filters extracted for a query."""
+        key = self._key(query, prompt_version)
+        self.memory.set(key, dict(filters))
+        self.store.set(key, json.dumps(filters))
+
+    async def aset(self, query: str, prompt_version: str, filters: Dict[str, Any]):
+        """Async variant of `set` that writes SQLite off the event loop."""
+        key = self._key(query, prompt_version)
+        self.memory.set(key, dict(filters))
+        await asyncio.get_running_loop().run_in_executor(None, self.store.set, key, json.dumps(filters))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the in-process and persistent layers."""
+        stats = self.memory.stats()
+        stats["store_hits"] = self.store_hits
+        return stats
+
+filter_cache = FilterCache()
@@ -0,0 +1,104 @@
+"""Background warm-up of the heavy query services and the readiness state it reports."""
+import asyncio
+import importlib
+import os
+import sys
+import time
+from typing import Any, Dict
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.config import settings
+from query.services.model_registry import model_registry
+from query.services.embedding_batcher import embedding_batcher
+from query.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+class ServiceLifecycle:
+    """
+    Bring the service from "process started" to "ready to answer queries".
+
+    Only light modules are imported when the app starts, so /health answers at once.
+    The search stack (llama_index, qdrant_client, groq and the recommendation service
+    built on them), the embedding model and the optional local index are loaded here,
+    step by step, with each step timed.
+    """
+
+    def __init__(self):
+        """Initialize the not-yet-ready state."""
+        self.ready = False
+        self.stage = "starting"
+        self.error = None
+        # Optional steps that failed without failing the warm-up, with their errors
+        self.degraded = {}
+        self.timings = {}
+        self.started_at = time.perf_counter()
+        self.ready_seconds = None
+        self._task = None
+        self._refresh_task = None
+
+    def start(self):
+        """Schedule the warm-up on the running event loop and return immediately."""
+        self._task = asyncio.create_task(self.warm_up())
+        return self._task
+
+    async def warm_up(self):
+        """Import the search stack, load the model and start the batcher (and local index)."""
+        loop = asyncio.get_running_loop()
+        try:
+            await self._step("imports", loop.run_in_executor(
+                None, importlib.import_module, "query.services.recommender"
+            ))
+            await self._step("model", loop.run_in_executor(None, model_registry.load))
+            await self._step("batcher", embedding_batcher.start())
+            if settings.local_index_enabled:
+                from query.services.local_index import local_index
+                from query.services.vector_store import VectorStoreService
+                client = VectorStoreService().client
+                try:
+                    await self._step("local_index", loop.run_in_executor(None, local_index.load, client))
+                except Exception as e:
+                    # Searches go to Qdrant until the refresh loop manages to load the index
+                    self.degraded["local_index"] = repr(e)
+                    logger.warning("local index unavailable, searching qdrant", extra={"fields": {"error": repr(e)}})
+                self._refresh_task = asyncio.create_task(local_index.run_refresh_loop(client))
+            self.ready_seconds = time.perf_counter() - self.started_at
+            self.ready = True
+            self.stage = "ready"
+            logger.info("service ready", extra={"fields": {
+                "ready_seconds": round(self.ready_seconds, 3), "timings_seconds": self.timings,
+            }})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = f"{self.stage}: {e}"
+            logger.error("warm-up failed", extra={"fields": {"stage": self.stage, "error": repr(e)}})
+            self.stage = "failed"
+
+    async def _step(self, name: str, awaitable):
+        """Run one warm-up step and record its duration in seconds."""
+        self.stage = name
+        start = time.perf_counter()
+        await awaitable
+        self.timings[name] = round(time.perf_counter() - start, 3)
+
+    async def stop(self):
+        """Cancel any pending warm-up or refresh work and stop the batcher."""
+        for task in (self._task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+        await embedding_batcher.stop()
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness details for the /ready endpoint."""
+        return {
+            "ready": self.ready,
+            "stage": self.stage,
+            "error": self.error,
+            "degraded": self.degraded,
+            "model_ready": model_registry.ready,
+            "uptime_seconds": round(time.perf_counter() - self.started_at, 3),
+            "ready_seconds": round(self.ready_seconds, 3) if self.ready_seconds is not None else None,
+            "timings_seconds": self.timings,
+        }
+
+lifecycle = ServiceLifecycle()
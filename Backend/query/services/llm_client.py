@@ -0,0 +1,189 @@
+"""Process-wide Groq client with connection pooling, deadlines, hedging and a circuit breaker."""
+import asyncio
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import groq
+import httpx
+from config.config import settings
+from query.utils.circuit_breaker import CircuitBreaker
+from query.utils.metrics import LLM_CALLS, LLM_HEDGES
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when the circuit breaker is open and the LLM call is skipped."""
+
+class LLMClient:
+    """
+    Shared sync and async chat-completion clients.
+
+    Both clients keep pooled keep-alive connections, never retry on their own and give
+    every call `llm_timeout_seconds` end to end. Async calls can be hedged: if the first
+    request has not answered after `llm_hedge_delay_ms`, a second identical request is
+    sent and whichever finishes first wins. A circuit breaker skips calls while the
+    upstream keeps failing or answering slowly.
+    """
+
+    def __init__(self):
+        """Initialize; the underlying clients are created on first use."""
+        self.model = settings.llm_model_name
+        self.timeout_seconds = settings.llm_timeout_seconds
+        self.hedge_delay_seconds = settings.llm_hedge_delay_ms / 1000
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.llm_breaker_failure_threshold,
+            recovery_seconds=settings.llm_breaker_recovery_seconds,
+            slow_call_seconds=settings.llm_breaker_slow_call_seconds,
+        )
+        self.calls = 0
+        self.hedged_calls = 0
+        self.hedge_wins = 0
+        self._client = None
+        self._async_client = None
+
+    def _limits(self) -> httpx.Limits:
+        """Connection pool limits shared by both clients."""
+        return httpx.Limits(
+            max_connections=settings.llm_max_connections,
+            max_keepalive_connections=settings.llm_max_connections,
+            keepalive_expiry=60,
+        )
+
+    @property
+    def client(self) -> groq.Client:
+        """Pooled sync Groq client."""
+        if self._client is None:
+            self._client = groq.Client(
+                api_key=settings.groq_api_key,
+                base_url=settings.groq_base_url,
+                timeout=self.timeout_seconds,
+                max_retries=0,
+                http_client=groq.DefaultHttpxClient(limits=self._limits(), timeout=self.timeout_seconds),
+            )
+        return self._client
+
+    @property
+    def async_client(self) -> groq.AsyncClient:
+        """Pooled async Groq client."""
+        if self._async_client is None:
+            self._async_client = groq.AsyncClient(
+                api_key=settings.groq_api_key,
+                base_url=settings.groq_base_url,
+                timeout=self.timeout_seconds,
+                max_retries=0,
+                http_client=groq.DefaultAsyncHttpxClient(limits=self._limits(), timeout=self.timeout_seconds),
+            )
+        return self._async_client
+
+    def complete(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+        """
+        Run a chat completion synchronously.
+
+        Args:
+            messages: Chat messages
+            **kwargs: Extra completion parameters (e.g. temperature)
+
+        Returns:
+            The reply text
+
+        Raises:
+            LLMUnavailableError: If the circuit breaker is open
+        """
+        if not self.breaker.allow():
+            LLM_CALLS.labels("rejected").inc()
+            raise LLMUnavailableError("LLM circuit breaker is open")
+        self.calls += 1
+        start = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+        except Exception as e:
+            self.breaker.record_failure()
+            LLM_CALLS.labels("timeout" if isinstance(e, groq.APITimeoutError) else "error").inc()
+            raise
+        else:
+            self.breaker.record_success(time.perf_counter() - start)
+        finally:
+            # A call interrupted without an outcome must not keep the half-open trial slot
+            self.breaker.release_trial()
+        LLM_CALLS.labels("success").inc()
+        return response.choices[0].message.content
+
+    async def acomplete(self, messages: List[Dict[str, str]], **kwargs: Any) -> str:
+        """
+        Run a chat completion without blocking the event loop, hedged if configured.
+
+        Args:
+            messages: Chat messages
+            **kwargs: Extra completion parameters (e.g. temperature)
+
+        Returns:
+            The reply text
+
+        Raises:
+            LLMUnavailableError: If the circuit breaker is open
+            asyncio.TimeoutError: If no attempt answered within the deadline
+        """
+        if not self.breaker.allow():
+            LLM_CALLS.labels("rejected").inc()
+            raise LLMUnavailableError("LLM circuit breaker is open")
+        self.calls += 1
+        start = time.perf_counter()
+        try:
+            content = await asyncio.wait_for(self._hedged(messages, kwargs), timeout=self.timeout_seconds)
+        except Exception as e:
+            self.breaker.record_failure()
+            timed_out = isinstance(e, (asyncio.TimeoutError, groq.APITimeoutError))
+            LLM_CALLS.labels("timeout" if timed_out else "error").inc()
+            raise
+        else:
+            self.breaker.record_success(time.perf_counter() - start)
+        finally:
+            # Cancellation (a semantic cache hit or a closed stream cancels the extraction)
+            # is neither a success nor a failure, but must not keep the half-open trial slot
+            self.breaker.release_trial()
+        LLM_CALLS.labels("success").inc()
+        return content
+
+    async def _hedged(self, messages: List[Dict[str, str]], kwargs: Dict[str, Any]) -> str:
+        """Send the request, plus one hedge if the first is still pending after the hedge delay."""
+        async def attempt():
+            response = await self.async_client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+            return response.choices[0].message.content
+
+        primary = asyncio.ensure_future(attempt())
+        if not self.hedge_delay_seconds:
+            return await primary
+        attempts = [primary]
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=self.hedge_delay_seconds)
+            if not done:
+                self.hedged_calls += 1
+                attempts.append(asyncio.ensure_future(attempt()))
+            last_error = None
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    if finished.exception() is None:
+                        if finished is not primary:
+                            self.hedge_wins += 1
+                        if len(attempts) > 1:
+                            LLM_HEDGES.labels("primary" if finished is primary else "hedge").inc()
+                        return finished.result()
+                    last_error = finished.exception()
+            raise last_error
+        finally:
+            for pending_attempt in attempts:
+                if not pending_attempt.done():
+                    pending_attempt.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return call, hedging and circuit breaker counters."""
+        return {
+            "calls": self.calls,
+            "hedged_calls": self.hedged_calls,
+            "hedge_wins": self.hedge_wins,
+            "breaker": self.breaker.stats(),
+        }
+
+llm_client = LLMClient()
@@ -0,0 +1,270 @@
+"""In-process exact vector index serving searches without a Qdrant round trip."""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores.types import MetadataFilters, VectorStoreQueryResult
+from llama_index.core.vector_stores.utils import metadata_dict_to_node, legacy_metadata_dict_to_node
+from config.config import settings
+from query.services.embedding_store import EmbeddingStore
+from query.services.metadata_index import MetadataIndex
+from query.services.vector_store import read_collection_version
+from query.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+class LocalVectorIndex:
+    """Hold every catalog vector in a normalized NumPy matrix and answer top-k exactly."""
+
+    def __init__(self):
+        """Initialize an empty index; call `load` before searching."""
+        self.matrix = None
+        self.ids = []
+        self.payloads = []
+        self.nodes = []
+        self.metadata_index = None
+        self.source = None
+        self.source_stamp = None
+        self.loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the index holds data and can answer searches."""
+        return self.matrix is not None
+
+    def load(self, client=None, snapshot_path: Optional[str] = None):
+        """
+        Load the index from the embedding store or a local snapshot if either exists,
+        otherwise from Qdrant.
+
+        Args:
+            client: Sync Qdrant client used when no local copy is available
+            snapshot_path: Path of the .npz snapshot (defaults to settings.local_index_snapshot_path)
+        """
+        snapshot_path = snapshot_path or settings.local_index_snapshot_path
+        if settings.embedding_store_enabled and self.load_embedding_store(client):
+            return
+        if snapshot_path and os.path.exists(snapshot_path):
+            self.load_snapshot(snapshot_path)
+        else:
+            self.load_from_qdrant(client)
+            if snapshot_path:
+                self.save_snapshot(snapshot_path)
+
+    def load_from_qdrant(self, client, collection_name: Optional[str] = None):
+        """Scroll every point with its vector and payload out of the collection."""
+        collection_name = collection_name or settings.qdrant_collection_name
+        ids, vectors, payloads = [], [], []
+        offset = None
+        while True:
+            points, offset = client.scroll(
+                collection_name=collection_name,
+                limit=settings.local_index_scroll_batch_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            )
+            for point in points:
+                vector = point.vector
+                if isinstance(vector, dict):
+                    vector = next(iter(vector.values()))
+                ids.append(str(point.id))
+                vectors.append(vector)
+                payloads.append(point.payload or {})
+            if offset is None:
+                break
+        self._build(ids, np.asarray(vectors, dtype=np.float32), payloads,
+                    "qdrant", self._qdrant_stamp(client, collection_name))
+
+    def load_embedding_store(self, client, store: Optional[EmbeddingStore] = None) -> bool:
+        """
+        Map the current embedding store generation; its vectors are used zero-copy.
+
+        The generation is only used if it was written for the collection version Qdrant
+        currently holds, so a store left behind by another ingestion is never served.
+
+        Args:
+            client: Sync Qdrant client the collection version is read from
+            store: Store to map (defaults to the configured collection, model and embedder)
+
+        Returns:
+            False if the store has no generation matching the model and collection version
+        """
+        generation = (store or EmbeddingStore()).current()
+        if generation is None or len(generation) == 0 or client is None:
+            return False
+        version = read_collection_version(client, generation.collection)
+        if version is None or generation.collection_version != version:
+            logger.info("embedding store generation does not match the collection", extra={"fields": {
+                "generation": generation.name, "generation_version": generation.collection_version,
+                "collection_version": version,
+            }})
+            return False
+        self._build(generation.ids, generation.vectors, generation.payloads,
+                    "embedding_store", (generation.name, version), normalized=True)
+        return True
+
+    def load_snapshot(self, path: str):
+        """Load vectors, ids and payloads from an .npz snapshot."""
+        with np.load(path, allow_pickle=False) as snapshot:
+            vectors = snapshot["vectors"]
+            ids = [str(i) for i in snapshot["ids"]]
+            payloads = json.loads(str(snapshot["payloads"]))
+        self._build(ids, vectors, payloads, "snapshot", os.path.getmtime(path))
+
+    def save_snapshot(self, path: str):
+        """Write the current vectors, ids and payloads to an .npz snapshot."""
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            vectors=self.matrix,
+            ids=np.asarray(self.ids),
+            payloads=np.asarray(json.dumps(self.payloads)),
+        )
+        os.replace(tmp_path, path)
+
+    def refresh_if_changed(self, client=None, snapshot_path: Optional[str] = None) -> bool:
+        """
+        Reload the index if its source changed since the last load.
+
+        Returns:
+            True if the index was reloaded
+        """
+        snapshot_path = snapshot_path or settings.local_index_snapshot_path
+        if self.source == "embedding_store" and client is not None:
+            stamp = (EmbeddingStore().current_name(), read_collection_version(client, settings.qdrant_collection_name))
+            if stamp == self.source_stamp:
+                return False
+            if self.load_embedding_store(client):
+                return True
+            # The collection moved on without a matching generation: serve what Qdrant holds
+            self.load_from_qdrant(client)
+            if snapshot_path:
+                self.save_snapshot(snapshot_path)
+            return True
+        if self.source == "snapshot" and snapshot_path and os.path.exists(snapshot_path):
+            if os.path.getmtime(snapshot_path) == self.source_stamp:
+                return False
+            self.load_snapshot(snapshot_path)
+            return True
+        if client is None:
+            return False
+        if self._qdrant_stamp(client, settings.qdrant_collection_name) == self.source_stamp:
+            return False
+        if settings.embedding_store_enabled and self.load_embedding_store(client):
+            return True
+        self.load_from_qdrant(client)
+        if snapshot_path:
+            self.save_snapshot(snapshot_path)
+        return True
+
+    async def run_refresh_loop(self, client, interval_seconds: float = None):
+        """Poll for source changes forever, reloading off the event loop."""
+        interval_seconds = interval_seconds or settings.local_index_refresh_seconds
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await loop.run_in_executor(None, self.refresh_if_changed, client)
+            except Exception as e:
+                logger.warning("local index refresh failed", extra={"fields": {"error": repr(e)}})
+
+    @staticmethod
+    def _qdrant_stamp(client, collection_name: str):
+        """Cheap fingerprint of the collection: the ingestion version stamp plus the point count."""
+        info = client.get_collection(collection_name)
+        return read_collection_version(client, collection_name), info.points_count
+
+    def _build(self, ids: List[str], vectors: np.ndarray, payloads: List[Dict[str, Any]], source: str, stamp,
+               normalized: bool = False):
+        """
+        Normalize the vectors into a contiguous matrix and swap it in atomically.
+
+        Already normalized float32 rows (such as a memory-mapped embedding store
+        generation) are used as they are, without a copy.
+        """
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2:
+            matrix = matrix.reshape(len(ids), -1)
+        if not normalized:
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            matrix = matrix / norms
+        nodes = [self._payload_to_node(point_id, payload) for point_id, payload in zip(ids, payloads)]
+        metadata_index = MetadataIndex([node.metadata for node in nodes])
+        for node, parsed in zip(nodes, metadata_index.parsed):
+            node.metadata.update(parsed)
+        with self._lock:
+            self.matrix = matrix
+            self.ids = ids
+            self.payloads = payloads
+            self.nodes = nodes
+            self.metadata_index = metadata_index
+            self.source = source
+            self.source_stamp = stamp
+            self.loaded_at = time.time()
+        logger.info("local index loaded", extra={"fields": {"vectors": len(ids), "source": source}})
+
+    @staticmethod
+    def _payload_to_node(point_id: str, payload: Dict[str, Any]) -> TextNode:
+        """Rebuild the LlamaIndex node stored in a Qdrant payload."""
+        try:
+            return metadata_dict_to_node(payload)
+        except Exception:
+            metadata, node_info, relationships = legacy_metadata_dict_to_node(payload)
+            return TextNode(
+                id_=point_id,
+                text=payload.get("text", ""),
+                metadata=metadata,
+                relationships=relationships,
+            )
+
+    def search(self, embedding, filters: Optional[MetadataFilters] = None, top_k: int = None) -> VectorStoreQueryResult:
+        """
+        Exact cosine top-k search over the rows that pass the filters.
+
+        Args:
+            embedding: Query embedding
+            filters: Optional metadata filters
+            top_k: Number of results to return (defaults to settings.top_k)
+
+        Returns:
+            VectorStoreQueryResult with nodes, similarities and ids, best first
+        """
+        top_k = top_k or settings.top_k
+        with self._lock:
+            matrix, ids, nodes = self.matrix, self.ids, self.nodes
+            metadata_index = self.metadata_index
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        if filters is not None and filters.filters:
+            # Pre-filter on the metadata indexes so only eligible rows are scored
+            candidates = metadata_index.rows(metadata_index.evaluate(filters))
+            scores = matrix[candidates] @ query
+        else:
+            candidates = None
+            scores = matrix @ query
+
+        k = min(top_k, scores.shape[0])
+        if k == 0:
+            return VectorStoreQueryResult(nodes=[], similarities=[], ids=[])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = candidates[top] if candidates is not None else top
+        return VectorStoreQueryResult(
+            nodes=[nodes[row] for row in rows],
+            similarities=scores[top].tolist(),
+            ids=[ids[row] for row in rows],
+        )
+
+local_index = LocalVectorIndex()
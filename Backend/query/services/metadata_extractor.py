@@ -1,22 +1,31 @@
 """LLM-based metadata extraction from natural language queries."""
 import json
 import re
-import groq
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.config import settings
+from query.services.filter_cache import filter_cache
+from query.services.llm_client import llm_client
+from query.services.rule_extractor import rule_extractor
+from query.utils.log import get_logger
+from query.utils.vocabulary import ASSESSMENT_TYPES
+
+logger = get_logger(__name__)
 
 class LLMMetadataExtractor:
     """Extract metadata filters from queries using LLM."""
-    
+
+    # Bump whenever the prompt below changes so cached extractions are not reused
+    PROMPT_VERSION = "2"
+
     def __init__(self):
-        """Initialize with a Groq client."""
-        self.groq_client = groq.Client(api_key=settings.groq_api_key)
-            
+        """Initialize with the process-wide pooled LLM client."""
+        self.llm_client = llm_client
+
     def extract_metadata(self, query: str) -> dict:
         """
-        Extract metadata from query using LLM.
+        Extract metadata from query.
         
         Args:
             query: The natural language query to extract metadata from
@@ -24,6 +33,58 @@ class LLMMetadataExtractor:
         Returns:
             Dictionary of extracted metadata fields
         """
+        return self.extract_filters(query)[0]
+
+    def extract_filters(self, query: str) -> tuple:
+        """
+        Extract metadata from query, trying rules first, then the filter cache, then the LLM.
+
+        Args:
+            query: The natural language query to extract metadata from
+
+        Returns:
+            Tuple of (dictionary of extracted metadata fields, source) where source is one of
+            "rules", "cache", "llm" or "rules_fallback" (LLM unavailable, low-confidence rules used)
+        """
+        rule_filters, confidence = rule_extractor.extract(query)
+        if confidence >= settings.rule_extractor_min_confidence:
+            return rule_filters, "rules"
+        cached = filter_cache.get(query, self.PROMPT_VERSION)
+        if cached is not None:
+            return cached, "cache"
+        extracted = self._extract_with_llm(query)
+        if not isinstance(extracted, dict):
+            return rule_filters, "rules_fallback"
+        extracted = rule_extractor.canonicalize(extracted)
+        filter_cache.set(query, self.PROMPT_VERSION, extracted)
+        return extracted, "llm"
+
+    async def aextract_filters(self, query: str) -> tuple:
+        """
+        Async variant of `extract_filters` that awaits the LLM instead of blocking the event loop.
+
+        Args:
+            query: The natural language query to extract metadata from
+
+        Returns:
+            Tuple of (dictionary of extracted metadata fields, source)
+        """
+        rule_filters, confidence = rule_extractor.extract(query)
+        if confidence >= settings.rule_extractor_min_confidence:
+            return rule_filters, "rules"
+        cached = await filter_cache.aget(query, self.PROMPT_VERSION)
+        if cached is not None:
+            return cached, "cache"
+        extracted = await self._aextract_with_llm(query)
+        if not isinstance(extracted, dict):
+            return rule_filters, "rules_fallback"
+        extracted = rule_extractor.canonicalize(extracted)
+        await filter_cache.aset(query, self.PROMPT_VERSION, extracted)
+        return extracted, "llm"
+
+    def _build_messages(self, query: str) -> list:
+        """Build the chat messages asking the LLM to extract filters from the query."""
+        assessment_types = ", ".join(f'"{name}"' for name in ASSESSMENT_TYPES)
         prompt = f"""
         Extract structured metadata from this assessment search query. 
         Return a JSON object with these fields ONLY IF they are explicitly mentioned or clearly implied in the query:
@@ -32,7 +93,7 @@ class LLMMetadataExtractor:
         - languages: array of language strings (e.g., ["english", "spanish"])
         - min_duration: minimum time duration in minutes (integer)
         - max_duration: maximum time duration in minutes (integer)
-        - assessment_type: type of assessment (e.g., "cognitive", "personality")
+        - assessment_type: type of assessment, one of: {assessment_types}
         - adaptive_support: boolean (0 or 1) indicating if adaptive testing is supported by the assessment
         - remote_support: boolean (0 or 1) indicating if remote support is available
         
@@ -71,32 +132,53 @@ class LLMMetadataExtractor:
         
         JSON:
         """
-        
+        return [
+            {"role": "system", "content": "You extract structured data from text with high precision. Only include fields explicitly mentioned in the query."},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _parse_result(self, result: str):
+        """Parse the LLM reply into a dict, or return None if it holds no JSON object."""
+        try:
+            return json.loads(result)
+        except json.JSONDecodeError:
+            # If JSON parsing fails, try to extract just the JSON part
+            json_match = re.search(r'\{.*\}', result, re.DOTALL)
+            if json_match:
+                try:
+                    return json.loads(json_match.group(0))
+                except:
+                    pass
+            return None
+
+    def _extract_with_llm(self, query: str):
+        """
+        Extract metadata from query using LLM.
+
+        Args:
+            query: The natural language query to extract metadata from
+
+        Returns:
+            Dictionary of extracted metadata fields, or None if the LLM call or parsing failed
+        """
         try:
-            response = self.groq_client.chat.completions.create(
-                model=settings.llm_model_name,
-                messages=[
-                    {"role": "system", "content": "You extract structured data from text with high precision. Only include fields explicitly mentioned in the query."},
-                    {"role": "user", "content": prompt}
-                ],
+            result = self.llm_client.complete(
+                self._build_messages(query),
                 temperature=0.0  # Keep deterministic
             )
-            result = response.choices[0].message.content.strip()
-            
-            # Parse the JSON result
-            try:
-                extracted = json.loads(result)
-                return extracted
-            except json.JSONDecodeError:
-                # If JSON parsing fails, try to extract just the JSON part
-                json_match = re.search(r'\{.*\}', result, re.DOTALL)
-                if json_match:
-                    try:
-                        return json.loads(json_match.group(0))
-                    except:
-                        pass
-                return {}
-                
+            return self._parse_result(result.strip())
+        except Exception as e:
+            logger.warning("llm extraction failed", extra={"fields": {"error": repr(e)}})
+            return None
+
+    async def _aextract_with_llm(self, query: str):
+        """Async variant of `_extract_with_llm`; bounded by the client's deadline and circuit breaker."""
+        try:
+            result = await self.llm_client.acomplete(
+                self._build_messages(query),
+                temperature=0.0  # Keep deterministic
+            )
+            return self._parse_result(result.strip())
         except Exception as e:
-            print(f"LLM extraction failed: {e}")
-            return {}
\ No newline at end of file
+            logger.warning("llm extraction failed", extra={"fields": {"error": repr(e)}})
+            return None
@@ -0,0 +1,161 @@
+"""Precomputed bitmap and sorted indexes over catalog metadata for pre-filtering."""
+import os
+import sys
+from typing import Any, Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from llama_index.core.vector_stores.types import MetadataFilters, MetadataFilter, FilterOperator
+from query.utils.helpers import normalize_job_level, parse_json_or_return_as_list
+
+# Fields indexed as value -> bitset over row ids
+LIST_FIELDS = ("job_levels", "languages")
+KEYWORD_FIELDS = LIST_FIELDS + ("assessment_type",)
+FLAG_FIELDS = ("adaptive_support", "remote_support")
+# Field indexed as a sorted array for range queries
+RANGE_FIELD = "duration_minutes"
+
+class MetadataIndex:
+    """Bitsets per keyword value and flag, plus a sorted duration index, over row ids."""
+
+    def __init__(self, payloads: List[Dict[str, Any]]):
+        """
+        Build the indexes.
+
+        Args:
+            payloads: Metadata dict per row; row i of the vector matrix is assessment id i
+        """
+        self.size = len(payloads)
+        self.values = {field: {} for field in KEYWORD_FIELDS + FLAG_FIELDS}
+        # List fields decoded once, so results never re-parse JSON strings
+        self.parsed = []
+        durations = np.full(self.size, np.nan)
+
+        rows = {field: {} for field in KEYWORD_FIELDS + FLAG_FIELDS}
+        for row, payload in enumerate(payloads):
+            parsed = {field: parse_json_or_return_as_list(payload.get(field)) for field in LIST_FIELDS}
+            for field in KEYWORD_FIELDS:
+                values = parsed[field] if field in parsed else [payload.get(field)]
+                for value in values:
+                    value = self._normalize(field, value)
+                    if value:
+                        rows[field].setdefault(value, []).append(row)
+            for field in FLAG_FIELDS:
+                flag = self._flag(payload.get(field))
+                if flag is not None:
+                    rows[field].setdefault(flag, []).append(row)
+            duration = payload.get(RANGE_FIELD)
+            if isinstance(duration, (int, float)) and not isinstance(duration, bool):
+                durations[row] = duration
+            self.parsed.append(parsed)
+
+        for field, by_value in rows.items():
+            for value, value_rows in by_value.items():
+                self.values[field][value] = self._bitset(value_rows)
+
+        known = np.flatnonzero(~np.isnan(durations))
+        order = known[np.argsort(durations[known], kind="stable")]
+        self.duration_rows = order
+        self.duration_sorted = durations[order]
+        self.all_rows = self._bitset(range(self.size))
+        self.no_rows = np.zeros_like(self.all_rows)
+
+    @staticmethod
+    def _normalize(field: str, value: Any) -> str:
+        """Normalize a keyword value the same way for the index and for queries."""
+        if value is None:
+            return ""
+        if field == "job_levels":
+            return normalize_job_level(str(value))
+        return str(value).strip().lower()
+
+    @staticmethod
+    def _flag(value: Any) -> Optional[bool]:
+        """Interpret stored or queried flag values (bool, 0/1, "0"/"1", "true"/"false")."""
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, (int, float)):
+            return bool(value)
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in ("1", "true", "yes"):
+                return True
+            if lowered in ("0", "false", "no"):
+                return False
+        return None
+
+    def _bitset(self, rows) -> np.ndarray:
+        """Pack a collection of row ids into a bitset."""
+        bits = np.zeros(self.size, dtype=bool)
+        bits[list(rows)] = True
+        return np.packbits(bits)
+
+    def rows(self, bitset: np.ndarray) -> np.ndarray:
+        """Unpack a bitset into the sorted array of row ids it contains."""
+        return np.flatnonzero(np.unpackbits(bitset, count=self.size))
+
+    def evaluate(self, filters: MetadataFilters) -> np.ndarray:
+        """
+        Evaluate (possibly nested) metadata filters against the indexes.
+
+        Args:
+            filters: Filters as built by VectorStoreService.create_metadata_filters
+
+        Returns:
+            Bitset of the eligible row ids
+        """
+        bitsets = []
+        for subfilter in filters.filters:
+            if isinstance(subfilter, MetadataFilters):
+                bitsets.append(self.evaluate(subfilter))
+            else:
+                bitsets.append(self._evaluate_filter(subfilter))
+        if not bitsets:
+            return self.all_rows
+        condition = getattr(filters.condition, "value", filters.condition)
+        combine = np.bitwise_or if condition == "or" else np.bitwise_and
+        return combine.reduce(bitsets)
+
+    def _evaluate_filter(self, subfilter: MetadataFilter) -> np.ndarray:
+        """Evaluate a single filter to a bitset."""
+        key, operator, target = subfilter.key, subfilter.operator, subfilter.value
+        if key == RANGE_FIELD:
+            return self._range(operator, target)
+        if key in FLAG_FIELDS:
+            flag = self._flag(target)
+            bitset = self.values[key].get(flag, self.no_rows) if flag is not None else self.no_rows
+            return ~bitset & self.all_rows if operator == FilterOperator.NE else bitset
+        if key not in KEYWORD_FIELDS:
+            raise ValueError(f"Field {key!r} is not indexed")
+
+        index = self.values[key]
+        targets = target if isinstance(target, list) else [target]
+        targets = [self._normalize(key, value) for value in targets]
+        if operator == FilterOperator.CONTAINS and key != "job_levels":
+            # Substring semantics over the (small) value vocabulary; job levels keep the
+            # exact comparison the old post-filter applied
+            matched = [bits for value, bits in index.items() if any(t and t in value for t in targets)]
+        elif operator in (FilterOperator.EQ, FilterOperator.IN, FilterOperator.CONTAINS, FilterOperator.NE):
+            matched = [index[value] for value in targets if value in index]
+        else:
+            raise ValueError(f"Operator {operator} is not supported on {key!r}")
+        bitset = np.bitwise_or.reduce(matched) if matched else self.no_rows
+        return ~bitset & self.all_rows if operator == FilterOperator.NE else bitset
+
+    def _range(self, operator: FilterOperator, target: Any) -> np.ndarray:
+        """Evaluate a comparison on the sorted duration index."""
+        sorted_values = self.duration_sorted
+        if operator == FilterOperator.GTE:
+            rows = self.duration_rows[np.searchsorted(sorted_values, target, side="left"):]
+        elif operator == FilterOperator.GT:
+            rows = self.duration_rows[np.searchsorted(sorted_values, target, side="right"):]
+        elif operator == FilterOperator.LTE:
+            rows = self.duration_rows[:np.searchsorted(sorted_values, target, side="right")]
+        elif operator == FilterOperator.LT:
+            rows = self.duration_rows[:np.searchsorted(sorted_values, target, side="left")]
+        elif operator == FilterOperator.EQ:
+            rows = self.duration_rows[
+                np.searchsorted(sorted_values, target, side="left"):np.searchsorted(sorted_values, target, side="right")
+            ]
+        else:
+            raise ValueError(f"Operator {operator} is not supported on {RANGE_FIELD!r}")
+        return self._bitset(rows)
@@ -0,0 +1,70 @@
+"""Process-wide registry for the query embedding model."""
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.config import settings
+from query.services.embedding_backends import create_embedding_backend
+from query.utils.log import get_logger
+
+logger = get_logger(__name__)
+
+class ModelRegistry:
+    """Load the embedding model once per process and keep it warm."""
+
+    _instance = None
+
+    def __new__(cls):
+        """Singleton pattern to ensure the model weights are only loaded once."""
+        if cls._instance is None:
+            cls._instance = super(ModelRegistry, cls).__new__(cls)
+            cls._instance._initialize()
+        return cls._instance
+
+    def _initialize(self):
+        """Set up an empty registry; weights are loaded by `load`."""
+        self.model_name = settings.embedding_model_name
+        self.backend_name = settings.embedding_backend
+        self.backend = None
+        self.ready = False
+        self.load_seconds = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """
+        Load the configured embedding backend and warm it up.
+
+        Safe to call more than once; only the first call does any work.
+        """
+        with self._lock:
+            if self.backend is not None:
+                return
+            start = time.perf_counter()
+            backend = create_embedding_backend(self.backend_name)
+            backend.load()
+            self.backend = backend
+            self.warmup()
+            self.load_seconds = time.perf_counter() - start
+            self.ready = True
+            logger.info("embedding model ready", extra={"fields": {
+                "model": self.model_name, "backend": self.backend_name, "load_seconds": round(self.load_seconds, 3),
+            }})
+
+    def warmup(self):
+        """Run a few throwaway inferences so the first real request is not slow."""
+        for _ in range(settings.embedding_warmup_runs):
+            self.backend.embed(["warm-up query for the assessment search model"])
+
+    def get(self):
+        """
+        Return the loaded embedding backend, loading it on first use.
+
+        Returns:
+            Backend exposing `embed(texts)`
+        """
+        if self.backend is None:
+            self.load()
+        return self.backend
+
+model_registry = ModelRegistry()
@@ -0,0 +1,348 @@
+"""Recommendation pipeline: filter extraction, query embedding, search and response assembly."""
+import asyncio
+import os
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llama_index.core.vector_stores.types import VectorStoreQuery
+from config.config import settings
+from query.models.schemas import QueryResponse, AssessmentResponse, BatchItemResponse, BatchQueryResponse
+from query.services.embedding_batcher import embedding_batcher
+from query.services.local_index import local_index
+from query.services.metadata_extractor import LLMMetadataExtractor
+from query.services.response_cache import response_cache
+from query.services.semantic_cache import semantic_cache
+from query.services.vector_store import VectorStoreService
+from query.utils.helpers import parse_json_or_return_as_list
+from query.utils.log import get_logger
+from query.utils.metrics import BATCH_QUERIES, FILTER_SOURCES, RESULTS_RETURNED, SEARCHES, observe_stages
+from query.utils.timing import StageTimer, current_timer
+
+logger = get_logger(__name__)
+
+class RecommendationService:
+    """Run the /recommend pipeline without blocking the event loop."""
+
+    def __init__(self):
+        """Initialize the services used by the pipeline."""
+        self.metadata_extractor = LLMMetadataExtractor()
+        self.vector_store_service = VectorStoreService()
+
+    async def recommend(self, query: str, top_k: Optional[int] = None) -> QueryResponse:
+        """
+        Recommend assessments for a natural language query.
+
+        Filter extraction and query embedding are independent, so they run concurrently.
+        Finished responses are cached against the collection version stamp: a repeated query
+        skips the pipeline until the next ingestion, and once the embedding is ready a
+        near-duplicate query is answered from the semantic cache, cancelling the extraction.
+
+        Args:
+            query: The natural language query
+            top_k: Number of results to retrieve (defaults to settings.top_k)
+
+        Returns:
+            QueryResponse with the matching assessments
+        """
+        timer = current_timer()
+        top_k = top_k or settings.top_k
+        with timer.stage("response_cache"):
+            version = await self.vector_store_service.aget_collection_version()
+            cached = response_cache.get(query, top_k, version)
+        if cached is not None:
+            observe_stages(timer)
+            return cached
+
+        extraction = asyncio.ensure_future(
+            self._timed(timer, "extraction", self.metadata_extractor.aextract_filters(query))
+        )
+        try:
+            with timer.stage("embedding"):
+                embedding = await embedding_batcher.embed(query)
+            with timer.stage("semantic_cache"):
+                similar = semantic_cache.get(query, embedding, top_k, version)
+            if similar is not None:
+                FILTER_SOURCES.labels("semantic_cache").inc()
+                query_response = similar[0].model_copy(update={"filter_source": "semantic_cache"})
+                response_cache.set(query, top_k, version, query_response)
+                observe_stages(timer)
+                return query_response
+            extracted_metadata, filter_source = await extraction
+        finally:
+            if not extraction.done():
+                extraction.cancel()
+        FILTER_SOURCES.labels(filter_source).inc()
+
+        with timer.stage("search"):
+            response = await self.search(query, embedding, extracted_metadata, top_k)
+        with timer.stage("assembly"):
+            results = self.build_results(response.nodes)
+            query_response = QueryResponse(
+                results=results,
+                total_results=len(results),
+                filters=extracted_metadata,
+                filter_source=filter_source,
+            )
+            response_cache.set(query, top_k, version, query_response)
+            semantic_cache.set(query, embedding, top_k, version, query_response)
+        RESULTS_RETURNED.observe(len(results))
+        observe_stages(timer)
+        logger.info("recommend", extra={"fields": {
+            "filter_source": filter_source, "results": len(results), "timings_ms": timer.as_dict(),
+        }})
+        return query_response
+
+    @staticmethod
+    async def _timed(timer: StageTimer, stage: str, awaitable):
+        """Await `awaitable` and record how long it took as `stage`."""
+        started_at = time.perf_counter()
+        result = await awaitable
+        timer.record(stage, started_at)
+        return result
+
+    async def recommend_stream(self, query: str, top_k: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Recommend assessments for a query, yielding events as each stage completes.
+
+        Events are dicts with an "event" name and a "data" payload: one "filters" event once
+        the filters are known, one "result" event per assessment in rank order, then a
+        "summary" event with the result count and stage timings. Results are built and
+        yielded one at a time, so no full response body is assembled. Exact and semantic
+        cache hits are streamed the same way.
+
+        Args:
+            query: The natural language query
+            top_k: Number of results to retrieve (defaults to settings.top_k)
+
+        Yields:
+            Event dicts, in order
+        """
+        timer = StageTimer()
+        top_k = top_k or settings.top_k
+        version = await self.vector_store_service.aget_collection_version()
+        cached = response_cache.get(query, top_k, version)
+        if cached is not None:
+            for event in self._cached_events(cached, timer):
+                yield event
+            return
+
+        extraction = asyncio.ensure_future(
+            self._timed(timer, "extraction", self.metadata_extractor.aextract_filters(query))
+        )
+        try:
+            # The embedding is needed for the semantic cache lookup before committing to the filters
+            with timer.stage("embedding"):
+                embedding = await embedding_batcher.embed(query)
+            with timer.stage("semantic_cache"):
+                similar = semantic_cache.get(query, embedding, top_k, version)
+            if similar is not None:
+                extraction.cancel()
+                FILTER_SOURCES.labels("semantic_cache").inc()
+                for event in self._cached_events(similar[0].model_copy(update={"filter_source": "semantic_cache"}), timer):
+                    yield event
+                return
+
+            extracted_metadata, filter_source = await extraction
+            FILTER_SOURCES.labels(filter_source).inc()
+            yield {"event": "filters", "data": {"filters": extracted_metadata, "filter_source": filter_source}}
+
+            with timer.stage("search"):
+                response = await self.search(query, embedding, extracted_metadata, top_k)
+
+            total_results = 0
+            serialize_started_at = time.perf_counter()
+            for rank, node in enumerate(response.nodes):
+                yield {"event": "result", "data": {"rank": rank, **self.build_result(node).model_dump()}}
+                total_results += 1
+            timer.record("results", serialize_started_at)
+            RESULTS_RETURNED.observe(total_results)
+            observe_stages(timer)
+            yield {"event": "summary", "data": {
+                "total_results": total_results, "cached": False, "timings_ms": timer.as_dict(),
+            }}
+        finally:
+            # The client may disconnect mid-stream; don't leave work running behind it
+            if not extraction.done():
+                extraction.cancel()
+
+    @staticmethod
+    def _cached_events(cached: QueryResponse, timer: StageTimer):
+        """Stream events for a response served from a cache."""
+        observe_stages(timer)
+        yield {"event": "filters", "data": {"filters": cached.filters, "filter_source": cached.filter_source}}
+        for rank, item in enumerate(cached.results):
+            yield {"event": "result", "data": {"rank": rank, **item.model_dump()}}
+        yield {"event": "summary", "data": {
+            "total_results": cached.total_results, "cached": True, "timings_ms": timer.as_dict(),
+        }}
+
+    async def recommend_batch(self, queries: List[str], top_k: Optional[int] = None) -> BatchQueryResponse:
+        """
+        Recommend assessments for many queries at once.
+
+        Queries are embedded in batched forward passes, filter extraction runs with bounded
+        concurrency, and all searches are answered by the local index or sent to Qdrant in a
+        single batch request. A failure in
+        one query is reported on its own entry instead of failing the batch.
+
+        Args:
+            queries: The natural language queries
+            top_k: Number of results to retrieve per query (defaults to settings.top_k)
+
+        Returns:
+            BatchQueryResponse with one entry per query, in input order
+        """
+        timer = current_timer()
+        BATCH_QUERIES.observe(len(queries))
+        semaphore = asyncio.Semaphore(settings.batch_extraction_concurrency)
+
+        async def extract(query):
+            async with semaphore:
+                return await self.metadata_extractor.aextract_filters(query)
+
+        extractions, embeddings = await asyncio.gather(
+            self._timed(timer, "extraction", asyncio.gather(*(extract(query) for query in queries), return_exceptions=True)),
+            self._timed(timer, "embedding", embedding_batcher.embed_many(queries)),
+            return_exceptions=True,
+        )
+        errors = [None] * len(queries)
+        if isinstance(embeddings, Exception):
+            errors = [f"Embedding failed: {embeddings}"] * len(queries)
+        if isinstance(extractions, Exception):
+            extractions = [extractions] * len(queries)
+        for i, extraction in enumerate(extractions):
+            if isinstance(extraction, Exception):
+                if errors[i] is None:
+                    errors[i] = f"Filter extraction failed: {extraction}"
+            else:
+                FILTER_SOURCES.labels(extraction[1]).inc()
+
+        search_started_at = time.perf_counter()
+
+        vector_store = self.vector_store_service.vector_store
+        responses = {}
+        pending = []
+        requests = []
+        for i, error in enumerate(errors):
+            if error is not None:
+                continue
+            try:
+                vector_query = self.build_query(queries[i], embeddings[i], extractions[i][0], top_k)
+                if local_index.ready:
+                    responses[i] = local_index.search(
+                        vector_query.query_embedding, vector_query.filters, vector_query.similarity_top_k
+                    )
+                    SEARCHES.labels("local").inc()
+                    continue
+                requests.append(self.vector_store_service.search_request(vector_query))
+                pending.append(i)
+            except Exception as e:
+                errors[i] = f"Invalid filters: {e}"
+
+        if pending:
+            try:
+                batch = await self.vector_store_service.aclient.query_batch_points(
+                    collection_name=settings.qdrant_collection_name,
+                    requests=requests,
+                )
+                for i, points in zip(pending, batch):
+                    responses[i] = vector_store.parse_to_query_result(points.points)
+                SEARCHES.labels("qdrant").inc(len(pending))
+            except Exception as e:
+                for i in pending:
+                    errors[i] = f"Search failed: {e}"
+
+        timer.record("search", search_started_at)
+
+        assembly_started_at = time.perf_counter()
+        results = []
+        for i in range(len(queries)):
+            if errors[i] is None:
+                try:
+                    extracted_metadata, filter_source = extractions[i]
+                    items = self.build_results(responses[i].nodes)
+                    RESULTS_RETURNED.observe(len(items))
+                    results.append(BatchItemResponse(index=i, response=QueryResponse(
+                        results=items,
+                        total_results=len(items),
+                        filters=extracted_metadata,
+                        filter_source=filter_source,
+                    )))
+                    continue
+                except Exception as e:
+                    errors[i] = f"Response assembly failed: {e}"
+            results.append(BatchItemResponse(index=i, error=errors[i]))
+        timer.record("assembly", assembly_started_at)
+        observe_stages(timer)
+
+        return BatchQueryResponse(
+            results=results,
+            total_queries=len(queries),
+            failed_queries=sum(1 for result in results if result.error is not None),
+        )
+
+    def build_query(self, query: str, embedding, extracted_metadata: Dict[str, Any],
+                    top_k: Optional[int] = None) -> VectorStoreQuery:
+        """Build the vector store query for an embedding and the extracted filters."""
+        metadata_filters = self.vector_store_service.create_metadata_filters(
+            job_levels=extracted_metadata.get('job_levels'),
+            languages=extracted_metadata.get('languages'),
+            min_duration=extracted_metadata.get('min_duration'),
+            max_duration=extracted_metadata.get('max_duration'),
+            assessment_type=extracted_metadata.get('assessment_type'),
+            adaptive_support=extracted_metadata.get('adaptive_support'),
+            remote_support=extracted_metadata.get('remote_support')
+        )
+        return VectorStoreQuery(
+            query_embedding=embedding.tolist(),
+            query_str=query,
+            filters=metadata_filters,
+            similarity_top_k=top_k or settings.top_k,
+        )
+
+    async def search(self, query: str, embedding, extracted_metadata: Dict[str, Any], top_k: Optional[int] = None):
+        """Run the filtered vector search, in process when the local index is loaded, else on Qdrant."""
+        vector_query = self.build_query(query, embedding, extracted_metadata, top_k)
+        if local_index.ready:
+            SEARCHES.labels("local").inc()
+            return local_index.search(vector_query.query_embedding, vector_query.filters, vector_query.similarity_top_k)
+        SEARCHES.labels("qdrant").inc()
+        return await self.vector_store_service.asearch(vector_query)
+
+    def build_results(self, nodes) -> List[AssessmentResponse]:
+        """
+        Convert search result nodes into response items.
+
+        Filters are applied exactly by the search itself, so every node is kept.
+
+        Args:
+            nodes: Nodes returned by the vector store
+
+        Returns:
+            List of AssessmentResponse objects
+        """
+        return [self.build_result(node) for node in nodes]
+
+    def build_result(self, node) -> AssessmentResponse:
+        """Build one response item from a result node."""
+        metadata = node.metadata
+
+        # Payloads hold native arrays; older collections may still hold JSON strings
+        job_levels_parsed = parse_json_or_return_as_list(metadata.get("job_levels", []))
+        languages_parsed = parse_json_or_return_as_list(metadata.get("languages", []))
+
+        # Create structured result
+        return AssessmentResponse(
+            title=metadata.get("title", ""),
+            url=metadata.get("url", ""),
+            description=node.text,
+            job_levels=job_levels_parsed,
+            languages=languages_parsed,
+            duration=metadata.get("duration_minutes", 0),
+            remote_support=metadata.get("remote_support", False),
+            test_type=metadata.get("assessment_type", ""),
+            adaptive_support=metadata.get("adaptive_support", False),
+        )
+
+recommendation_service = RecommendationService()
@@ -0,0 +1,60 @@
+"""Cache of finished /recommend responses, invalidated by the collection version stamp."""
+import os
+import sys
+from typing import Any, Dict, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.config import settings
+from query.models.schemas import QueryResponse
+from query.utils.cache import TTLLRUCache
+from query.utils.helpers import normalize_query
+from query.utils.metrics import CACHE_LOOKUPS
+
+# Marks a cache that has not seen any collection version yet
+_UNSET = object()
+
+class ResponseCache:
+    """Size-bounded cache of QueryResponse objects keyed on query, top_k and collection version."""
+
+    def __init__(self, max_size: int = None, ttl_seconds: float = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached responses
+            ttl_seconds: Optional lifetime of a cached response (0 keeps it until evicted or invalidated)
+        """
+        self.cache = TTLLRUCache(
+            max_size if max_size is not None else settings.response_cache_size,
+            ttl_seconds if ttl_seconds is not None else settings.response_cache_ttl_seconds,
+        )
+        self.version = _UNSET
+        self.invalidations = 0
+
+    def _check_version(self, version: Optional[str]):
+        """Drop every entry once a new ingestion has been stamped."""
+        if version != self.version:
+            if self.version is not _UNSET:
+                self.cache.clear()
+                self.invalidations += 1
+            self.version = version
+
+    def get(self, query: str, top_k: int, version: Optional[str]) -> Optional[QueryResponse]:
+        """Return the cached response for this query, top_k and collection version, if any."""
+        self._check_version(version)
+        response = self.cache.get((normalize_query(query), top_k, version))
+        CACHE_LOOKUPS.labels("response", "miss" if response is None else "hit").inc()
+        return response
+
+    def set(self, query: str, top_k: int, version: Optional[str], response: QueryResponse):
+        """Cache a finished response."""
+        self._check_version(version)
+        self.cache.set((normalize_query(query), top_k, version), response)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, size and the number of version invalidations."""
+        stats = self.cache.stats()
+        stats["invalidations"] = self.invalidations
+        stats["version"] = None if self.version is _UNSET else self.version
+        return stats
+
+response_cache = ResponseCache()
@@ -0,0 +1,314 @@
+"""Deterministic rule- and gazetteer-based filter extraction for simple queries."""
+import json
+import os
+import re
+import sys
+from typing import Any, Dict, List, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.config import settings
+from query.utils.helpers import normalize_job_level
+from query.utils.log import get_logger
+from query.utils.vocabulary import (ASSESSMENT_TYPE_PHRASES, LANGUAGE_QUALIFIERS, canonical_job_level,
+                                    canonical_language, match_assessment_type)
+
+logger = get_logger(__name__)
+
+# Query phrasings that map onto the catalog's job levels
+JOB_LEVEL_SYNONYMS = {
+    "entry level": ["entry-level"],
+    "entry-level": ["entry-level"],
+    "junior": ["entry-level"],
+    "fresher": ["entry-level"],
+    "freshers": ["entry-level"],
+    "beginner": ["entry-level"],
+    "new grad": ["graduate"],
+    "new grads": ["graduate"],
+    "graduates": ["graduate"],
+    "mid level": ["mid-professional"],
+    "mid-level": ["mid-professional"],
+    "mid-senior": ["mid-professional"],
+    "intermediate": ["mid-professional"],
+    "experienced": ["mid-professional", "professional individual contributor"],
+    "senior": ["mid-professional", "professional individual contributor"],
+    "individual contributor": ["professional individual contributor"],
+    "team lead": ["front line manager", "supervisor"],
+    "team leads": ["front line manager", "supervisor"],
+    "senior manager": ["manager"],
+    "senior managers": ["manager"],
+    "managers": ["manager"],
+    "management": ["manager"],
+    "supervisors": ["supervisor"],
+    "directors": ["director"],
+    "executives": ["executive"],
+    "c-level": ["executive"],
+}
+
+# Assessment type gazetteer, keyed by the phrase used in queries: the phrases ingestion
+# types catalog descriptions with, so every value is one the payloads hold
+ASSESSMENT_TYPES = dict(ASSESSMENT_TYPE_PHRASES)
+
+UNIT_MINUTES = r"(?:minutes?|mins?|m\b)"
+UNIT_HOURS = r"(?:hours?|hrs?|h\b)"
+UNIT = rf"(?:{UNIT_MINUTES}|{UNIT_HOURS})"
+NUMBER = r"(\d+(?:\.\d+)?)"
+
+DURATION_RANGE = re.compile(rf"\b(?:between\s+)?{NUMBER}\s*{UNIT}?\s*(?:-|to|and)\s*{NUMBER}\s*({UNIT})")
+DURATION_MAX = re.compile(
+    rf"\b(?:under|less than|below|within|no more than|not more than|at most|maximum of|max|up to|"
+    rf"shorter than|fewer than|<=?)\s*{NUMBER}\s*({UNIT})"
+)
+DURATION_MIN = re.compile(
+    rf"\b(?:over|more than|longer than|at least|minimum of|min|above|greater than|>=?)\s*{NUMBER}\s*({UNIT})"
+)
+DURATION_BARE = re.compile(rf"\b{NUMBER}\s*-?\s*({UNIT})\b")
+HALF_HOUR = re.compile(r"\b(?:under|less than|within|no more than|at most|up to)\s+(half an hour|an hour|one hour)\b")
+
+ADAPTIVE_NEGATED = re.compile(r"\b(?:non-adaptive|not adaptive|without adaptive\w*)\b")
+ADAPTIVE = re.compile(r"\badaptive(?: testing| support)?\b")
+REMOTE_NEGATED = re.compile(r"\b(?:not remote(?:ly)?|in-person|onsite|on-site)\b")
+REMOTE = re.compile(r"\b(?:remote(?:ly)?(?: testing| support)?|online|from home)\b")
+
+# Words suggesting a filter the rules did not manage to parse
+CUE_WORDS = {
+    "minute", "minutes", "min", "mins", "hour", "hours", "hr", "hrs", "duration", "long", "longer",
+    "short", "shorter", "quick", "time", "level", "levels", "seniority", "language", "languages",
+    "adaptive", "remote", "remotely", "type", "not", "without", "except", "excluding", "exclude",
+    "no", "neither", "nor",
+}
+
+# Role and language words the vocabularies cannot map but the LLM can ("CEOs" are
+# executives, "Mandarin" is Chinese); left unexplained they make a result unconfident
+FILTER_NOUNS = {
+    "ceo", "ceos", "cto", "ctos", "cfo", "cfos", "coo", "coos", "cxo", "cxos", "vp", "vps", "chief",
+    "president", "presidents", "founder", "founders", "leader", "leaders", "lead", "leads", "head", "heads",
+    "intern", "interns", "internship", "trainee", "trainees", "apprentice", "apprentices", "principal",
+    "bilingual", "multilingual", "fluent", "speaks", "speaking", "speaker", "speakers", "native",
+    "mandarin", "cantonese", "tagalog", "filipino", "urdu", "bengali", "bangla", "punjabi", "tamil",
+    "telugu", "marathi", "gujarati", "kannada", "malayalam", "persian", "farsi", "swahili", "afrikaans",
+    "catalan", "norwegian", "hebrew", "castilian", "brazilian",
+}
+
+# Cue words that are accounted for once a duration has been parsed
+DURATION_WORDS = {"duration", "time", "long"}
+
+# Nouns that are accounted for once a language has been parsed
+LANGUAGE_WORDS = {"fluent", "speaks", "speaking", "speaker", "speakers", "native"}
+
+class RuleBasedFilterExtractor:
+    """Parse common filter phrasings without calling the LLM and report a confidence."""
+
+    def __init__(self, catalog_path: str = None):
+        """
+        Build the job level and language vocabularies from the ingested catalog.
+
+        Args:
+            catalog_path: Path to the raw catalog JSON (defaults to settings.catalog_path)
+        """
+        self.job_levels = {}
+        self.languages = {}
+        self._load_vocabulary(catalog_path or settings.catalog_path)
+        self._job_level_pattern = self._phrase_pattern(self.job_levels)
+        self._language_pattern = self._phrase_pattern(self.languages)
+        self._assessment_type_pattern = self._phrase_pattern(ASSESSMENT_TYPES)
+
+    def _load_vocabulary(self, catalog_path: str):
+        """Collect canonical job levels and languages from the catalog."""
+        try:
+            with open(catalog_path, 'r', encoding='utf-8') as f:
+                catalog = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning("could not load catalog vocabulary", extra={"fields": {"path": catalog_path, "error": repr(e)}})
+            catalog = []
+
+        for item in catalog:
+            for level in item.get('Job Levels', '').split(','):
+                level = normalize_job_level(level.strip())
+                if level:
+                    self.job_levels[level] = [level]
+            for language in item.get('Languages', '').split(','):
+                language = re.sub(r'\s*\([^)]*\)', '', language).strip().lower()
+                if not language:
+                    continue
+                self.languages.setdefault(language, [language])
+                # "spanish" also selects "latin american spanish"; filters match exactly
+                base = " ".join(word for word in language.split() if word not in LANGUAGE_QUALIFIERS)
+                if base and base != language:
+                    variants = self.languages.setdefault(base, [base])
+                    if language not in variants:
+                        variants.append(language)
+
+        for phrase, levels in JOB_LEVEL_SYNONYMS.items():
+            self.job_levels.setdefault(phrase, levels)
+
+    @staticmethod
+    def _phrase_pattern(vocabulary: Dict[str, Any]):
+        """Compile an alternation that prefers the longest phrase."""
+        if not vocabulary:
+            return None
+        phrases = sorted(vocabulary, key=len, reverse=True)
+        return re.compile(r"(?<![\w-])(?:" + "|".join(re.escape(p) for p in phrases) + r")(?![\w-])")
+
+    @staticmethod
+    def _to_minutes(value: str, unit: str) -> int:
+        """Convert a number and unit to whole minutes."""
+        minutes = float(value) * 60 if re.match(UNIT_HOURS, unit) else float(value)
+        return int(round(minutes))
+
+    def extract(self, query: str) -> Tuple[Dict[str, Any], float]:
+        """
+        Extract filters from a query with rules.
+
+        Args:
+            query: The natural language query to extract metadata from
+
+        Returns:
+            Tuple of (filters dict using the LLM prompt's field names, confidence between 0 and 1)
+        """
+        text = " ".join((query or "").lower().split())
+        filters = {}
+        spans = []
+        confidence = 1.0
+
+        def consume(match):
+            spans.append(match.span())
+
+        def free(match):
+            return not any(start < match.end() and match.start() < end for start, end in spans)
+
+        # Durations, most specific phrasing first
+        for match in DURATION_RANGE.finditer(text):
+            unit = match.group(3)
+            low, high = self._to_minutes(match.group(1), unit), self._to_minutes(match.group(2), unit)
+            filters['min_duration'], filters['max_duration'] = min(low, high), max(low, high)
+            consume(match)
+        for match in HALF_HOUR.finditer(text):
+            if free(match):
+                filters['max_duration'] = 30 if match.group(1).startswith("half") else 60
+                consume(match)
+        for match in DURATION_MAX.finditer(text):
+            if free(match):
+                filters['max_duration'] = self._to_minutes(match.group(1), match.group(2))
+                consume(match)
+        for match in DURATION_MIN.finditer(text):
+            if free(match):
+                filters['min_duration'] = self._to_minutes(match.group(1), match.group(2))
+                consume(match)
+        for match in DURATION_BARE.finditer(text):
+            if free(match) and 'max_duration' not in filters:
+                # "a 30 minute test" has no direction; treat it as an upper bound
+                filters['max_duration'] = self._to_minutes(match.group(1), match.group(2))
+                confidence -= 0.1
+                consume(match)
+
+        job_levels = self._match_vocabulary(self._job_level_pattern, self.job_levels, text, free, consume)
+        if job_levels:
+            filters['job_levels'] = job_levels
+
+        languages = self._match_vocabulary(self._language_pattern, self.languages, text, free, consume)
+        if languages:
+            filters['languages'] = languages
+
+        assessment_types = []
+        if self._assessment_type_pattern:
+            for match in self._assessment_type_pattern.finditer(text):
+                if free(match):
+                    assessment_types.append(ASSESSMENT_TYPES[match.group(0)])
+                    consume(match)
+        if len(set(assessment_types)) == 1:
+            filters['assessment_type'] = assessment_types[0]
+        elif assessment_types:
+            # The filter holds a single type; leave mixed requests to the LLM
+            confidence -= 0.5
+
+        for negated, positive, field in (
+            (ADAPTIVE_NEGATED, ADAPTIVE, 'adaptive_support'),
+            (REMOTE_NEGATED, REMOTE, 'remote_support'),
+        ):
+            for match in negated.finditer(text):
+                if free(match):
+                    filters[field] = 0
+                    consume(match)
+            for match in positive.finditer(text):
+                if free(match):
+                    filters.setdefault(field, 1)
+                    consume(match)
+
+        # Penalize every filter cue or role/language noun the rules left unexplained, so an
+        # empty result only counts as confident when the query carries no filter-like content
+        residual = list(text)
+        for start, end in spans:
+            residual[start:end] = " " * (end - start)
+        tokens = re.findall(r"[a-z0-9]+", "".join(residual))
+        explained = set()
+        if 'min_duration' in filters or 'max_duration' in filters:
+            explained |= DURATION_WORDS
+        if 'languages' in filters:
+            explained |= LANGUAGE_WORDS
+        unexplained = [
+            token for token in tokens
+            if (token in CUE_WORDS or token in FILTER_NOUNS or token.isdigit()) and token not in explained
+        ]
+        confidence -= 0.5 * len(unexplained)
+
+        return filters, max(0.0, min(1.0, confidence))
+
+    def canonicalize(self, filters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Map LLM-extracted filters onto the stored vocabulary.
+
+        Job levels and languages go through the same phrase tables as the rules ("senior"
+        becomes the levels it stands for, "spanish" also selects "latin american spanish"),
+        the assessment type through the shared vocabulary. Values outside the vocabulary
+        are dropped: an exact filter on them would match nothing.
+
+        Args:
+            filters: Filters in the LLM prompt's field names
+
+        Returns:
+            The filters with canonical values; list filters left empty are removed
+        """
+        canonical = dict(filters)
+        dropped = {}
+        for field, vocabulary, fallback in (
+            ('job_levels', self.job_levels, canonical_job_level),
+            ('languages', self.languages, canonical_language),
+        ):
+            values = canonical.pop(field, None)
+            if not values:
+                continue
+            mapped = []
+            for value in values if isinstance(values, list) else [values]:
+                key = " ".join(re.sub(r'\s*\([^)]*\)', '', str(value)).lower().split())
+                targets = vocabulary.get(key) or [fallback(key)]
+                if targets[0] is None:
+                    dropped.setdefault(field, []).append(value)
+                    continue
+                mapped.extend(target for target in targets if target not in mapped)
+            if mapped:
+                canonical[field] = mapped
+        assessment_type = canonical.pop('assessment_type', None)
+        if assessment_type:
+            mapped = match_assessment_type(assessment_type)
+            if mapped is None:
+                dropped['assessment_type'] = assessment_type
+            else:
+                canonical['assessment_type'] = mapped
+        if dropped:
+            logger.info("filter values outside the vocabulary", extra={"fields": {"dropped": dropped}})
+        return canonical
+
+    @staticmethod
+    def _match_vocabulary(pattern, vocabulary, text, free, consume) -> List[str]:
+        """Return the canonical values of every vocabulary phrase found in the text."""
+        values = []
+        if pattern is None:
+            return values
+        for match in pattern.finditer(text):
+            if free(match):
+                for value in vocabulary[match.group(0)]:
+                    if value not in values:
+                        values.append(value)
+                consume(match)
+        return values
+
+rule_extractor = RuleBasedFilterExtractor()
@@ -0,0 +1,168 @@
+"""Cache that answers near-duplicate queries from the results of a similar earlier query."""
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from config.config import settings
+from query.models.schemas import QueryResponse
+from query.services.rule_extractor import rule_extractor
+from query.utils.metrics import CACHE_LOOKUPS
+
+# Marks a cache that has not seen any collection version yet
+_UNSET = object()
+
+class SemanticCache:
+    """
+    Bounded store of (query embedding, response) pairs searched by cosine similarity.
+
+    A lookup hits when a cached query is at least `threshold` similar to the new one.
+    Because paraphrases can still ask for different constraints ("under 30 minutes" vs
+    "under 60 minutes"), a hit also requires the rule-based filters of both queries to
+    agree. Entries are evicted least recently used and dropped when the collection
+    version changes.
+    """
+
+    def __init__(self, max_size: int = None, threshold: float = None, ttl_seconds: float = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of cached queries
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Optional lifetime of an entry (0 keeps it until evicted or invalidated)
+        """
+        self.max_size = max_size if max_size is not None else settings.semantic_cache_size
+        self.threshold = threshold if threshold is not None else settings.semantic_cache_threshold
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.semantic_cache_ttl_seconds
+        self.matrix = None
+        self.entries = [None] * self.max_size
+        self.last_used = np.zeros(self.max_size)
+        self.count = 0
+        self.version = _UNSET
+        self.hits = 0
+        self.misses = 0
+        self.guard_rejections = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._hit_similarities = []
+        self._lock = threading.Lock()
+
+    def _check_version(self, version: Optional[str]):
+        """Drop every entry once a new ingestion has been stamped."""
+        if version != self.version:
+            if self.version is not _UNSET:
+                self.entries = [None] * self.max_size
+                self.last_used[:] = 0
+                self.count = 0
+                self.invalidations += 1
+            self.version = version
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        """Flatten and L2-normalize an embedding."""
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _guard(query: str) -> Dict[str, Any]:
+        """Filters the rules find in a query; a hit requires these to match."""
+        return rule_extractor.extract(query)[0]
+
+    def get(self, query: str, embedding, top_k: int, version: Optional[str]) -> Optional[Tuple[QueryResponse, float]]:
+        """
+        Find the response of a cached query similar enough to this one.
+
+        Args:
+            query: The natural language query
+            embedding: Its embedding
+            top_k: Number of results requested
+            version: Current collection version
+
+        Returns:
+            Tuple of (cached response, similarity), or None on a miss
+        """
+        if self.max_size <= 0:
+            return None
+        vector = self._normalize(embedding)
+        with self._lock:
+            self._check_version(version)
+            if self.count == 0 or self.matrix is None or self.matrix.shape[1] != vector.shape[0]:
+                self.misses += 1
+                CACHE_LOOKUPS.labels("semantic", "miss").inc()
+                return None
+            scores = self.matrix[:self.count] @ vector
+            now = time.monotonic()
+            guard = None
+            # Best candidates first; stop at the first one below the threshold
+            for slot in np.argsort(-scores):
+                similarity = float(scores[slot])
+                if similarity < self.threshold:
+                    break
+                entry = self.entries[slot]
+                if entry is None or entry["top_k"] != top_k:
+                    continue
+                if self.ttl_seconds and now - entry["created_at"] > self.ttl_seconds:
+                    continue
+                if guard is None:
+                    guard = self._guard(query)
+                if guard != entry["guard"]:
+                    self.guard_rejections += 1
+                    CACHE_LOOKUPS.labels("semantic", "guard_rejected").inc()
+                    continue
+                self.last_used[slot] = now
+                self.hits += 1
+                CACHE_LOOKUPS.labels("semantic", "hit").inc()
+                self._hit_similarities.append(similarity)
+                del self._hit_similarities[:-1000]
+                return entry["response"], similarity
+            self.misses += 1
+            CACHE_LOOKUPS.labels("semantic", "miss").inc()
+            return None
+
+    def set(self, query: str, embedding, top_k: int, version: Optional[str], response: QueryResponse):
+        """Cache a finished response under its query embedding, evicting the least recently used entry if full."""
+        if self.max_size <= 0:
+            return
+        vector = self._normalize(embedding)
+        guard = self._guard(query)
+        with self._lock:
+            self._check_version(version)
+            if self.matrix is None or self.matrix.shape[1] != vector.shape[0]:
+                self.matrix = np.zeros((self.max_size, vector.shape[0]), dtype=np.float32)
+                self.count = 0
+            if self.count < self.max_size:
+                slot = self.count
+                self.count += 1
+            else:
+                slot = int(np.argmin(self.last_used))
+                self.evictions += 1
+            now = time.monotonic()
+            self.matrix[slot] = vector
+            self.last_used[slot] = now
+            self.entries[slot] = {
+                "query": query, "top_k": top_k, "guard": guard, "response": response, "created_at": now,
+            }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, guard rejections and the similarity of recent hits."""
+        lookups = self.hits + self.misses
+        similarities = self._hit_similarities
+        return {
+            "size": self.count,
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "guard_rejections": self.guard_rejections,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_similarity_p50": float(np.median(similarities)) if similarities else None,
+            "hit_similarity_min": float(min(similarities)) if similarities else None,
+        }
+
+semantic_cache = SemanticCache()
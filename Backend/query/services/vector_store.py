@@ -1,6 +1,7 @@
 """Vector store services for semantic search."""
 import os
 import sys
+import time
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import qdrant_client
 from llama_index.core import VectorStoreIndex
@@ -8,10 +9,37 @@ from llama_index.vector_stores.qdrant import QdrantVectorStore
 from llama_index.core.vector_stores.types import (
     MetadataFilters, 
     MetadataFilter,
-    FilterOperator
+    FilterOperator,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
 )
+from qdrant_client.http import models as rest
 from config.config import settings
-from query.utils.helpers import normalize_job_level
+from query.utils.log import get_logger
+from query.utils.vocabulary import canonical_job_level, canonical_language, match_assessment_type
+
+logger = get_logger(__name__)
+
+def version_collection_name(collection_name: str = None) -> str:
+    """Name of the sidecar collection holding the ingestion version stamp."""
+    return f"{collection_name or settings.qdrant_collection_name}{settings.qdrant_version_collection_suffix}"
+
+def read_collection_version(client, collection_name: str = None):
+    """
+    Read the version stamp written by the last completed ingestion.
+
+    Args:
+        client: Sync Qdrant client
+        collection_name: Data collection name (defaults to settings.qdrant_collection_name)
+
+    Returns:
+        Version string, or None if the collection has never been stamped
+    """
+    try:
+        points = client.retrieve(version_collection_name(collection_name), ids=[1], with_payload=True)
+    except Exception:
+        return None
+    return points[0].payload.get('version') if points else None
 
 class VectorStoreService:
     """Service for vector database operations."""
@@ -26,84 +54,130 @@ class VectorStoreService:
         return cls._instance
     
     def _initialize(self):
-        """Initialize Qdrant client and vector store."""
-        self.client = qdrant_client.QdrantClient(url=settings.qdrant_url,api_key=settings.qdrant_api_key)
+        """Initialize sync and async Qdrant clients and the vector store."""
+        if settings.qdrant_url == ":memory:":
+            # Local mode for benchmarks; the two in-memory clients do not share data
+            self.client = qdrant_client.QdrantClient(location=":memory:")
+            self.aclient = qdrant_client.AsyncQdrantClient(location=":memory:")
+        else:
+            self.client = qdrant_client.QdrantClient(url=settings.qdrant_url,api_key=settings.qdrant_api_key)
+            self.aclient = qdrant_client.AsyncQdrantClient(url=settings.qdrant_url,api_key=settings.qdrant_api_key)
         self.vector_store = QdrantVectorStore(
             client=self.client,
+            aclient=self.aclient,
             collection_name=settings.qdrant_collection_name,
         )
+        self._version = None
+        self._version_checked_at = 0.0
         # self.index = VectorStoreIndex.from_vector_store(self.vector_store)
     
+    async def aget_collection_version(self):
+        """
+        Return the collection version stamp, re-reading it at most every few seconds.
+
+        A failed read keeps the last known version: the caches keyed on it stay valid
+        through a transient Qdrant error instead of being dropped.
+
+        Returns:
+            Version string, or None if the collection has never been stamped
+        """
+        now = time.monotonic()
+        if now - self._version_checked_at < settings.collection_version_check_seconds:
+            return self._version
+        try:
+            points = await self.aclient.retrieve(version_collection_name(), ids=[1], with_payload=True)
+            self._version = points[0].payload.get('version') if points else None
+        except Exception as e:
+            logger.warning("collection version check failed, keeping the last known version", extra={"fields": {
+                "version": self._version, "error": repr(e),
+            }})
+        self._version_checked_at = now
+        return self._version
+
+    @staticmethod
+    def _in_vocabulary(field: str, values: list, canonical) -> list:
+        """Map filter values onto the stored vocabulary, skipping empty and unknown ones."""
+        normalized = []
+        for value in values:
+            if not value:
+                continue
+            mapped = canonical(value)
+            if mapped is None:
+                logger.info("filter value outside the vocabulary", extra={"fields": {"field": field, "value": value}})
+            elif mapped not in normalized:
+                normalized.append(mapped)
+        return normalized
+
     def create_metadata_filters(self, job_levels=None, languages=None, min_duration=None, max_duration=None,assessment_type=None, adaptive_support=None, remote_support=None):
         """
         Create metadata filters for semantic search.
-        
+
+        Job levels, languages and the assessment type are mapped onto the stored vocabulary
+        first; values outside it are dropped, since an exact filter on them matches nothing.
+
         Args:
             job_levels: List of job level strings to filter by
             languages: List of programming language strings to filter by
             min_duration: Minimum duration in minutes
             max_duration: Maximum duration in minutes
+            assessment_type: Assessment type to match exactly
+            adaptive_support: 0 or 1 to require or exclude adaptive testing
+            remote_support: 0 or 1 to require or exclude remote testing
             
         Returns:
             MetadataFilters object or None if no filters are applied
         """
         filters = []
-        print({"job_levels":job_levels, "languages":languages, "min_duration":min_duration, "max_duration":max_duration, "assessment_type":assessment_type, "adaptive_support":adaptive_support, "remote_support":remote_support})
-        # Job levels filter
+        logger.debug("metadata filters", extra={"fields": {
+            "job_levels": job_levels, "languages": languages, "min_duration": min_duration,
+            "max_duration": max_duration, "assessment_type": assessment_type,
+            "adaptive_support": adaptive_support, "remote_support": remote_support,
+        }})
+        # Job levels filter: exact match of any requested level against the keyword array
         if job_levels and isinstance(job_levels, list) and len(job_levels) > 0:
-            normalized_job_levels = [normalize_job_level(level) for level in job_levels if level]
+            normalized_job_levels = self._in_vocabulary("job_levels", job_levels, canonical_job_level)
             
             if normalized_job_levels:
-                job_level_conditions = []
-                
-                for level in normalized_job_levels:
-                    job_level_conditions.append(
-                        MetadataFilter(
-                            key="job_levels",
-                            operator=FilterOperator.CONTAINS,
-                            value=level
-                        )
+                filters.append(
+                    MetadataFilter(
+                        key="job_levels",
+                        operator=FilterOperator.IN,
+                        value=normalized_job_levels
                     )
-                
-                if len(job_level_conditions) > 1:
-                    filters.append(job_level_conditions)
-                else:
-                    filters.extend(job_level_conditions)
+                )
                 
         # Languages filter
         if languages and isinstance(languages, list) and len(languages) > 0:
-            language_conditions = []
+            normalized_languages = self._in_vocabulary("languages", languages, canonical_language)
             
-            for language in languages:
-                if language:  # Skip empty strings
-                    language_conditions.append(
-                        MetadataFilter(
-                            key="languages",
-                            operator=FilterOperator.CONTAINS,
-                            value=language.lower()
-                        )
+            if normalized_languages:
+                filters.append(
+                    MetadataFilter(
+                        key="languages",
+                        operator=FilterOperator.IN,
+                        value=normalized_languages
                     )
-            
-            if len(language_conditions) > 1:
-                filters.append(language_conditions)
-            elif len(language_conditions) == 1:
-                filters.extend(language_conditions)
+                )
         
         if assessment_type is not None and assessment_type != "":
-            filters.append(
-                MetadataFilter(
-                    key="assessment_type",
-                    operator=FilterOperator.EQ,
-                    value=assessment_type
+            normalized_assessment_type = match_assessment_type(assessment_type)
+            if normalized_assessment_type is None:
+                logger.info("assessment type outside the vocabulary", extra={"fields": {"value": assessment_type}})
+            else:
+                filters.append(
+                    MetadataFilter(
+                        key="assessment_type",
+                        operator=FilterOperator.EQ,
+                        value=normalized_assessment_type
+                    )
                 )
-            )
 
         if adaptive_support is not None and isinstance(adaptive_support, int) and adaptive_support in [0, 1]:
             filters.append(
                 MetadataFilter(
                     key="adaptive_support",
                     operator=FilterOperator.EQ,
-                    value=adaptive_support
+                    value=int(adaptive_support)
                 )
             )
 
@@ -112,7 +186,7 @@ class VectorStoreService:
                 MetadataFilter(
                     key="remote_support",
                     operator=FilterOperator.EQ,
-                    value=remote_support
+                    value=int(remote_support)
                 )
             )
         
@@ -143,4 +217,64 @@ class VectorStoreService:
             )
         return None
     
-    
\ No newline at end of file
+    
+
+    @staticmethod
+    def build_qdrant_filter(metadata_filters: MetadataFilters = None):
+        """
+        Translate filters built by `create_metadata_filters` into a Qdrant filter.
+
+        Args:
+            metadata_filters: AND-combined IN, EQ, GTE and LTE filters, or None
+
+        Returns:
+            Qdrant Filter requiring every condition, or None if there is nothing to filter on
+
+        Raises:
+            ValueError: If a filter uses an operator `create_metadata_filters` never emits
+        """
+        if metadata_filters is None or not metadata_filters.filters:
+            return None
+        conditions = []
+        for subfilter in metadata_filters.filters:
+            if subfilter.operator == FilterOperator.IN:
+                condition = rest.FieldCondition(key=subfilter.key, match=rest.MatchAny(any=list(subfilter.value)))
+            elif subfilter.operator == FilterOperator.EQ:
+                condition = rest.FieldCondition(key=subfilter.key, match=rest.MatchValue(value=subfilter.value))
+            elif subfilter.operator == FilterOperator.GTE:
+                condition = rest.FieldCondition(key=subfilter.key, range=rest.Range(gte=subfilter.value))
+            elif subfilter.operator == FilterOperator.LTE:
+                condition = rest.FieldCondition(key=subfilter.key, range=rest.Range(lte=subfilter.value))
+            else:
+                raise ValueError(f"Unsupported filter operator {subfilter.operator!r} on {subfilter.key!r}")
+            conditions.append(condition)
+        return rest.Filter(must=conditions)
+
+    def search_request(self, vector_query: VectorStoreQuery):
+        """Build the Qdrant query request for a vector store query, for single and batched searches."""
+        return rest.QueryRequest(
+            query=vector_query.query_embedding,
+            filter=self.build_qdrant_filter(vector_query.filters),
+            limit=vector_query.similarity_top_k,
+            with_payload=True,
+        )
+
+    async def asearch(self, vector_query: VectorStoreQuery) -> VectorStoreQueryResult:
+        """
+        Run one filtered vector search on Qdrant.
+
+        Args:
+            vector_query: Query embedding, filters and top k
+
+        Returns:
+            Matching nodes with their similarity scores
+        """
+        request = self.search_request(vector_query)
+        response = await self.aclient.query_points(
+            collection_name=settings.qdrant_collection_name,
+            query=request.query,
+            query_filter=request.filter,
+            limit=request.limit,
+            with_payload=True,
+        )
+        return self.vector_store.parse_to_query_result(response.points)
@@ -0,0 +1,94 @@
+"""Circuit breaker for calls to a flaky or slow upstream."""
+import threading
+import time
+from typing import Any, Dict
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker counting failures and slow calls.
+
+    While closed, calls go through; `failure_threshold` consecutive failures (errors,
+    timeouts or calls slower than `slow_call_seconds`) open it. While open, `allow()`
+    refuses calls until `recovery_seconds` have passed; then a single trial call is let
+    through (half-open) and its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, recovery_seconds: float, slow_call_seconds: float = None):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the breaker
+            recovery_seconds: Time the breaker stays open before allowing a trial call
+            slow_call_seconds: Successful calls slower than this count as failures (None disables)
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self.opened = 0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return whether a call may be attempted now."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, duration_seconds: float = 0.0):
+        """Record a completed call; slow calls are treated as failures."""
+        if self.slow_call_seconds is not None and duration_seconds > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self.consecutive_failures = 0
+            self.state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Record a failed call, opening the breaker at the threshold or after a failed trial."""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    self.opened += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release_trial(self):
+        """
+        Give back a half-open trial slot whose call ended without an outcome (e.g. was cancelled).
+
+        The breaker returns to open without restarting the recovery timer, so the next
+        call becomes the new trial; calls that resolved normally make this a no-op.
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN and self._trial_in_flight:
+                self.state = self.OPEN
+                self._trial_in_flight = False
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the state and counters."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "times_opened": self.opened,
+            "rejected_calls": self.rejected,
+        }
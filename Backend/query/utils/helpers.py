@@ -15,6 +15,20 @@ def normalize_job_level(job_level: str) -> str:
         return ""
     return job_level.lower()
 
+def normalize_query(query: str) -> str:
+    """
+    Normalize a query for cache lookups by lowercasing and collapsing whitespace.
+
+    Args:
+        query: The raw query string
+
+    Returns:
+        Normalized query string
+    """
+    if not query:
+        return ""
+    return " ".join(query.lower().split())
+
 def parse_json_or_return_as_list(value):
     """
     Parse a JSON string to a list or convert single value to a list.
@@ -0,0 +1,44 @@
+"""Structured (one JSON object per line) logging for the query service."""
+import json
+import logging
+import os
+import sys
+import time
+
+class JSONFormatter(logging.Formatter):
+    """Format records as single-line JSON, merging any `fields` passed via `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Serialize a log record."""
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Return a logger writing JSON lines to stderr.
+
+    The level comes from the LOG_LEVEL environment variable (default INFO). Structured
+    fields are passed as `logger.info("message", extra={"fields": {...}})`.
+
+    Args:
+        name: Logger name, usually the module's `__name__`
+
+    Returns:
+        Configured logger
+    """
+    root = logging.getLogger("query")
+    if not root.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JSONFormatter())
+        root.addHandler(handler)
+        root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+        root.propagate = False
+    return logging.getLogger(name if name.startswith("query") else f"query.{name}")
@@ -0,0 +1,41 @@
+"""Prometheus metrics for the recommendation pipeline."""
+from prometheus_client import Counter, Histogram
+from query.utils.timing import StageTimer
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "recommend_request_seconds", "End-to-end request latency", ["endpoint"], buckets=LATENCY_BUCKETS
+)
+STAGE_LATENCY = Histogram(
+    "recommend_stage_seconds", "Latency of each pipeline stage", ["stage"], buckets=LATENCY_BUCKETS
+)
+CACHE_LOOKUPS = Counter(
+    "recommend_cache_lookups_total", "Cache lookups by cache and result", ["cache", "result"]
+)
+FILTER_SOURCES = Counter(
+    "recommend_filter_source_total", "Where a query's filters came from", ["source"]
+)
+LLM_CALLS = Counter(
+    "recommend_llm_calls_total", "LLM extraction calls by outcome", ["outcome"]
+)
+LLM_HEDGES = Counter(
+    "recommend_llm_hedged_calls_total", "LLM calls that sent a hedge request", ["winner"]
+)
+SEARCHES = Counter(
+    "recommend_searches_total", "Vector searches by backend", ["backend"]
+)
+RESULTS_RETURNED = Histogram(
+    "recommend_results_returned", "Results returned per query", buckets=(0, 1, 2, 5, 10, 20, 50, 100)
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "recommend_embedding_batch_size", "Texts per embedding forward pass", buckets=(1, 2, 4, 8, 16, 32, 64, 128)
+)
+BATCH_QUERIES = Histogram(
+    "recommend_batch_queries", "Queries per /recommend/batch request", buckets=(1, 5, 10, 50, 100, 500, 1000)
+)
+
+def observe_stages(timer: StageTimer):
+    """Record every stage of a finished request in the stage latency histogram."""
+    for stage, milliseconds in timer.stages.items():
+        STAGE_LATENCY.labels(stage).observe(milliseconds / 1000)
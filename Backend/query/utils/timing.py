@@ -0,0 +1,58 @@
+"""Lightweight per-request stage timing."""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+class StageTimer:
+    """Record wall-clock milliseconds per named pipeline stage."""
+
+    def __init__(self):
+        """Start the timer; `total_ms` is measured from construction."""
+        self.started_at = time.perf_counter()
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block under `name`, accumulating repeated stages."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started_at)
+
+    def record(self, name: str, started_at: float):
+        """Record a stage that started at a `time.perf_counter()` value and ends now."""
+        elapsed_ms = (time.perf_counter() - started_at) * 1000
+        self.stages[name] = self.stages.get(name, 0.0) + elapsed_ms
+
+    def total_ms(self) -> float:
+        """Milliseconds elapsed since the timer started."""
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def server_timing(self) -> str:
+        """Render the stages and total as a `Server-Timing` header value."""
+        metrics = [f"{name};dur={ms:.3f}" for name, ms in self.stages.items()]
+        metrics.append(f"total;dur={self.total_ms():.3f}")
+        return ", ".join(metrics)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Stage timings plus the total, rounded to microseconds."""
+        timings = {name: round(ms, 3) for name, ms in self.stages.items()}
+        timings["total"] = round(self.total_ms(), 3)
+        return timings
+
+# Timer of the request being handled; tasks spawned by the request share it
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+
+def set_current_timer(timer: StageTimer):
+    """Make `timer` the timer of the current request context."""
+    _current_timer.set(timer)
+
+def current_timer() -> StageTimer:
+    """Return the current request's timer, or a fresh one outside a request."""
+    timer = _current_timer.get()
+    if timer is None:
+        timer = StageTimer()
+        _current_timer.set(timer)
+    return timer
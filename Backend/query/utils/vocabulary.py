@@ -0,0 +1,103 @@
+"""Controlled vocabulary of the filterable payload fields, shared by ingestion and the query side."""
+import re
+from typing import Any, Optional
+
+# Canonical job levels, as stored in the payload and matched by filters
+JOB_LEVELS = (
+    "director", "entry-level", "executive", "front line manager", "general population", "graduate",
+    "manager", "mid-professional", "professional individual contributor", "supervisor",
+)
+JOB_LEVEL_ALIASES = {
+    "entry level": "entry-level",
+    "mid professional": "mid-professional",
+    "mid-level": "mid-professional",
+    "front-line manager": "front line manager",
+    "frontline manager": "front line manager",
+    "individual contributor": "professional individual contributor",
+}
+
+# Base language names; a stored language is one of these plus optional qualifiers
+LANGUAGES = {
+    "arabic", "bulgarian", "chinese", "croatian", "czech", "danish", "dutch", "english", "estonian",
+    "finnish", "flemish", "french", "german", "greek", "hebrew", "hindi", "hungarian", "icelandic",
+    "indonesian", "italian", "japanese", "korean", "latvian", "lithuanian", "malay", "norwegian",
+    "polish", "portuguese", "romanian", "russian", "serbian", "slovak", "slovenian", "spanish",
+    "swedish", "thai", "turkish", "ukrainian", "vietnamese",
+}
+# Words that qualify a language rather than name it ("chinese simplified", "latin american spanish")
+LANGUAGE_QUALIFIERS = {"international", "simplified", "traditional", "latin", "american"}
+
+# Canonical assessment types, as stored in the payload and matched by filters
+ASSESSMENT_TYPES = ("cognitive", "development & 360", "knowledge & skills", "personality", "simulation")
+
+# Phrases naming an assessment type, in catalog descriptions, LLM replies and queries. Bare
+# "ability" is left out: descriptions use it for the skills a test covers ("the ability to ...")
+ASSESSMENT_TYPE_PHRASES = {
+    "cognitive": "cognitive",
+    "cognitive ability": "cognitive",
+    "ability test": "cognitive",
+    "ability tests": "cognitive",
+    "aptitude": "cognitive",
+    "reasoning": "cognitive",
+    "personality": "personality",
+    "behavior": "personality",
+    "behaviour": "personality",
+    "behavioral": "personality",
+    "behavioural": "personality",
+    "simulation": "simulation",
+    "simulations": "simulation",
+    "simulated": "simulation",
+    "knowledge": "knowledge & skills",
+    "knowledge & skills": "knowledge & skills",
+    "knowledge and skills": "knowledge & skills",
+    "skills test": "knowledge & skills",
+    "360": "development & 360",
+    "development & 360": "development & 360",
+    "development and 360": "development & 360",
+    "development report": "development & 360",
+}
+
+# Replies meaning the text names no assessment type
+NO_ASSESSMENT_TYPE = {"", "none", "null", "n/a", "na", "other", "unknown"}
+
+_ASSESSMENT_TYPE_PATTERN = re.compile(
+    r"(?<![\w-])(?:" + "|".join(re.escape(p) for p in sorted(ASSESSMENT_TYPE_PHRASES, key=len, reverse=True))
+    + r")(?![\w-])"
+)
+
+def _words(value: Any) -> str:
+    """Lower-case a value and collapse its whitespace."""
+    return " ".join(str(value).lower().split())
+
+def match_assessment_type(text: Any) -> Optional[str]:
+    """
+    Map a text onto the canonical assessment type it names.
+
+    Returns:
+        The single type the text names, or None if it names none or several
+    """
+    if text is None:
+        return None
+    types = {ASSESSMENT_TYPE_PHRASES[match.group(0)] for match in _ASSESSMENT_TYPE_PATTERN.finditer(_words(text))}
+    return types.pop() if len(types) == 1 else None
+
+def canonical_job_level(value: Any) -> Optional[str]:
+    """Return the canonical job level of a value, or None if it is not one."""
+    level = _words(value)
+    level = JOB_LEVEL_ALIASES.get(level, level)
+    return level if level in JOB_LEVELS else None
+
+def canonical_language(value: Any) -> Optional[str]:
+    """
+    Return the canonical form of a language, or None if it is not one.
+
+    Regional indicators are dropped ("English (USA)" becomes "english"); qualified names
+    such as "Chinese Simplified" keep their qualifier.
+    """
+    language = _words(re.sub(r"\s*\([^)]*\)", "", str(value)))
+    words = language.split()
+    if not words or not any(word in LANGUAGES for word in words):
+        return None
+    if any(word not in LANGUAGES and word not in LANGUAGE_QUALIFIERS for word in words):
+        return None
+    return language
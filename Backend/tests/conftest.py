@@ -0,0 +1,18 @@
+"""Shared test setup: settings placeholders and the Backend import path."""
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Placeholders for the settings without defaults, used only when the environment has none;
+# set before any test imports config.config
+REQUIRED_SETTINGS = {
+    "QDRANT_URL": ":memory:",
+    "EMBEDDING_MODEL_NAME": "BAAI/bge-small-en-v1.5",
+    "LLM_MODEL_NAME": "stub",
+    "QDRANT_API_KEY": "",
+    "QDRANT_COLLECTION_NAME": "assessments",
+    "GROQ_API_KEY": "stub",
+    "TOP_K": "10",
+}
+for name, value in REQUIRED_SETTINGS.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,31 @@
+"""The query-side assessment type gazetteer against what ingestion stores."""
+import json
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.config import settings
+from Ingestion.field_parsers import parse_fields
+from Ingestion.payload import build_payload
+from query.services.rule_extractor import ASSESSMENT_TYPES, rule_extractor
+
+def ingested_assessment_types():
+    """Assessment types of the catalog payloads ingestion builds from its rule-parsed fields."""
+    with open(settings.catalog_path, 'r', encoding='utf-8') as f:
+        catalog = json.load(f)
+    payloads = [
+        build_payload({'title': item.get('Title', ''), 'url': item.get('URL', ''), **parse_fields(item)})
+        for item in catalog
+    ]
+    return {payload['assessment_type'] for payload in payloads}
+
+def test_every_gazetteer_type_is_stored():
+    """An assessment type filter from the rules must be able to match some ingested item."""
+    stored = ingested_assessment_types()
+    missing = sorted(set(ASSESSMENT_TYPES.values()) - stored)
+    assert not missing, f"gazetteer types no payload holds: {missing}"
+
+def test_extracted_type_is_stored():
+    """The type the rules extract from a query is the stored keyword, not the query phrase."""
+    filters, _ = rule_extractor.extract("aptitude tests under 30 minutes")
+    assert filters['assessment_type'] == "cognitive"
+    assert filters['assessment_type'] in ingested_assessment_types()
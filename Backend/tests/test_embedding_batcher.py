@@ -0,0 +1,39 @@
+"""Shutdown of the embedding micro-batcher."""
+import asyncio
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from query.services.embedding_batcher import EmbeddingBatcher
+
+class BlockingEmbeddingService:
+    """Embedding service whose forward pass waits until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+
+    def embed_batch(self, texts):
+        self.started.set()
+        self.release.wait(5)
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+def test_stop_fails_in_progress_and_queued_queries():
+    """No caller may be left awaiting forever once the batcher stops."""
+    service = BlockingEmbeddingService()
+
+    async def scenario():
+        batcher = EmbeddingBatcher(service, window_ms=0, max_batch_size=1)
+        await batcher.start()
+        in_progress = asyncio.create_task(batcher.embed("in the forward pass"))
+        queued = asyncio.create_task(batcher.embed("waiting in the queue"))
+        while not service.started.is_set():
+            await asyncio.sleep(0.01)
+        await batcher.stop()
+        service.release.set()
+        return await asyncio.wait_for(asyncio.gather(in_progress, queued, return_exceptions=True), 1)
+
+    results = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results), results
@@ -0,0 +1,63 @@
+"""Warm-up failures and what /health reports for them."""
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config.config import settings
+from query.api import routers
+from query.services import lifecycle as lifecycle_module
+from query.services.lifecycle import ServiceLifecycle
+
+def health(monkeypatch, service: ServiceLifecycle):
+    """Status code and body of /health for the given lifecycle."""
+    monkeypatch.setattr(routers, "lifecycle", service)
+    response = asyncio.run(routers.health_check())
+    if isinstance(response, dict):
+        return 200, response
+    return response.status_code, response.body
+
+def test_failed_warm_up_is_unhealthy(monkeypatch):
+    """A warm-up that fails for good must not keep reporting a healthy process."""
+    def broken_load():
+        raise RuntimeError("model weights missing")
+
+    monkeypatch.setattr(lifecycle_module.model_registry, "load", broken_load)
+    service = ServiceLifecycle()
+    asyncio.run(service.warm_up())
+
+    assert service.stage == "failed"
+    assert not service.ready
+    assert "model weights missing" in service.error
+    status, body = health(monkeypatch, service)
+    assert status == 503
+    assert b"model weights missing" in body
+
+def test_local_index_failure_degrades_to_qdrant(monkeypatch):
+    """The local index is an optimization: failing to load it leaves the service ready on Qdrant."""
+    from query.services.local_index import local_index
+
+    def broken_index_load(client):
+        raise ConnectionError("qdrant unreachable")
+
+    async def no_refresh(client):
+        return None
+
+    monkeypatch.setattr(lifecycle_module.model_registry, "load", lambda: None)
+    monkeypatch.setattr(settings, "local_index_enabled", True)
+    monkeypatch.setattr(local_index, "load", broken_index_load)
+    monkeypatch.setattr(local_index, "run_refresh_loop", no_refresh)
+    service = ServiceLifecycle()
+
+    async def warm_up_and_stop():
+        await service.warm_up()
+        await service.stop()
+
+    asyncio.run(warm_up_and_stop())
+
+    assert service.ready
+    assert service.stage == "ready"
+    assert "qdrant unreachable" in service.degraded["local_index"]
+    assert not local_index.ready
+    status, body = health(monkeypatch, service)
+    assert status == 200
+    assert body["ready"]
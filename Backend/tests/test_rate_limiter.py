@@ -0,0 +1,47 @@
+"""Client-side rate limiting of ingestion LLM calls."""
+import types
+
+from Ingestion import rate_limiter
+from Ingestion.metadat_Extractor import MetadataExtractor
+
+class FakeClock:
+    """Virtual time for `time.monotonic`/`time.sleep`, so limits are checked without waiting."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def test_large_calls_stay_within_tokens_per_minute(monkeypatch):
+    """Calls far larger than the bucket's burst are charged in full, by their actual usage."""
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    limit, tokens_per_call, calls = 6000, 3000, 40
+
+    extractor = MetadataExtractor("stub", "stub", requests_per_minute=0, tokens_per_minute=limit)
+    sent = []
+
+    def create(**kwargs):
+        sent.append(clock.now)
+        message = types.SimpleNamespace(content="1")
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=message)],
+            usage=types.SimpleNamespace(total_tokens=tokens_per_call),
+        )
+
+    completions = types.SimpleNamespace(create=create)
+    extractor.client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    for _ in range(calls):
+        extractor._call_llm("Extract the duration from: 30 minutes")
+
+    # Every call within a one-minute window of another counts against the same minute
+    burst = extractor.token_limiter.capacity + tokens_per_call
+    for start in sent:
+        in_window = sum(1 for sent_at in sent if start <= sent_at < start + 60)
+        assert in_window * tokens_per_call <= limit + burst
+    observed_per_minute = (calls - 1) * tokens_per_call / (sent[-1] - sent[0]) * 60
+    assert observed_per_minute <= limit * 1.05
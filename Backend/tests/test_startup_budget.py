@@ -0,0 +1,33 @@
+"""Cold-start budget of the query service."""
+import importlib
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Placeholders for the settings without defaults, used only when the environment has none
+REQUIRED_SETTINGS = {
+    "EMBEDDING_MODEL_NAME": "BAAI/bge-small-en-v1.5",
+    "LLM_MODEL_NAME": "stub",
+    "QDRANT_API_KEY": "",
+    "QDRANT_COLLECTION_NAME": "assessments",
+    "GROQ_API_KEY": "stub",
+    "TOP_K": "10",
+}
+
+def test_time_to_health_is_within_budget(monkeypatch):
+    """A fresh uvicorn process must answer /health within settings.startup_budget_seconds."""
+    for name, value in REQUIRED_SETTINGS.items():
+        if name not in os.environ:
+            monkeypatch.setenv(name, value)
+    # No model download or Qdrant server: the budget covers the service's own startup path
+    monkeypatch.setenv("EMBEDDING_BACKEND", "stub")
+    monkeypatch.setenv("QDRANT_URL", ":memory:")
+    monkeypatch.setenv("LOCAL_INDEX_ENABLED", "false")
+
+    startup_profile = importlib.import_module("benchmarks.startup_profile")
+    budget = startup_profile.settings.startup_budget_seconds
+
+    live, _, _ = startup_profile.profile_serve(ready_timeout=max(30.0, budget * 10))
+
+    assert live is not None, "/health never answered"
+    assert live <= budget, f"/health answered after {live:.2f}s, over the {budget:.2f}s budget"
@@ -1,3 +1,4 @@
+import json
 import streamlit as st
 import requests
 import pandas as pd
@@ -28,6 +29,35 @@ def query_assessments(query: str):
         st.error(f"Error querying API: {str(e)}")
         return {"results": [], "total_results": 0, "metadata_extracted": {}}
 
+def stream_assessments(query: str):
+    """Call the streaming endpoint and yield (event, data) pairs as they arrive"""
+    
+    request_data = {
+        "query": query,
+    }
+    
+    try:
+        with requests.post(f"{API_URL}/recommend/stream", json=request_data, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if line:
+                    event = json.loads(line)
+                    yield event["event"], event["data"]
+    except requests.exceptions.RequestException as e:
+        st.error(f"Error querying API: {str(e)}")
+
+def render_result(i: int, result: dict):
+    """Render one assessment as an expander"""
+    with st.expander(f"{i+1}. {result['title']} ({result['duration']} min)", expanded=i==0):
+        st.markdown(f"**Description:** {result['description']}")
+        st.markdown(f"**URL:** [{result['url']}]({result['url']})")
+        st.markdown(f"**Job Levels:** {', '.join(result['job_levels'])}")
+        st.markdown(f"**Languages:** {', '.join(result['languages'])}")
+        st.markdown(f"**Duration:** {result['duration']} minutes")
+        st.markdown(f"**Remote Support:** {'Yes' if result['remote_support'] else 'No'}")
+        st.markdown(f"**Adaptive Support:** {'Yes' if result['adaptive_support'] else 'No'}")
+        st.markdown(f"**Test Type:** {result['test_type']}")
+
 # Page header
 st.title("Assessment Search Tool")
 st.markdown("Search for assessments with natural language queries")
@@ -56,51 +86,50 @@ with st.expander("Example queries"):
 
 # Search results
 if search_clicked and query:
-    with st.spinner("Searching for assessments..."):
-        # Call API
-        response = query_assessments(query=query)
-        
-        # Show results count
-        st.subheader(f"Found {response['total_results']} matching assessments")
+    header = st.empty()
+    header.subheader("Searching for assessments...")
+    results = []
+    
+    # Render each result as soon as the API streams it
+    for event, data in stream_assessments(query=query):
+        if event == "filters":
+            applied = {k: v for k, v in data["filters"].items() if v is not None}
+            if applied:
+                st.caption(f"Filters: {applied}")
+        elif event == "result":
+            render_result(len(results), data)
+            results.append(data)
+        elif event == "summary":
+            header.subheader(f"Found {data['total_results']} matching assessments")
+        elif event == "error":
+            st.error(data["detail"])
+    
+    if results:
+        # Create a dataframe for download
+        df = pd.DataFrame([
+            {
+                "Title": r["title"],
+                "Description": r["description"],
+                "URL": r["url"],
+                "Job Levels": ", ".join(r["job_levels"]),
+                "Languages": ", ".join(r["languages"]),
+                "Duration (min)": r["duration"],
+                "Remote Support": "Yes" if r["remote_support"] else "No",
+                "Adaptive Support": "Yes" if r["adaptive_support"] else "No",
+                "Test Type": r["test_type"],
+                "Query": query,
+            } for r in results
+        ])
         
-        # Display results
-        if response["results"]:
-            for i, result in enumerate(response["results"]):
-                with st.expander(f"{i+1}. {result['title']} ({result['duration']} min)", expanded=i==0):
-                    st.markdown(f"**Description:** {result['description']}")
-                    st.markdown(f"**URL:** [{result['url']}]({result['url']})")
-                    st.markdown(f"**Job Levels:** {', '.join(result['job_levels'])}")
-                    st.markdown(f"**Languages:** {', '.join(result['languages'])}")
-                    st.markdown(f"**Duration:** {result['duration']} minutes")
-                    st.markdown(f"**Remote Support:** {'Yes' if result['remote_support'] else 'No'}")
-                    st.markdown(f"**Adaptive Support:** {'Yes' if result['adaptive_support'] else 'No'}")
-                    st.markdown(f"**Test Type:** {result['test_type']}")
-            
-            # Create a dataframe for download
-            df = pd.DataFrame([
-                {
-                    "Title": r["title"],
-                    "Description": r["description"],
-                    "URL": r["url"],
-                    "Job Levels": ", ".join(r["job_levels"]),
-                    "Languages": ", ".join(r["languages"]),
-                    "Duration (min)": r["duration"],
-                    "Remote Support": "Yes" if r["remote_support"] else "No",
-                    "Adaptive Support": "Yes" if r["adaptive_support"] else "No",
-                    "Test Type": r["test_type"],
-                    "Query": query,
-                } for r in response["results"]
-            ])
-            
-            # Download button
-            st.download_button(
-                label="Download Results as CSV",
-                data=df.to_csv(index=False).encode('utf-8'),
-                file_name="assessment_results.csv",
-                mime="text/csv",
-            )
-        else:
-            st.info("No matching assessments found. Try broadening your search.")
+        # Download button
+        st.download_button(
+            label="Download Results as CSV",
+            data=df.to_csv(index=False).encode('utf-8'),
+            file_name="assessment_results.csv",
+            mime="text/csv",
+        )
+    else:
+        st.info("No matching assessments found. Try broadening your search.")
 elif search_clicked:
     st.warning("Please enter a search query")
 